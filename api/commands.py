@@ -23,7 +23,15 @@ from libs.helper import email as email_validate
 from libs.password import hash_password, password_pattern, valid_password
 from libs.rsa import generate_key_pair
 from models import Tenant
-from models.dataset import Dataset, DatasetCollectionBinding, DatasetMetadata, DatasetMetadataBinding, DocumentSegment
+from models.dataset import (
+    Dataset,
+    DatasetCollectionBinding,
+    DatasetKeywordTable,
+    DatasetMetadata,
+    DatasetMetadataBinding,
+    DocumentSegment,
+    Embedding,
+)
 from models.dataset import Document as DatasetDocument
 from models.model import Account, App, AppAnnotationSetting, AppMode, Conversation, MessageAnnotation
 from models.provider import Provider, ProviderModel
@@ -1154,3 +1162,78 @@ def remove_orphaned_files_on_storage(force: bool):
         click.echo(click.style(f"Removed {removed_files} orphaned files without errors.", fg="green"))
     else:
         click.echo(click.style(f"Removed {removed_files} orphaned files, with {error_files} errors.", fg="yellow"))
+
+
+@click.command("migrate-embedding-cache-format", help="Convert cached embeddings from pickle to the binary format.")
+@click.option("--batch-size", default=1000, prompt=False, help="The number of embeddings converted per batch.")
+def migrate_embedding_cache_format(batch_size: int):
+    """
+    Convert legacy pickled rows of the embeddings table to the binary float format.
+    """
+    click.echo(click.style("Starting embedding cache format migration.", fg="green"))
+
+    last_id = None
+    converted_count = 0
+    scanned_count = 0
+    while True:
+        stmt = select(Embedding).order_by(Embedding.id).limit(batch_size)
+        if last_id is not None:
+            stmt = stmt.where(Embedding.id > last_id)
+        embeddings = db.session.scalars(stmt).all()
+        if not embeddings:
+            break
+        for embedding in embeddings:
+            if embedding.is_legacy_format:
+                try:
+                    embedding.set_embedding(embedding.get_embedding())
+                    converted_count += 1
+                except Exception as e:
+                    click.echo(click.style(f"Failed to convert embedding {embedding.id}: {str(e)}", fg="red"))
+        db.session.commit()
+        scanned_count += len(embeddings)
+        last_id = embeddings[-1].id
+        click.echo(click.style(f"Scanned {scanned_count} embeddings, converted {converted_count}.", fg="white"))
+
+    click.echo(click.style(f"Embedding cache format migration completed, converted {converted_count}.", fg="green"))
+
+
+@click.command("migrate-keyword-postings", help="Build jieba_postings keyword indexes from existing keyword tables.")
+def migrate_keyword_postings():
+    """
+    Copy every dataset keyword table into the dataset_keyword_postings table.
+    """
+    click.echo(click.style("Starting keyword postings migration.", fg="green"))
+
+    from core.rag.datasource.keyword.jieba.jieba_postings import JiebaPostings
+
+    migrated_count = 0
+    page = 1
+    while True:
+        try:
+            stmt = select(DatasetKeywordTable).order_by(DatasetKeywordTable.id)
+            keyword_tables = db.paginate(select=stmt, page=page, per_page=50, max_per_page=50, error_out=False)
+        except NotFound:
+            break
+        if not keyword_tables:
+            break
+        for keyword_table in keyword_tables:
+            try:
+                dataset = db.session.query(Dataset).filter(Dataset.id == keyword_table.dataset_id).first()
+                keyword_table_dict = keyword_table.keyword_table_dict
+                if not dataset or not keyword_table_dict:
+                    continue
+                node_keywords: dict[str, list[str]] = {}
+                for keyword, node_ids in keyword_table_dict["__data__"]["table"].items():
+                    for node_id in node_ids:
+                        node_keywords.setdefault(node_id, []).append(keyword)
+                JiebaPostings(dataset)._add_postings(node_keywords)
+                migrated_count += 1
+            except Exception as e:
+                click.echo(
+                    click.style(
+                        f"Failed to migrate keyword table of dataset {keyword_table.dataset_id}: {str(e)}", fg="red"
+                    )
+                )
+        page += 1
+
+    click.echo(click.style(f"Keyword postings migration completed, migrated {migrated_count} datasets.", fg="green"))
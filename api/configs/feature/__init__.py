@@ -47,6 +47,17 @@ class SecurityConfig(BaseSettings):
         default=None,
     )
 
+    TENANT_DECRYPT_KEY_CACHE_TTL: NonNegativeInt = Field(
+        description="Time-to-live in seconds of the per-process cache of parsed workspace private keys used to"
+        " decrypt credentials, 0 to disable the cache",
+        default=120,
+    )
+
+    TENANT_DECRYPT_KEY_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of workspace private keys kept in the per-process cache",
+        default=1000,
+    )
+
 
 class AppExecutionConfig(BaseSettings):
     """
@@ -153,6 +164,11 @@ class PluginConfig(BaseSettings):
         default="plugin-api-key",
     )
 
+    PLUGIN_DAEMON_HTTP_POOL_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of keep-alive connections to the plugin daemon kept per process",
+        default=100,
+    )
+
     INNER_API_KEY_FOR_PLUGIN: str = Field(description="Inner api key for plugin", default="inner-api-key")
 
     PLUGIN_REMOTE_INSTALL_HOST: str = Field(
@@ -381,6 +397,21 @@ class HttpConfig(BaseSettings):
         default=5,
     )
 
+    SSRF_POOL_MAX_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of concurrent connections of the pooled clients for network requests (SSRF)",
+        default=100,
+    )
+
+    SSRF_POOL_MAX_KEEPALIVE_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of idle keep-alive connections of the pooled clients for network requests (SSRF)",
+        default=20,
+    )
+
+    SSRF_POOL_KEEPALIVE_EXPIRY: PositiveFloat = Field(
+        description="Seconds an idle keep-alive connection of the pooled clients is kept open (SSRF)",
+        default=5.0,
+    )
+
     RESPECT_XFORWARD_HEADERS_ENABLED: bool = Field(
         description="Enable handling of X-Forwarded-For, X-Forwarded-Proto, and X-Forwarded-Port headers"
         " when the app is behind a single trusted reverse proxy.",
@@ -460,6 +491,17 @@ class ModelLoadBalanceConfig(BaseSettings):
         default=False,
     )
 
+    LOCAL_TOKEN_COUNTING_ENABLED: bool = Field(
+        description="Count tokens in process with tiktoken for model families with a known encoding,"
+        " instead of calling the model's plugin",
+        default=True,
+    )
+
+    LOCAL_TOKEN_COUNT_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of text token counts cached per process by local token counting",
+        default=10000,
+    )
+
 
 class BillingConfig(BaseSettings):
     """
@@ -513,6 +555,39 @@ class WorkflowConfig(BaseSettings):
         default=200 * 1024,
     )
 
+    WORKFLOW_SCHEDULER_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of threads per process running parallel branches and parallel iterations"
+        " of all workflow runs",
+        default=200,
+    )
+
+    WORKFLOW_SCHEDULER_MAX_WORKERS_PER_TENANT: PositiveInt = Field(
+        description="Maximum number of scheduler threads a single tenant can occupy at the same time",
+        default=50,
+    )
+
+    WORKFLOW_SCHEDULER_MAX_QUEUE_SIZE: PositiveInt = Field(
+        description="Maximum number of parallel tasks waiting for a scheduler thread before new runs are rejected",
+        default=1000,
+    )
+
+    WORKFLOW_ASYNC_EXECUTION_ENABLED: bool = Field(
+        description="Run parallel branches of workflow runs as tasks on a shared event loop, so nodes waiting on"
+        " network I/O, such as HTTP request nodes, do not hold a scheduler thread while they wait",
+        default=False,
+    )
+
+    WORKFLOW_GRAPH_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of compiled workflow graphs kept in each process, least recently used ones"
+        " are evicted",
+        default=256,
+    )
+
+    DOCUMENT_EXTRACTOR_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of files a document extractor node extracts concurrently",
+        default=4,
+    )
+
 
 class WorkflowNodeExecutionConfig(BaseSettings):
     """
@@ -696,6 +771,18 @@ class RagEtlConfig(BaseSettings):
         default="false",
     )
 
+    EXTRACTION_CACHE_TTL: NonNegativeInt = Field(
+        description="Time-to-live in seconds of text extracted from files, cached in Redis by file content hash,"
+        " 0 to disable the cache",
+        default=86400,
+    )
+
+    EXTRACTION_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum compressed size in bytes of the extracted text of a file to cache,"
+        " larger results are not cached",
+        default=1024 * 1024,
+    )
+
 
 class DataSetConfig(BaseSettings):
     """
@@ -732,6 +819,28 @@ class DataSetConfig(BaseSettings):
         default=30,
     )
 
+    DATASET_RETRIEVAL_STORE_CACHE_TTL: NonNegativeInt = Field(
+        description="Time-to-live in seconds of the per-process cache of dataset vector and keyword stores used"
+        " for retrieval, 0 to disable the cache",
+        default=300,
+    )
+
+    DATASET_RETRIEVAL_STORE_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of dataset vector and keyword stores kept in the per-process retrieval cache",
+        default=256,
+    )
+
+    DATASET_RETRIEVAL_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of datasets retrieved at once by the multi-dataset retrievals of a process",
+        default=10,
+    )
+
+    DATASET_RETRIEVAL_TIMEOUT: PositiveInt = Field(
+        description="Timeout in seconds of multi-dataset retrieval, datasets that have not answered by then"
+        " are left out of the results",
+        default=30,
+    )
+
 
 class WorkspaceConfig(BaseSettings):
     """
@@ -759,6 +868,56 @@ class IndexingConfig(BaseSettings):
         default=50,
     )
 
+    INDEXING_LOAD_MAX_WORKERS: PositiveInt = Field(
+        description="Number of threads embedding and writing the chunks of a document to the vector store",
+        default=10,
+    )
+
+    INDEXING_PIPELINE_ENABLED: bool = Field(
+        description="Split, embed and write documents to the vector store in batches of extracted pages that overlap,"
+        " instead of splitting the whole document before embedding it. Applies to general (paragraph) documents",
+        default=False,
+    )
+
+    INDEXING_PIPELINE_BATCH_SIZE: PositiveInt = Field(
+        description="Number of extracted pages split and indexed together in pipelined indexing",
+        default=20,
+    )
+
+    INDEXING_PIPELINE_MAX_PENDING_BATCHES: PositiveInt = Field(
+        description="Maximum number of split batches waiting for embedding in pipelined indexing,"
+        " splitting pauses until one of them is indexed",
+        default=2,
+    )
+
+
+class EmbeddingConfig(BaseSettings):
+    """
+    Configuration for embedding caches
+    """
+
+    EMBEDDING_CACHE_STORAGE_DTYPE: Literal["float32", "float16"] = Field(
+        description="Float precision used to store vectors in the document embedding cache table"
+        " ('float32' or 'float16'), default to 'float32'",
+        default="float32",
+    )
+
+    EMBEDDING_QUERY_CACHE_TTL: PositiveInt = Field(
+        description="Time-to-live in seconds for cached query embeddings, both in Redis and in-process",
+        default=600,
+    )
+
+    EMBEDDING_QUERY_CACHE_DTYPE: Literal["float32", "float16"] = Field(
+        description="Float precision used to store query embeddings in Redis ('float32' or 'float16'),"
+        " default to 'float32'",
+        default="float32",
+    )
+
+    EMBEDDING_QUERY_LOCAL_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of query embeddings kept in the per-process cache in front of Redis",
+        default=1024,
+    )
+
 
 class MultiModalTransferConfig(BaseSettings):
     MULTIMODAL_SEND_FORMAT: Literal["base64", "url"] = Field(
@@ -878,6 +1037,7 @@ class FeatureConfig(
     PluginConfig,
     MarketplaceConfig,
     DataSetConfig,
+    EmbeddingConfig,
     EndpointConfig,
     FileAccessConfig,
     FileUploadConfig,
@@ -72,6 +72,8 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
         if dify_config.DEBUG:
             workflow_callbacks.append(WorkflowLoggingCallback())
 
+        graph_config = workflow.graph_dict
+
         if self.application_generate_entity.single_iteration_run:
             # if only single iteration run is requested
             graph, variable_pool = self._get_graph_and_variable_pool_of_single_iteration(
@@ -152,7 +154,7 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
             )
 
             # init graph
-            graph = self._init_graph(graph_config=workflow.graph_dict)
+            graph = self._init_graph(graph_config=graph_config, workflow=workflow)
 
         db.session.close()
 
@@ -163,7 +165,7 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
             workflow_id=workflow.id,
             workflow_type=WorkflowType.value_of(workflow.type),
             graph=graph,
-            graph_config=workflow.graph_dict,
+            graph_config=graph_config,
             user_id=self.application_generate_entity.user_id,
             user_from=(
                 UserFrom.ACCOUNT
@@ -1,9 +1,18 @@
+import logging
 import queue
+import threading
 import time
+import types
 from abc import abstractmethod
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+from decimal import Decimal
 from enum import Enum
-from typing import Any, Optional
+from functools import cache
+from typing import Annotated, Any, Literal, Optional, Union, get_args, get_origin
+from weakref import WeakValueDictionary
 
+from pydantic import BaseModel
 from sqlalchemy.orm import DeclarativeMeta
 
 from configs import dify_config
@@ -18,6 +27,8 @@ from core.app.entities.queue_entities import (
 )
 from extensions.ext_redis import redis_client
 
+logger = logging.getLogger(__name__)
+
 
 class PublishFrom(Enum):
     APPLICATION_MANAGER = 1
@@ -41,6 +52,7 @@ class AppQueueManager:
         q: queue.Queue[WorkflowQueueMessage | MessageQueueMessage | None] = queue.Queue()
 
         self._q = q
+        self._stopped = TaskStopSubscriber.subscribe(self._task_id)
 
     def listen(self):
         """
@@ -72,6 +84,8 @@ class AppQueueManager:
                 if elapsed_time // 10 > last_ping_time:
                     self.publish(QueuePingEvent(), PublishFrom.TASK_PIPELINE)
                     last_ping_time = elapsed_time // 10
+                    # in case the stop signal was missed while the subscriber was reconnecting
+                    self._sync_stop_flag()
 
     def stop_listen(self) -> None:
         """
@@ -96,7 +110,8 @@ class AppQueueManager:
         :param pub_from:
         :return:
         """
-        self._check_for_sqlalchemy_models(event.model_dump())
+        if _may_contain_sqlalchemy_models(type(event)):
+            self._check_for_sqlalchemy_models(event)
         self._publish(event, pub_from)
 
     @abstractmethod
@@ -125,18 +140,22 @@ class AppQueueManager:
 
         stopped_cache_key = cls._generate_stopped_cache_key(task_id)
         redis_client.setex(stopped_cache_key, 600, 1)
+        TaskStopSubscriber.publish(task_id)
 
     def _is_stopped(self) -> bool:
         """
         Check if task is stopped
         :return:
         """
-        stopped_cache_key = AppQueueManager._generate_stopped_cache_key(self._task_id)
-        result = redis_client.get(stopped_cache_key)
-        if result is not None:
-            return True
+        return self._stopped.is_set()
 
-        return False
+    def _sync_stop_flag(self) -> None:
+        """
+        Check the stop flag of the task in redis
+        :return:
+        """
+        if redis_client.get(AppQueueManager._generate_stopped_cache_key(self._task_id)) is not None:
+            self._stopped.set()
 
     @classmethod
     def _generate_task_belong_cache_key(cls, task_id: str) -> str:
@@ -157,11 +176,14 @@ class AppQueueManager:
         return f"generate_task_stopped:{task_id}"
 
     def _check_for_sqlalchemy_models(self, data: Any):
-        # from entity to dict or list
-        if isinstance(data, dict):
-            for key, value in data.items():
+        # walk the values of entities, dicts and lists
+        if isinstance(data, BaseModel):
+            for field_name in type(data).model_fields:
+                self._check_for_sqlalchemy_models(getattr(data, field_name))
+        elif isinstance(data, Mapping):
+            for value in data.values():
                 self._check_for_sqlalchemy_models(value)
-        elif isinstance(data, list):
+        elif isinstance(data, list | tuple | set | frozenset):
             for item in data:
                 self._check_for_sqlalchemy_models(item)
         else:
@@ -171,5 +193,124 @@ class AppQueueManager:
                 )
 
 
+_SAFE_VALUE_TYPES = (str, int, float, bytes, Decimal, datetime, Enum, type(None))
+_CONTAINER_TYPES = (list, tuple, set, frozenset, dict, Sequence, Mapping)
+
+
+@cache
+def _may_contain_sqlalchemy_models(event_type: type[BaseModel]) -> bool:
+    """
+    Whether instances of an event type may hold SQLAlchemy models, judged by the declared types of its fields.
+    Events made of plain values only, like the text and LLM chunks of streaming, are not walked when published.
+    """
+    return not _is_safe_annotation(event_type, set())
+
+
+def _is_safe_annotation(annotation: Any, seen: set[type]) -> bool:
+    origin = get_origin(annotation)
+    if origin is Literal:
+        return True
+    if origin is Annotated:
+        return _is_safe_annotation(get_args(annotation)[0], seen)
+    if origin is Union or origin is types.UnionType or origin in _CONTAINER_TYPES:
+        return all(arg is Ellipsis or _is_safe_annotation(arg, seen) for arg in get_args(annotation))
+    if origin is not None or not isinstance(annotation, type):
+        return False
+
+    if issubclass(annotation, _SAFE_VALUE_TYPES):
+        return True
+    if issubclass(annotation, BaseModel):
+        # recursive models are safe as long as their other fields are
+        if annotation in seen:
+            return True
+        seen.add(annotation)
+        return all(_is_safe_annotation(field.annotation, seen) for field in annotation.model_fields.values())
+    return False
+
+
+class TaskStopSubscriber:
+    """
+    Delivers stop requests of generate tasks to the queue managers of this process.
+
+    Stop requests are published to a redis channel, so they reach the task on whichever API node
+    runs it. A single subscriber thread per process listens to the channel and sets the stop event
+    of the local task, so queue managers no longer poll the stop flag for every queued event.
+    After (re)subscribing, the thread checks the stop flags of all local tasks once, for stop
+    requests published while it was not subscribed.
+    """
+
+    CHANNEL = "generate_task_stopped"
+    RESUBSCRIBE_INTERVAL = 1
+
+    # events are owned by the queue managers, tasks leave the registry with their queue manager
+    _events: WeakValueDictionary[str, threading.Event] = WeakValueDictionary()
+    _lock = threading.Lock()
+    _thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def subscribe(cls, task_id: str) -> threading.Event:
+        """
+        Get the stop event of a task, set when the task is requested to stop
+        :param task_id: task id
+        :return:
+        """
+        event = threading.Event()
+        with cls._lock:
+            cls._events[task_id] = event
+            if cls._thread is None or not cls._thread.is_alive():
+                cls._thread = threading.Thread(target=cls._run, name="task_stop_subscriber", daemon=True)
+                cls._thread.start()
+        return event
+
+    @classmethod
+    def publish(cls, task_id: str) -> None:
+        """
+        Request a task to stop on every API node
+        :param task_id: task id
+        :return:
+        """
+        redis_client.publish(cls.CHANNEL, task_id)
+
+    @classmethod
+    def _run(cls) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(cls.CHANNEL)
+                cls._sync_stop_flags()
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        cls._set_stopped(message["data"].decode("utf-8"))
+            except Exception:
+                logger.exception("Task stop subscriber disconnected, resubscribing")
+            finally:
+                if pubsub is not None:
+                    pubsub.close()
+            time.sleep(cls.RESUBSCRIBE_INTERVAL)
+
+    @classmethod
+    def _set_stopped(cls, task_id: str) -> None:
+        with cls._lock:
+            event = cls._events.get(task_id)
+        if event is not None:
+            event.set()
+
+    @classmethod
+    def _sync_stop_flags(cls) -> None:
+        with cls._lock:
+            task_ids = list(cls._events.keys())
+        if not task_ids:
+            return
+
+        # a pipeline instead of MGET, the keys may live in different slots of a redis cluster
+        pipeline = redis_client.pipeline(transaction=False)
+        for task_id in task_ids:
+            pipeline.get(AppQueueManager._generate_stopped_cache_key(task_id))
+        for task_id, stopped in zip(task_ids, pipeline.execute()):
+            if stopped is not None:
+                cls._set_stopped(task_id)
+
+
 class GenerateTaskStoppedError(Exception):
     pass
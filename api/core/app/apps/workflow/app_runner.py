@@ -70,7 +70,8 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
         if dify_config.DEBUG:
             workflow_callbacks.append(WorkflowLoggingCallback())
 
-        # if only single iteration run is requested
+        graph_config = workflow.graph_dict
+
         if self.application_generate_entity.single_iteration_run:
             # if only single iteration run is requested
             graph, variable_pool = self._get_graph_and_variable_pool_of_single_iteration(
@@ -106,7 +107,7 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
             )
 
             # init graph
-            graph = self._init_graph(graph_config=workflow.graph_dict)
+            graph = self._init_graph(graph_config=graph_config, workflow=workflow)
 
         # RUN WORKFLOW
         workflow_entry = WorkflowEntry(
@@ -115,7 +116,7 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
             workflow_id=workflow.id,
             workflow_type=WorkflowType.value_of(workflow.type),
             graph=graph,
-            graph_config=workflow.graph_dict,
+            graph_config=graph_config,
             user_id=self.application_generate_entity.user_id,
             user_from=(
                 UserFrom.ACCOUNT
@@ -64,6 +64,7 @@ from core.workflow.nodes import NodeType
 from core.workflow.nodes.node_mapping import NODE_TYPE_CLASSES_MAPPING
 from core.workflow.workflow_entry import WorkflowEntry
 from extensions.ext_database import db
+from libs import helper
 from models.model import App
 from models.workflow import Workflow
 
@@ -72,9 +73,9 @@ class WorkflowBasedAppRunner(AppRunner):
     def __init__(self, queue_manager: AppQueueManager):
         self.queue_manager = queue_manager
 
-    def _init_graph(self, graph_config: Mapping[str, Any]) -> Graph:
+    def _init_graph(self, graph_config: Mapping[str, Any], workflow: Optional[Workflow] = None) -> Graph:
         """
-        Init graph
+        Init graph, the compiled graph of a workflow version is cached when the workflow is given
         """
         if "nodes" not in graph_config or "edges" not in graph_config:
             raise ValueError("nodes or edges not found in workflow graph")
@@ -85,7 +86,11 @@ class WorkflowBasedAppRunner(AppRunner):
         if not isinstance(graph_config.get("edges"), list):
             raise ValueError("edges in workflow graph must be a list")
         # init graph
-        graph = Graph.init(graph_config=graph_config)
+        if workflow is not None:
+            cache_key = (workflow.id, helper.generate_text_hash(workflow.graph))
+            graph = Graph.get_or_init(graph_config=graph_config, cache_key=cache_key)
+        else:
+            graph = Graph.init(graph_config=graph_config)
 
         if not graph:
             raise ValueError("graph not found in workflow")
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import logging
+import zlib
+from typing import Any, Optional
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache of text extracted from files, shared by the workflow document extractor
+    and the RAG extract processor.
+
+    Entries are keyed by the sha3-256 hash of the file content, the same hash `UploadFile.hash` holds,
+    and a namespace naming the extractor and the settings its output depends on. Values are stored
+    compressed, and values larger than `EXTRACTION_CACHE_MAX_SIZE` are not cached.
+    """
+
+    def __init__(self, namespace: str, content_hash: str):
+        self.cache_key = f"extracted_text:{namespace}:{content_hash}"
+
+    @staticmethod
+    def hash_content(content: bytes) -> str:
+        return hashlib.sha3_256(content).hexdigest()
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return dify_config.EXTRACTION_CACHE_TTL > 0
+
+    def get(self) -> Optional[Any]:
+        """
+        Get the cached extraction result, None on a miss.
+        """
+        if not self.is_enabled():
+            return None
+        try:
+            cached_value = redis_client.get(self.cache_key)
+            if cached_value is None:
+                return None
+            return json.loads(zlib.decompress(cached_value))
+        except Exception:
+            # a broken cache must not fail the extraction, the file is extracted again
+            logger.warning("Failed to get extraction cache %s", self.cache_key, exc_info=True)
+            return None
+
+    def set(self, value: Any) -> None:
+        """
+        Cache a JSON serializable extraction result.
+        """
+        if not self.is_enabled():
+            return
+        try:
+            value_json = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            # results holding values JSON can not represent are not cached
+            return
+        try:
+            compressed_value = zlib.compress(value_json.encode("utf-8"))
+            if len(compressed_value) > dify_config.EXTRACTION_CACHE_MAX_SIZE:
+                return
+            redis_client.setex(self.cache_key, dify_config.EXTRACTION_CACHE_TTL, compressed_value)
+        except Exception:
+            logger.warning("Failed to set extraction cache %s", self.cache_key, exc_info=True)
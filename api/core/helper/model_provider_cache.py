@@ -15,6 +15,23 @@ class ProviderCredentialsCacheType(Enum):
 class ProviderCredentialsCache:
     def __init__(self, tenant_id: str, identity_id: str, cache_type: ProviderCredentialsCacheType):
         self.cache_key = f"{cache_type.value}_credentials:tenant_id:{tenant_id}:id:{identity_id}"
+        self.version_key = self._get_version_key(tenant_id)
+
+    @staticmethod
+    def _get_version_key(tenant_id: str) -> str:
+        return f"provider_credentials_version:tenant_id:{tenant_id}"
+
+    @classmethod
+    def get_version(cls, tenant_id: str) -> int:
+        """
+        Get the version of the tenant's model provider credentials, bumped on every change,
+        for caches of objects built from the credentials.
+
+        :param tenant_id: tenant id
+        :return:
+        """
+        version = redis_client.get(cls._get_version_key(tenant_id))
+        return int(version) if version else 0
 
     def get(self) -> Optional[dict]:
         """
@@ -50,3 +67,4 @@ class ProviderCredentialsCache:
         :return:
         """
         redis_client.delete(self.cache_key)
+        redis_client.incr(self.version_key)
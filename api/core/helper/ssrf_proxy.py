@@ -2,8 +2,15 @@
 Proxy requests to avoid SSRF
 """
 
+import asyncio
 import logging
+import threading
 import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any
+from weakref import WeakKeyDictionary
 
 import httpx
 
@@ -34,7 +41,8 @@ class MaxRetriesExceededError(ValueError):
     pass
 
 
-def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
+def _prepare_request_kwargs(kwargs: dict[str, Any]) -> bool:
+    """Normalize request kwargs in place and pop the SSL verification flag."""
     if "allow_redirects" in kwargs:
         allow_redirects = kwargs.pop("allow_redirects")
         if "follow_redirects" not in kwargs:
@@ -51,24 +59,93 @@ def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
     if "ssl_verify" not in kwargs:
         kwargs["ssl_verify"] = HTTP_REQUEST_NODE_SSL_VERIFY
 
-    ssl_verify = kwargs.pop("ssl_verify")
+    return kwargs.pop("ssl_verify")
+
+
+def _get_client_kwargs(
+    ssl_verify: bool, transport_cls: type[httpx.HTTPTransport] | type[httpx.AsyncHTTPTransport]
+) -> dict[str, Any]:
+    limits = httpx.Limits(
+        max_connections=dify_config.SSRF_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=dify_config.SSRF_POOL_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=dify_config.SSRF_POOL_KEEPALIVE_EXPIRY,
+    )
+    # clients are shared by all requests of the process, cookies set by a response must not leak into
+    # requests of other users
+    cookies = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+    if dify_config.SSRF_PROXY_ALL_URL:
+        return {"proxy": dify_config.SSRF_PROXY_ALL_URL, "verify": ssl_verify, "limits": limits, "cookies": cookies}
+    elif dify_config.SSRF_PROXY_HTTP_URL and dify_config.SSRF_PROXY_HTTPS_URL:
+        proxy_mounts = {
+            "http://": transport_cls(proxy=dify_config.SSRF_PROXY_HTTP_URL, verify=ssl_verify, limits=limits),
+            "https://": transport_cls(proxy=dify_config.SSRF_PROXY_HTTPS_URL, verify=ssl_verify, limits=limits),
+        }
+        return {"mounts": proxy_mounts, "verify": ssl_verify, "limits": limits, "cookies": cookies}
+    return {"verify": ssl_verify, "limits": limits, "cookies": cookies}
+
+
+_clients: dict[bool, httpx.Client] = {}
+# async clients are bound to the event loop their connections were opened on
+_async_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, dict[bool, httpx.AsyncClient]]" = WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def _get_client(ssl_verify: bool) -> httpx.Client:
+    """Get the process-wide pooled client, one per SSL verification mode."""
+    client = _clients.get(ssl_verify)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(ssl_verify)
+            if client is None:
+                client = httpx.Client(**_get_client_kwargs(ssl_verify, httpx.HTTPTransport))
+                _clients[ssl_verify] = client
+    return client
+
+
+def _get_async_client(ssl_verify: bool) -> httpx.AsyncClient:
+    """Get the pooled async client of the running event loop, one per SSL verification mode."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(ssl_verify)
+        if client is None:
+            client = httpx.AsyncClient(**_get_client_kwargs(ssl_verify, httpx.AsyncHTTPTransport))
+            loop_clients[ssl_verify] = client
+    return client
+
+
+def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
+    ssl_verify = _prepare_request_kwargs(kwargs)
 
     retries = 0
     while retries <= max_retries:
         try:
-            if dify_config.SSRF_PROXY_ALL_URL:
-                with httpx.Client(proxy=dify_config.SSRF_PROXY_ALL_URL, verify=ssl_verify) as client:
-                    response = client.request(method=method, url=url, **kwargs)
-            elif dify_config.SSRF_PROXY_HTTP_URL and dify_config.SSRF_PROXY_HTTPS_URL:
-                proxy_mounts = {
-                    "http://": httpx.HTTPTransport(proxy=dify_config.SSRF_PROXY_HTTP_URL, verify=ssl_verify),
-                    "https://": httpx.HTTPTransport(proxy=dify_config.SSRF_PROXY_HTTPS_URL, verify=ssl_verify),
-                }
-                with httpx.Client(mounts=proxy_mounts, verify=ssl_verify) as client:
-                    response = client.request(method=method, url=url, **kwargs)
+            response = _get_client(ssl_verify).request(method=method, url=url, **kwargs)
+
+            if response.status_code not in STATUS_FORCELIST:
+                return response
             else:
-                with httpx.Client(verify=ssl_verify) as client:
-                    response = client.request(method=method, url=url, **kwargs)
+                logging.warning(f"Received status code {response.status_code} for URL {url} which is in the force list")
+
+        except httpx.RequestError as e:
+            logging.warning(f"Request to URL {url} failed on attempt {retries + 1}: {e}")
+            if max_retries == 0:
+                raise
+
+        retries += 1
+        if retries <= max_retries:
+            time.sleep(BACKOFF_FACTOR * (2 ** (retries - 1)))
+    raise MaxRetriesExceededError(f"Reached maximum retries ({max_retries}) for URL {url}")
+
+
+async def amake_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
+    """Async twin of `make_request`, for callers running on an event loop."""
+    ssl_verify = _prepare_request_kwargs(kwargs)
+
+    retries = 0
+    while retries <= max_retries:
+        try:
+            response = await _get_async_client(ssl_verify).request(method=method, url=url, **kwargs)
 
             if response.status_code not in STATUS_FORCELIST:
                 return response
@@ -80,6 +157,42 @@ def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
             if max_retries == 0:
                 raise
 
+        retries += 1
+        if retries <= max_retries:
+            await asyncio.sleep(BACKOFF_FACTOR * (2 ** (retries - 1)))
+    raise MaxRetriesExceededError(f"Reached maximum retries ({max_retries}) for URL {url}")
+
+
+@contextmanager
+def stream_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs) -> Iterator[httpx.Response]:
+    """
+    Same as `make_request`, but the response body is not read up front, iterate it with
+    `response.iter_bytes()` inside the context. The connection is released when the context exits.
+    """
+    ssl_verify = _prepare_request_kwargs(kwargs)
+
+    retries = 0
+    while retries <= max_retries:
+        streaming = False
+        try:
+            with _get_client(ssl_verify).stream(method=method, url=url, **kwargs) as response:
+                if response.status_code not in STATUS_FORCELIST:
+                    streaming = True
+                    yield response
+                    return
+                else:
+                    logging.warning(
+                        f"Received status code {response.status_code} for URL {url} which is in the force list"
+                    )
+
+        except httpx.RequestError as e:
+            # errors while the caller reads the body can not be retried
+            if streaming:
+                raise
+            logging.warning(f"Request to URL {url} failed on attempt {retries + 1}: {e}")
+            if max_retries == 0:
+                raise
+
         retries += 1
         if retries <= max_retries:
             time.sleep(BACKOFF_FACTOR * (2 ** (retries - 1)))
@@ -6,6 +6,7 @@ import re
 import threading
 import time
 import uuid
+from collections import deque
 from typing import Any, Optional, cast
 
 from flask import current_app
@@ -69,6 +70,17 @@ class IndexingRunner:
                 # extract
                 text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict())
 
+                if dify_config.INDEXING_PIPELINE_ENABLED and index_type == IndexType.PARAGRAPH_INDEX:
+                    # transform, save segments and load in overlapping batches
+                    self._run_pipeline(
+                        index_processor=index_processor,
+                        dataset=dataset,
+                        dataset_document=dataset_document,
+                        text_docs=text_docs,
+                        process_rule=processing_rule.to_dict(),
+                    )
+                    continue
+
                 # transform
                 documents = self._transform(
                     index_processor, dataset, text_docs, dataset_document.doc_language, processing_rule.to_dict()
@@ -542,20 +554,12 @@ class IndexingRunner:
             )
             create_keyword_thread.start()
 
-        max_workers = 10
+        max_workers = dify_config.INDEXING_LOAD_MAX_WORKERS
         if dataset.indexing_technique == "high_quality":
             with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
                 futures = []
 
-                # Distribute documents into multiple groups based on the hash values of page_content
-                # This is done to prevent multiple threads from processing the same document,
-                # Thereby avoiding potential database insertion deadlocks
-                document_groups: list[list[Document]] = [[] for _ in range(max_workers)]
-                for document in documents:
-                    hash = helper.generate_text_hash(document.page_content)
-                    group_index = int(hash, 16) % max_workers
-                    document_groups[group_index].append(document)
-                for chunk_documents in document_groups:
+                for chunk_documents in self._group_documents_by_hash(documents, max_workers):
                     if len(chunk_documents) == 0:
                         continue
                     futures.append(
@@ -588,6 +592,129 @@ class IndexingRunner:
             },
         )
 
+    def _run_pipeline(
+        self,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        text_docs: list[Document],
+        process_rule: dict,
+    ) -> None:
+        """
+        Transform, save segments and load the extracted pages in batches, the loading of a batch
+        overlapping the transforming of the next ones.
+
+        Transforming and saving segments run in the calling thread, in page order. Chunks are embedded
+        and written by single-threaded lanes chosen by the hash of their content, so chunks with the same
+        content are never written concurrently, as in `_load`. At most INDEXING_PIPELINE_MAX_PENDING_BATCHES
+        batches wait for loading, so the chunks and embeddings of a document are never all in memory at
+        once, and segments are completed batch by batch instead of after the whole document is split.
+        """
+        flask_app = current_app._get_current_object()  # type: ignore
+        embedding_model_instance = None
+        if dataset.indexing_technique == "high_quality":
+            embedding_model_instance = self.model_manager.get_model_instance(
+                tenant_id=dataset.tenant_id,
+                provider=dataset.embedding_model_provider,
+                model_type=ModelType.TEXT_EMBEDDING,
+                model=dataset.embedding_model,
+            )
+
+        batch_size = dify_config.INDEXING_PIPELINE_BATCH_SIZE
+        lane_count = dify_config.INDEXING_LOAD_MAX_WORKERS
+        lanes = [concurrent.futures.ThreadPoolExecutor(max_workers=1) for _ in range(lane_count)]
+        # keyword indexing locks the keyword table of the dataset, batches are indexed one after another
+        keyword_lane = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        pending_batches: deque[list[concurrent.futures.Future]] = deque()
+        indexing_start_at = time.perf_counter()
+        tokens = 0
+        try:
+            while text_docs:
+                batch_text_docs = text_docs[:batch_size]
+                # drop the pages from the extracted document as they are transformed
+                del text_docs[:batch_size]
+
+                documents = self._transform(
+                    index_processor, dataset, batch_text_docs, dataset_document.doc_language, process_rule
+                )
+                del batch_text_docs
+                if not documents:
+                    continue
+                self._load_segment_batch(dataset, dataset_document, documents)
+
+                futures = [
+                    keyword_lane.submit(
+                        self._process_keyword_index, flask_app, dataset.id, dataset_document.id, documents
+                    )
+                ]
+                if dataset.indexing_technique == "high_quality":
+                    for lane, chunk_documents in zip(lanes, self._group_documents_by_hash(documents, lane_count)):
+                        if chunk_documents:
+                            futures.append(
+                                lane.submit(
+                                    self._process_chunk,
+                                    flask_app,
+                                    index_processor,
+                                    chunk_documents,
+                                    dataset,
+                                    dataset_document,
+                                    embedding_model_instance,
+                                )
+                            )
+                pending_batches.append(futures)
+
+                while len(pending_batches) > dify_config.INDEXING_PIPELINE_MAX_PENDING_BATCHES:
+                    tokens += self._wait_for_batch(pending_batches.popleft())
+
+            # every page is split, as in `_load_segments`
+            cur_time = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+            self._update_document_index_status(
+                document_id=dataset_document.id,
+                after_indexing_status="indexing",
+                extra_update_params={
+                    DatasetDocument.cleaning_completed_at: cur_time,
+                    DatasetDocument.splitting_completed_at: cur_time,
+                },
+            )
+
+            while pending_batches:
+                tokens += self._wait_for_batch(pending_batches.popleft())
+        finally:
+            for executor in [*lanes, keyword_lane]:
+                executor.shutdown(wait=True, cancel_futures=True)
+        indexing_end_at = time.perf_counter()
+
+        # update document status to completed
+        self._update_document_index_status(
+            document_id=dataset_document.id,
+            after_indexing_status="completed",
+            extra_update_params={
+                DatasetDocument.tokens: tokens,
+                DatasetDocument.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
+                DatasetDocument.error: None,
+            },
+        )
+
+    @staticmethod
+    def _wait_for_batch(futures: list[concurrent.futures.Future]) -> int:
+        """
+        Wait for the loading of a batch, return the embedded tokens.
+        """
+        return sum(future.result() or 0 for future in futures)
+
+    @staticmethod
+    def _group_documents_by_hash(documents: list[Document], group_count: int) -> list[list[Document]]:
+        # Distribute documents into multiple groups based on the hash values of page_content
+        # This is done to prevent multiple threads from processing the same document,
+        # Thereby avoiding potential database insertion deadlocks
+        document_groups: list[list[Document]] = [[] for _ in range(group_count)]
+        for document in documents:
+            hash = helper.generate_text_hash(document.page_content)
+            group_index = int(hash, 16) % group_count
+            document_groups[group_index].append(document)
+        return document_groups
+
     @staticmethod
     def _process_keyword_index(flask_app, dataset_id, document_id, documents):
         with flask_app.app_context():
@@ -747,6 +874,30 @@ class IndexingRunner:
         )
         pass
 
+    def _load_segment_batch(self, dataset, dataset_document, documents):
+        # save node to document segment
+        doc_store = DatasetDocumentStore(
+            dataset=dataset, user_id=dataset_document.created_by, document_id=dataset_document.id
+        )
+        doc_store.add_documents(docs=documents, save_child=False)
+
+        # update document status to indexing, when the first batch is saved
+        self._update_document_index_status(document_id=dataset_document.id, after_indexing_status="indexing")
+
+        # update status of the segments of the batch only, segments of earlier batches may be completed
+        document_ids = [document.metadata["doc_id"] for document in documents]
+        db.session.query(DocumentSegment).filter(
+            DocumentSegment.document_id == dataset_document.id,
+            DocumentSegment.index_node_id.in_(document_ids),
+        ).update(
+            {
+                DocumentSegment.status: "indexing",
+                DocumentSegment.indexing_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+            },
+            synchronize_session=False,
+        )
+        db.session.commit()
+
 
 class DocumentIsPausedError(Exception):
     pass
@@ -1,8 +1,10 @@
+from collections import defaultdict
 from collections.abc import Sequence
 from typing import Optional
 
+from configs import dify_config
 from core.app.app_config.features.file_upload.manager import FileUploadConfigManager
-from core.file import file_manager
+from core.file import FileUploadConfig, file_manager
 from core.model_manager import ModelInstance
 from core.model_runtime.entities import (
     AssistantPromptMessage,
@@ -15,9 +17,13 @@ from core.model_runtime.entities import (
 from core.model_runtime.entities.message_entities import PromptMessageContentUnionTypes
 from core.prompt.utils.extract_thread_messages import extract_thread_messages
 from extensions.ext_database import db
+from extensions.ext_redis import redis_client
 from factories import file_factory
 from models.model import AppMode, Conversation, Message, MessageFile
-from models.workflow import WorkflowRun
+from models.workflow import Workflow, WorkflowRun
+
+# seconds the token count of a history message is cached
+MESSAGE_TOKENS_CACHE_TTL = 86400
 
 
 class TokenBufferMemory:
@@ -69,23 +75,15 @@ class TokenBufferMemory:
 
         messages = list(reversed(thread_messages))
 
+        files_by_message = self._get_message_files(messages)
+        file_extra_configs = self._get_file_extra_configs(messages, files_by_message)
+
         prompt_messages: list[PromptMessage] = []
+        prompt_message_keys: list[str] = []
         for message in messages:
-            files = db.session.query(MessageFile).filter(MessageFile.message_id == message.id).all()
+            files = files_by_message.get(message.id)
             if files:
-                file_extra_config = None
-                if self.conversation.mode not in {AppMode.ADVANCED_CHAT, AppMode.WORKFLOW}:
-                    file_extra_config = FileUploadConfigManager.convert(self.conversation.model_config)
-                else:
-                    if message.workflow_run_id:
-                        workflow_run = (
-                            db.session.query(WorkflowRun).filter(WorkflowRun.id == message.workflow_run_id).first()
-                        )
-
-                        if workflow_run and workflow_run.workflow:
-                            file_extra_config = FileUploadConfigManager.convert(
-                                workflow_run.workflow.features_dict, is_vision=False
-                            )
+                file_extra_config = file_extra_configs.get(message.id)
 
                 detail = ImagePromptMessageContent.DETAIL.LOW
                 if file_extra_config and app_record:
@@ -115,20 +113,132 @@ class TokenBufferMemory:
                 prompt_messages.append(UserPromptMessage(content=message.query))
 
             prompt_messages.append(AssistantPromptMessage(content=message.answer))
+            prompt_message_keys.extend((f"{message.id}:query", f"{message.id}:answer"))
 
         if not prompt_messages:
             return []
 
         # prune the chat message if it exceeds the max token limit
-        curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+        return self._prune_prompt_messages(prompt_messages, prompt_message_keys, max_token_limit)
+
+    @staticmethod
+    def _get_message_files(messages: Sequence[Message]) -> dict[str, list[MessageFile]]:
+        """
+        Load the files of all messages with one query.
+        """
+        files_by_message: dict[str, list[MessageFile]] = defaultdict(list)
+        if not messages:
+            return files_by_message
+
+        files = db.session.query(MessageFile).filter(MessageFile.message_id.in_([m.id for m in messages])).all()
+        for file in files:
+            files_by_message[file.message_id].append(file)
+        return files_by_message
+
+    def _get_file_extra_configs(
+        self, messages: Sequence[Message], files_by_message: dict[str, list[MessageFile]]
+    ) -> dict[str, Optional[FileUploadConfig]]:
+        """
+        Get the file upload config of every message with files, loading workflows with one query.
+        """
+        messages_with_files = [m for m in messages if files_by_message.get(m.id)]
+        if not messages_with_files:
+            return {}
+
+        if self.conversation.mode not in {AppMode.ADVANCED_CHAT, AppMode.WORKFLOW}:
+            file_extra_config = FileUploadConfigManager.convert(self.conversation.model_config)
+            return {message.id: file_extra_config for message in messages_with_files}
+
+        workflow_run_ids = {m.workflow_run_id for m in messages_with_files if m.workflow_run_id}
+        workflow_ids_by_run: dict[str, str] = {}
+        if workflow_run_ids:
+            workflow_runs = (
+                db.session.query(WorkflowRun.id, WorkflowRun.workflow_id)
+                .filter(WorkflowRun.id.in_(workflow_run_ids))
+                .all()
+            )
+            workflow_ids_by_run = {run.id: run.workflow_id for run in workflow_runs}
+
+        configs_by_workflow: dict[str, FileUploadConfig] = {}
+        workflow_ids = set(workflow_ids_by_run.values())
+        if workflow_ids:
+            workflows = db.session.query(Workflow).filter(Workflow.id.in_(workflow_ids)).all()
+            configs_by_workflow = {
+                workflow.id: FileUploadConfigManager.convert(workflow.features_dict, is_vision=False)
+                for workflow in workflows
+            }
+
+        file_extra_configs: dict[str, Optional[FileUploadConfig]] = {}
+        for message in messages_with_files:
+            workflow_id = workflow_ids_by_run.get(message.workflow_run_id) if message.workflow_run_id else None
+            file_extra_configs[message.id] = configs_by_workflow.get(workflow_id) if workflow_id else None
+        return file_extra_configs
+
+    def _prune_prompt_messages(
+        self, prompt_messages: list[PromptMessage], prompt_message_keys: list[str], max_token_limit: int
+    ) -> list[PromptMessage]:
+        """
+        Drop the oldest prompt messages until the rest fits the max token limit, at least one message is kept.
+
+        Messages that fit as a whole are counted once. Otherwise the cut is found with suffix sums of
+        per-message token counts, which are cached across turns, and then checked against the count of
+        the kept messages as a whole. Counting single messages adds the chat format overhead to each,
+        so the sums never underestimate the tokens of the kept messages and the check rarely moves the
+        cut by more than one message.
+        """
+        if self.model_instance.get_llm_num_tokens(prompt_messages) <= max_token_limit:
+            return prompt_messages
+        if not dify_config.PLUGIN_BASED_TOKEN_COUNTING_ENABLED:
+            # every count is 0 without token counting, only the last message is kept for a negative limit
+            return prompt_messages[-1:]
+
+        message_tokens = self._get_message_tokens(prompt_messages, prompt_message_keys)
+        start = len(prompt_messages) - 1
+        suffix_tokens = message_tokens[start]
+        while start > 0 and suffix_tokens + message_tokens[start - 1] <= max_token_limit:
+            start -= 1
+            suffix_tokens += message_tokens[start]
+
+        # keep older messages while the kept messages still fit as a whole
+        while start > 0 and self.model_instance.get_llm_num_tokens(prompt_messages[start - 1 :]) <= max_token_limit:
+            start -= 1
+        # drop messages the estimate kept but do not fit as a whole
+        while (
+            start < len(prompt_messages) - 1
+            and self.model_instance.get_llm_num_tokens(prompt_messages[start:]) > max_token_limit
+        ):
+            start += 1
+
+        return prompt_messages[start:]
+
+    def _get_message_tokens(self, prompt_messages: list[PromptMessage], prompt_message_keys: list[str]) -> list[int]:
+        """
+        Get the token count of each prompt message, counted messages are cached in redis by message id.
+        """
+        cache_keys = [
+            f"memory_message_tokens:{self.model_instance.provider}:{self.model_instance.model}:{key}"
+            for key in prompt_message_keys
+        ]
+        # a pipeline instead of MGET, the keys may live in different slots of a redis cluster
+        pipeline = redis_client.pipeline(transaction=False)
+        for cache_key in cache_keys:
+            pipeline.get(cache_key)
+        cached_tokens = pipeline.execute()
+
+        message_tokens: list[int] = []
+        for prompt_message, cache_key, cached in zip(prompt_messages, cache_keys, cached_tokens):
+            if cached is not None:
+                message_tokens.append(int(cached))
+                continue
 
-        if curr_message_tokens > max_token_limit:
-            pruned_memory = []
-            while curr_message_tokens > max_token_limit and len(prompt_messages) > 1:
-                pruned_memory.append(prompt_messages.pop(0))
-                curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+            tokens = self.model_instance.get_llm_num_tokens([prompt_message])
+            pipeline.setex(cache_key, MESSAGE_TOKENS_CACHE_TTL, tokens)
+            message_tokens.append(tokens)
 
-        return prompt_messages
+        # counts of messages missing from the cache are written back in one round trip
+        if None in cached_tokens:
+            pipeline.execute()
+        return message_tokens
 
     def get_history_prompt_text(
         self,
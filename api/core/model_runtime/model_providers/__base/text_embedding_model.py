@@ -6,6 +6,7 @@ from core.entities.embedding_type import EmbeddingInputType
 from core.model_runtime.entities.model_entities import ModelPropertyKey, ModelType
 from core.model_runtime.entities.text_embedding_entities import TextEmbeddingResult
 from core.model_runtime.model_providers.__base.ai_model import AIModel
+from core.model_runtime.model_providers.__base.tokenizers.local_tokenizer import LocalTokenizer
 from core.plugin.impl.model import PluginModelClient
 
 
@@ -61,6 +62,10 @@ class TextEmbeddingModel(AIModel):
         :param texts: texts to embed
         :return:
         """
+        num_tokens = LocalTokenizer.count_texts(model, texts)
+        if num_tokens is not None:
+            return num_tokens
+
         plugin_model_manager = PluginModelClient()
         return plugin_model_manager.get_text_embedding_num_tokens(
             tenant_id=self.tenant_id,
@@ -0,0 +1,145 @@
+import json
+import logging
+from collections.abc import Sequence
+from threading import Lock
+from typing import Any, Optional
+
+from cachetools import LRUCache
+
+from configs import dify_config
+from core.model_runtime.entities.message_entities import (
+    AssistantPromptMessage,
+    PromptMessage,
+    PromptMessageTool,
+    TextPromptMessageContent,
+)
+
+logger = logging.getLogger(__name__)
+
+# tiktoken encodings of model families, matched by model name prefix, longest prefix first
+MODEL_FAMILY_ENCODINGS: list[tuple[str, str]] = [
+    ("chatgpt-4o", "o200k_base"),
+    ("gpt-4.1", "o200k_base"),
+    ("gpt-4.5", "o200k_base"),
+    ("gpt-4o", "o200k_base"),
+    ("o1", "o200k_base"),
+    ("o3", "o200k_base"),
+    ("o4", "o200k_base"),
+    ("gpt-4", "cl100k_base"),
+    ("gpt-3.5-turbo", "cl100k_base"),
+    ("gpt-35-turbo", "cl100k_base"),
+    ("text-embedding-3", "cl100k_base"),
+    ("text-embedding-ada-002", "cl100k_base"),
+]
+
+# tokens added by the chat format, per message and to prime the reply
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+_encodings: dict[str, Any] = {}
+_encodings_lock = Lock()
+
+_token_counts: LRUCache = LRUCache(maxsize=dify_config.LOCAL_TOKEN_COUNT_CACHE_MAX_SIZE)
+_token_counts_lock = Lock()
+
+
+class LocalTokenizer:
+    """
+    Count tokens in process for model families with a known tiktoken encoding, instead of
+    asking the model's plugin. Counts of texts are cached, so prompts that repeat the same
+    history or context are only encoded once.
+    """
+
+    @staticmethod
+    def get_encoding_name(model: str) -> Optional[str]:
+        model = model.lower()
+        for prefix, encoding_name in MODEL_FAMILY_ENCODINGS:
+            if model.startswith(prefix):
+                return encoding_name
+        return None
+
+    @classmethod
+    def get_encoder(cls, model: str) -> Any:
+        """
+        Get the tiktoken encoding of a model, None if the model family is unknown or the
+        encoding can not be loaded.
+        """
+        if not dify_config.LOCAL_TOKEN_COUNTING_ENABLED:
+            return None
+        encoding_name = cls.get_encoding_name(model)
+        if not encoding_name:
+            return None
+
+        if encoding_name not in _encodings:
+            with _encodings_lock:
+                if encoding_name not in _encodings:
+                    _encodings[encoding_name] = cls._load_encoding(encoding_name)
+        return _encodings[encoding_name]
+
+    @staticmethod
+    def _load_encoding(encoding_name: str) -> Any:
+        try:
+            import tiktoken
+
+            return tiktoken.get_encoding(encoding_name)
+        except Exception:
+            # remembered as missing, so the process does not try to load it again on every count
+            logger.warning("Failed to load tiktoken encoding %s, counting tokens with plugins", encoding_name)
+            return None
+
+    @classmethod
+    def count_texts(cls, model: str, texts: Sequence[str]) -> Optional[list[int]]:
+        """
+        Count the tokens of each text, None if the model is not supported.
+        """
+        encoder = cls.get_encoder(model)
+        if encoder is None:
+            return None
+
+        counts: list[Optional[int]] = []
+        with _token_counts_lock:
+            for text in texts:
+                counts.append(_token_counts.get((encoder.name, hash(text), len(text))))
+
+        missing = [i for i, count in enumerate(counts) if count is None]
+        if missing:
+            encoded = encoder.encode_ordinary_batch([texts[i] for i in missing])
+            with _token_counts_lock:
+                for i, tokens in zip(missing, encoded):
+                    counts[i] = len(tokens)
+                    _token_counts[(encoder.name, hash(texts[i]), len(texts[i]))] = len(tokens)
+        return counts  # type: ignore[return-value]
+
+    @classmethod
+    def count_prompt_messages(
+        cls,
+        model: str,
+        prompt_messages: Sequence[PromptMessage],
+        tools: Optional[Sequence[PromptMessageTool]] = None,
+    ) -> Optional[int]:
+        """
+        Count the tokens of a chat prompt with the chat format overhead, None if the model is not supported.
+        Only text content is counted.
+        """
+        if cls.get_encoder(model) is None:
+            return None
+
+        texts: list[str] = []
+        for message in prompt_messages:
+            if isinstance(message.content, str):
+                texts.append(message.content)
+            elif message.content:
+                texts.extend(item.data for item in message.content if isinstance(item, TextPromptMessageContent))
+            if message.name:
+                texts.append(message.name)
+            if isinstance(message, AssistantPromptMessage):
+                for tool_call in message.tool_calls:
+                    texts.append(tool_call.function.name)
+                    texts.append(tool_call.function.arguments)
+        if tools:
+            texts.extend(json.dumps(tool.model_dump(), ensure_ascii=False) for tool in tools)
+
+        counts = cls.count_texts(model, texts)
+        if counts is None:
+            return None
+        return sum(counts) + TOKENS_PER_MESSAGE * len(prompt_messages) + TOKENS_PER_REPLY
@@ -1,11 +1,13 @@
 import inspect
 import json
 import logging
+import threading
 from collections.abc import Callable, Generator
-from typing import TypeVar
+from typing import Optional, TypeVar
 
 import requests
 from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
 from yarl import URL
 
@@ -39,6 +41,25 @@ logger = logging.getLogger(__name__)
 
 
 class BasePluginClient:
+    # keep-alive connections to the plugin daemon, shared by all clients of the process
+    _session: Optional[requests.Session] = None
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=dify_config.PLUGIN_DAEMON_HTTP_POOL_MAX_SIZE,
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    BasePluginClient._session = session
+        return cls._session  # type: ignore[return-value]
+
     def _request(
         self,
         method: str,
@@ -61,7 +82,7 @@ class BasePluginClient:
             data = json.dumps(data)
 
         try:
-            response = requests.request(
+            response = self._get_session().request(
                 method=method, url=str(url), headers=headers, data=data, params=params, stream=stream, files=files
             )
         except requests.exceptions.ConnectionError:
@@ -83,12 +104,17 @@ class BasePluginClient:
         Make a stream request to the plugin daemon inner API
         """
         response = self._request(method, path, headers, data, params, files, stream=True)
-        for line in response.iter_lines(chunk_size=1024 * 8):
-            line = line.decode("utf-8").strip()
-            if line.startswith("data:"):
-                line = line[5:].strip()
-            if line:
-                yield line
+        try:
+            for line in response.iter_lines(chunk_size=1024 * 8):
+                # lines are validated from bytes, pydantic decodes the JSON without an intermediate str
+                line = line.strip()
+                if line.startswith(b"data:"):
+                    line = line[5:].strip()
+                if line:
+                    yield line
+        finally:
+            # return the connection to the pool even if the consumer stops early
+            response.close()
 
     def _stream_request_with_model(
         self,
@@ -103,8 +129,12 @@ class BasePluginClient:
         """
         Make a stream request to the plugin daemon inner API and yield the response as a model.
         """
+        is_model = inspect.isclass(type) and issubclass(type, BaseModel)
         for line in self._stream_request(method, path, params, headers, data, files):
-            yield type(**json.loads(line))  # type: ignore
+            if is_model:
+                yield type.model_validate_json(line)  # type: ignore
+            else:
+                yield type(**json.loads(line))  # type: ignore
 
     def _request_with_model(
         self,
@@ -149,10 +179,10 @@ class BasePluginClient:
             raise ValueError(msg) from e
 
         try:
-            json_response = response.json()
             if transformer:
-                json_response = transformer(json_response)
-            rep = PluginDaemonBasicResponse[type](**json_response)  # type: ignore
+                rep = PluginDaemonBasicResponse[type](**transformer(response.json()))  # type: ignore
+            else:
+                rep = PluginDaemonBasicResponse[type].model_validate_json(response.content)  # type: ignore
         except Exception:
             msg = (
                 f"Failed to parse response from plugin daemon to PluginDaemonBasicResponse [{str(type.__name__)}],"
@@ -192,14 +222,15 @@ class BasePluginClient:
                 rep = PluginDaemonBasicResponse[type].model_validate_json(line)  # type: ignore
             except (ValueError, TypeError):
                 # TODO modify this when line_data has code and message
+                text = line.decode("utf-8", errors="replace")
                 try:
-                    line_data = json.loads(line)
+                    line_data = json.loads(text)
                 except (ValueError, TypeError):
-                    raise ValueError(line)
+                    raise ValueError(text)
                 # If the dictionary contains the `error` key, use its value as the argument
                 # for `ValueError`.
                 # Otherwise, use the `line` to provide better contextual information about the error.
-                raise ValueError(line_data.get("error", line))
+                raise ValueError(line_data.get("error", text))
 
             if rep.code != 0:
                 if rep.code == -500:
@@ -163,7 +163,7 @@ class AdvancedPromptTransform(PromptTransform):
                         if k.startswith("#"):
                             vp.add(k[1:-1].split("."), v)
                     raw_prompt = raw_prompt.replace("{{#context#}}", context or "")
-                    prompt = vp.convert_template(raw_prompt).text
+                    prompt = vp.render_template(raw_prompt)
                 else:
                     parser = PromptTemplateParser(template=raw_prompt, with_variable_tmpl=self.with_variable_tmpl)
                     prompt_inputs: Mapping[str, str] = {k: inputs[k] for k in parser.variable_keys if k in inputs}
@@ -73,7 +73,7 @@ class Jieba(BaseKeyword):
         keyword_table = self._get_dataset_keyword_table()
         if keyword_table is None:
             return False
-        return id in set.union(*keyword_table.values())
+        return any(id in node_idxs for node_idxs in keyword_table.values())
 
     def delete_by_ids(self, ids: list[str]) -> None:
         lock_name = "keyword_indexing_lock_{}".format(self.dataset.id)
@@ -91,29 +91,7 @@ class Jieba(BaseKeyword):
         document_ids_filter = kwargs.get("document_ids_filter")
         sorted_chunk_indices = self._retrieve_ids_by_query(keyword_table or {}, query, k)
 
-        documents = []
-        for chunk_index in sorted_chunk_indices:
-            segment_query = db.session.query(DocumentSegment).filter(
-                DocumentSegment.dataset_id == self.dataset.id, DocumentSegment.index_node_id == chunk_index
-            )
-            if document_ids_filter:
-                segment_query = segment_query.filter(DocumentSegment.document_id.in_(document_ids_filter))
-            segment = segment_query.first()
-
-            if segment:
-                documents.append(
-                    Document(
-                        page_content=segment.content,
-                        metadata={
-                            "doc_id": chunk_index,
-                            "doc_hash": segment.index_node_hash,
-                            "document_id": segment.document_id,
-                            "dataset_id": segment.dataset_id,
-                        },
-                    )
-                )
-
-        return documents
+        return self._get_documents_by_chunk_indices(sorted_chunk_indices, document_ids_filter)
 
     def delete(self) -> None:
         lock_name = "keyword_indexing_lock_{}".format(self.dataset.id)
@@ -182,9 +160,9 @@ class Jieba(BaseKeyword):
         # delete node_idxs from keyword to node idxs mapping
         keywords_to_delete = set()
         for keyword, node_idxs in keyword_table.items():
-            if node_idxs_to_delete.intersection(node_idxs):
-                keyword_table[keyword] = node_idxs.difference(node_idxs_to_delete)
-                if not keyword_table[keyword]:
+            if not node_idxs_to_delete.isdisjoint(node_idxs):
+                node_idxs.difference_update(node_idxs_to_delete)
+                if not node_idxs:
                     keywords_to_delete.add(keyword)
 
         for keyword in keywords_to_delete:
@@ -198,7 +176,7 @@ class Jieba(BaseKeyword):
 
         # go through text chunks in order of most matching keywords
         chunk_indices_count: dict[str, int] = defaultdict(int)
-        keywords_list = [keyword for keyword in keywords if keyword in set(keyword_table.keys())]
+        keywords_list = [keyword for keyword in keywords if keyword in keyword_table]
         for keyword in keywords_list:
             for node_id in keyword_table[keyword]:
                 chunk_indices_count[node_id] += 1
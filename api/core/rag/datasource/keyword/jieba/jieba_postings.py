@@ -0,0 +1,153 @@
+from typing import Any
+
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from core.rag.datasource.keyword.jieba.jieba import KeywordTableConfig
+from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
+from core.rag.datasource.keyword.keyword_base import BaseKeyword
+from core.rag.models.document import Document
+from extensions.ext_database import db
+from models.dataset import Dataset, DatasetKeywordPosting, DocumentSegment
+
+# number of posting rows written per INSERT statement
+POSTING_INSERT_BATCH_SIZE = 1000
+
+
+class JiebaPostings(BaseKeyword):
+    """
+    Jieba keyword index stored as one posting row per (keyword, chunk).
+
+    Unlike `Jieba`, which rewrites the whole dataset keyword table on every change,
+    adds and deletes only touch the postings of the affected chunks, and search only
+    reads the postings of the query keywords.
+    """
+
+    def __init__(self, dataset: Dataset):
+        super().__init__(dataset)
+        self._config = KeywordTableConfig()
+
+    def create(self, texts: list[Document], **kwargs) -> BaseKeyword:
+        self.add_texts(texts, **kwargs)
+        return self
+
+    def add_texts(self, texts: list[Document], **kwargs):
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords_list = kwargs.get("keywords_list")
+        node_keywords: dict[str, list[str]] = {}
+        for i, text in enumerate(texts):
+            keywords = keywords_list[i] if keywords_list else None
+            if not keywords:
+                keywords = keyword_table_handler.extract_keywords(
+                    text.page_content, self._config.max_keywords_per_chunk
+                )
+            if text.metadata is not None:
+                node_keywords[text.metadata["doc_id"]] = list(keywords)
+
+        self._update_segments_keywords(node_keywords)
+        self._add_postings(node_keywords)
+
+    def text_exists(self, id: str) -> bool:
+        posting = (
+            db.session.query(DatasetKeywordPosting.id)
+            .filter(DatasetKeywordPosting.dataset_id == self.dataset.id, DatasetKeywordPosting.index_node_id == id)
+            .first()
+        )
+        return posting is not None
+
+    def delete_by_ids(self, ids: list[str]) -> None:
+        if not ids:
+            return
+        db.session.execute(
+            delete(DatasetKeywordPosting).where(
+                DatasetKeywordPosting.dataset_id == self.dataset.id,
+                DatasetKeywordPosting.index_node_id.in_(ids),
+            )
+        )
+        db.session.commit()
+
+    def delete(self) -> None:
+        db.session.execute(delete(DatasetKeywordPosting).where(DatasetKeywordPosting.dataset_id == self.dataset.id))
+        db.session.commit()
+
+    def search(self, query: str, **kwargs: Any) -> list[Document]:
+        k = kwargs.get("top_k", 4)
+        document_ids_filter = kwargs.get("document_ids_filter")
+
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords = keyword_table_handler.extract_keywords(query)
+        if not keywords:
+            return []
+
+        # rank chunks by the number of matching query keywords
+        score = func.count().label("score")
+        stmt = select(DatasetKeywordPosting.index_node_id, score).where(
+            DatasetKeywordPosting.dataset_id == self.dataset.id,
+            DatasetKeywordPosting.keyword.in_(keywords),
+        )
+        if document_ids_filter:
+            stmt = stmt.join(
+                DocumentSegment,
+                and_(
+                    DocumentSegment.dataset_id == DatasetKeywordPosting.dataset_id,
+                    DocumentSegment.index_node_id == DatasetKeywordPosting.index_node_id,
+                ),
+            ).where(DocumentSegment.document_id.in_(document_ids_filter))
+        stmt = (
+            stmt.group_by(DatasetKeywordPosting.index_node_id)
+            .order_by(score.desc(), DatasetKeywordPosting.index_node_id)
+            .limit(k)
+        )
+        sorted_chunk_indices = [row.index_node_id for row in db.session.execute(stmt)]
+
+        return self._get_documents_by_chunk_indices(sorted_chunk_indices)
+
+    def _add_postings(self, node_keywords: dict[str, list[str]]) -> None:
+        rows = [
+            {"dataset_id": self.dataset.id, "keyword": keyword, "index_node_id": node_id}
+            for node_id, keywords in node_keywords.items()
+            for keyword in set(keywords)
+        ]
+        for i in range(0, len(rows), POSTING_INSERT_BATCH_SIZE):
+            stmt = (
+                insert(DatasetKeywordPosting)
+                .values(rows[i : i + POSTING_INSERT_BATCH_SIZE])
+                .on_conflict_do_nothing(index_elements=["dataset_id", "keyword", "index_node_id"])
+            )
+            db.session.execute(stmt)
+        db.session.commit()
+
+    def _update_segments_keywords(self, node_keywords: dict[str, list[str]]) -> None:
+        if not node_keywords:
+            return
+        segments = (
+            db.session.query(DocumentSegment)
+            .filter(
+                DocumentSegment.dataset_id == self.dataset.id,
+                DocumentSegment.index_node_id.in_(list(node_keywords.keys())),
+            )
+            .all()
+        )
+        for segment in segments:
+            segment.keywords = node_keywords[segment.index_node_id]
+        db.session.commit()
+
+    def create_segment_keywords(self, node_id: str, keywords: list[str]):
+        self._update_segments_keywords({node_id: keywords})
+        self._add_postings({node_id: keywords})
+
+    def multi_create_segment_keywords(self, pre_segment_data_list: list):
+        keyword_table_handler = JiebaKeywordTableHandler()
+        node_keywords: dict[str, list[str]] = {}
+        for pre_segment_data in pre_segment_data_list:
+            segment = pre_segment_data["segment"]
+            if pre_segment_data["keywords"]:
+                segment.keywords = pre_segment_data["keywords"]
+            else:
+                keywords = keyword_table_handler.extract_keywords(segment.content, self._config.max_keywords_per_chunk)
+                segment.keywords = list(keywords)
+            node_keywords[segment.index_node_id] = segment.keywords
+        self._add_postings(node_keywords)
+
+    def update_segment_keywords_index(self, node_id: str, keywords: list[str]):
+        self._add_postings({node_id: keywords})
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Optional
 
 from core.rag.models.document import Document
-from models.dataset import Dataset
+from extensions.ext_database import db
+from models.dataset import Dataset, DocumentSegment
 
 
 class BaseKeyword(ABC):
@@ -48,3 +49,34 @@ class BaseKeyword(ABC):
 
     def _get_uuids(self, texts: list[Document]) -> list[str]:
         return [text.metadata["doc_id"] for text in texts if text.metadata]
+
+    def _get_documents_by_chunk_indices(
+        self, chunk_indices: list[str], document_ids_filter: Optional[list[str]] = None
+    ) -> list[Document]:
+        """Load the segments of ranked chunk indices with a single query, keeping the rank order."""
+        if not chunk_indices:
+            return []
+        segment_query = db.session.query(DocumentSegment).filter(
+            DocumentSegment.dataset_id == self.dataset.id, DocumentSegment.index_node_id.in_(chunk_indices)
+        )
+        if document_ids_filter:
+            segment_query = segment_query.filter(DocumentSegment.document_id.in_(document_ids_filter))
+        segment_map = {segment.index_node_id: segment for segment in segment_query.all()}
+
+        documents = []
+        for chunk_index in chunk_indices:
+            segment = segment_map.get(chunk_index)
+            if segment:
+                documents.append(
+                    Document(
+                        page_content=segment.content,
+                        metadata={
+                            "doc_id": chunk_index,
+                            "doc_hash": segment.index_node_hash,
+                            "document_id": segment.document_id,
+                            "dataset_id": segment.dataset_id,
+                        },
+                    )
+                )
+
+        return documents
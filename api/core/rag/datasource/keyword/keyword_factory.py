@@ -24,6 +24,10 @@ class Keyword:
                 from core.rag.datasource.keyword.jieba.jieba import Jieba
 
                 return Jieba
+            case KeyWordType.JIEBA_POSTINGS:
+                from core.rag.datasource.keyword.jieba.jieba_postings import JiebaPostings
+
+                return JiebaPostings
             case _:
                 raise ValueError(f"Keyword store {keyword_type} is not supported.")
 
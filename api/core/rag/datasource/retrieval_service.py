@@ -7,8 +7,7 @@ from sqlalchemy.orm import load_only
 
 from configs import dify_config
 from core.rag.data_post_processor.data_post_processor import DataPostProcessor
-from core.rag.datasource.keyword.keyword_factory import Keyword
-from core.rag.datasource.vdb.vector_factory import Vector
+from core.rag.datasource.retrieval_store_cache import RetrievalStoreCache
 from core.rag.embedding.retrieval import RetrievalSegments
 from core.rag.entities.metadata_entities import MetadataCondition
 from core.rag.index_processor.constant.index_type import IndexType
@@ -163,7 +162,7 @@ class RetrievalService:
                 if not dataset:
                     raise ValueError("dataset not found")
 
-                keyword = Keyword(dataset=dataset)
+                keyword = RetrievalStoreCache.get_keyword(dataset)
 
                 documents = keyword.search(
                     cls.escape_query_for_search(query), top_k=top_k, document_ids_filter=document_ids_filter
@@ -192,7 +191,7 @@ class RetrievalService:
                 if not dataset:
                     raise ValueError("dataset not found")
 
-                vector = Vector(dataset=dataset)
+                vector = RetrievalStoreCache.get_vector(dataset)
                 documents = vector.search_by_vector(
                     query,
                     search_type="similarity_score_threshold",
@@ -245,7 +244,7 @@ class RetrievalService:
                 if not dataset:
                     raise ValueError("dataset not found")
 
-                vector_processor = Vector(dataset=dataset)
+                vector_processor = RetrievalStoreCache.get_vector(dataset)
 
                 documents = vector_processor.search_by_full_text(
                     cls.escape_query_for_search(query), top_k=top_k, document_ids_filter=document_ids_filter
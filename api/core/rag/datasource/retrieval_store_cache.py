@@ -0,0 +1,82 @@
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from cachetools import TTLCache
+from sqlalchemy import inspect
+
+from configs import dify_config
+from core.helper.model_provider_cache import ProviderCredentialsCache
+from core.rag.datasource.keyword.keyword_factory import Keyword
+from core.rag.datasource.vdb.vector_factory import Vector
+from models.dataset import Dataset
+
+
+class RetrievalStoreCache:
+    """
+    Per-process cache of ready `Vector` and `Keyword` stores of datasets, for retrieval.
+
+    Building a `Vector` resolves the tenant's provider configuration, the embedding model
+    instance and a vector store client, which multi-dataset retrieval would otherwise repeat
+    for every dataset of every query. Entries are keyed by the dataset's index structure and
+    embedding model, so updating either builds a new store, and by the version of the tenant's
+    provider credentials, which is bumped whenever credentials change.
+
+    Cached stores hold a detached snapshot of the dataset, since the dataset row a store was
+    built from belongs to the session of the request that built it.
+    """
+
+    _cache: TTLCache = TTLCache(
+        maxsize=dify_config.DATASET_RETRIEVAL_STORE_CACHE_MAX_SIZE,
+        ttl=max(dify_config.DATASET_RETRIEVAL_STORE_CACHE_TTL, 1),
+    )
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_vector(cls, dataset: Dataset) -> Vector:
+        # stores of datasets without an index structure yet write it to the dataset when built
+        if not cls._is_enabled() or not dataset.index_struct:
+            return Vector(dataset=dataset)
+        return cls._get_or_build(("vector", *cls._get_dataset_key(dataset)), lambda: Vector(cls._snapshot(dataset)))
+
+    @classmethod
+    def get_keyword(cls, dataset: Dataset) -> Keyword:
+        if not cls._is_enabled():
+            return Keyword(dataset=dataset)
+        return cls._get_or_build(("keyword", dataset.id), lambda: Keyword(cls._snapshot(dataset)))
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._cache.clear()
+
+    @staticmethod
+    def _is_enabled() -> bool:
+        return dify_config.DATASET_RETRIEVAL_STORE_CACHE_TTL > 0
+
+    @staticmethod
+    def _get_dataset_key(dataset: Dataset) -> tuple:
+        return (
+            dataset.id,
+            dataset.index_struct,
+            dataset.embedding_model_provider,
+            dataset.embedding_model,
+            ProviderCredentialsCache.get_version(dataset.tenant_id),
+        )
+
+    @classmethod
+    def _get_or_build(cls, key: tuple, build: Callable[[], Any]) -> Any:
+        with cls._lock:
+            store = cls._cache.get(key)
+        if store is not None:
+            return store
+
+        # built outside the lock, concurrent misses of the same key may both build, the last one wins
+        store = build()
+        with cls._lock:
+            cls._cache[key] = store
+        return store
+
+    @staticmethod
+    def _snapshot(dataset: Dataset) -> Dataset:
+        return Dataset(**{attr.key: getattr(dataset, attr.key) for attr in inspect(Dataset).column_attrs})
@@ -0,0 +1,161 @@
+"""
+Process-wide connection pools shared by the SQL-backed vector stores.
+
+Vector store clients are constructed for every retrieval and every indexing batch, so
+they must not own their connection pools. Pools are created once per connection config
+and reused by every client of the process.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from typing import Any
+from weakref import WeakKeyDictionary
+
+import psycopg2.pool  # type: ignore
+from sqlalchemy import Engine, create_engine
+
+logger = logging.getLogger(__name__)
+
+# seconds to wait for a free connection of a psycopg2 pool
+POOL_TIMEOUT = 30
+# connections idle for longer than this many seconds are pinged before they are handed out
+POOL_PING_IDLE_TIME = 30
+
+
+class SharedConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    """
+    Thread-safe psycopg2 pool that waits for a free connection when all are in use,
+    instead of raising, and replaces connections closed or dropped by the server.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, *args: Any, **kwargs: Any) -> None:
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self._available = threading.BoundedSemaphore(maxconn)
+        # when idle connections were returned to the pool
+        self._returned_at: WeakKeyDictionary[Any, float] = WeakKeyDictionary()
+
+    def getconn(self, key=None):
+        if not self._available.acquire(timeout=POOL_TIMEOUT):
+            raise psycopg2.pool.PoolError(f"timed out waiting for a connection of vector store {self._dsn_host()}")
+        try:
+            # every pooled connection is tried at most once before opening a new one
+            for _ in range(self.maxconn):
+                conn = super().getconn(key)
+                if self._is_alive(conn):
+                    return conn
+                logger.warning("Discarding dropped connection of vector store %s", self._dsn_host())
+                super().putconn(conn, key, close=True)
+            return super().getconn(key)
+        except BaseException:
+            self._available.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            close = close or bool(conn is not None and conn.closed)
+            if conn is not None and not close:
+                self._returned_at[conn] = time.monotonic()
+            super().putconn(conn, key, close=close)
+        finally:
+            self._available.release()
+
+    def _is_alive(self, conn) -> bool:
+        """
+        Check a connection taken from the pool. `closed` only reflects connections closed by the client,
+        so connections idle for a while, which the server may have dropped, are pinged as well.
+        """
+        returned_at = self._returned_at.pop(conn, None)
+        if conn.closed:
+            return False
+        if returned_at is None or time.monotonic() - returned_at < POOL_PING_IDLE_TIME:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "host": self._dsn_host(),
+                "min_connection": self.minconn,
+                "max_connection": self.maxconn,
+                "in_use": len(self._used),
+                "idle": len(self._pool),
+            }
+
+    def _dsn_host(self) -> str:
+        return f"{self._kwargs.get('host')}:{self._kwargs.get('port')}/{self._kwargs.get('database')}"
+
+
+_lock = threading.Lock()
+_psycopg2_pools: dict[tuple, SharedConnectionPool] = {}
+_engines: dict[str, Engine] = {}
+
+
+def get_psycopg2_pool(min_connection: int, max_connection: int, **connect_kwargs: Any) -> SharedConnectionPool:
+    """
+    Get the shared psycopg2 pool of a connection config, creating it on first use.
+    :param min_connection: connections opened when the pool is created
+    :param max_connection: maximum number of open connections of the pool
+    :param connect_kwargs: `psycopg2.connect` arguments, e.g. host, port, user, password and database
+    """
+    key = (min_connection, max_connection, *sorted(connect_kwargs.items()))
+    pool = _psycopg2_pools.get(key)
+    if pool is None:
+        with _lock:
+            pool = _psycopg2_pools.get(key)
+            if pool is None:
+                pool = SharedConnectionPool(min_connection, max_connection, **connect_kwargs)
+                _psycopg2_pools[key] = pool
+    return pool
+
+
+def get_sqlalchemy_engine(url: str, **engine_kwargs: Any) -> Engine:
+    """
+    Get the shared SQLAlchemy engine of a database url, creating it on first use.
+    Connections are checked with a ping when they are taken from the engine's pool.
+    :param url: database url
+    :param engine_kwargs: `create_engine` arguments, only used when the engine is created
+    """
+    engine = _engines.get(url)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(url)
+            if engine is None:
+                engine = create_engine(url, pool_pre_ping=True, **engine_kwargs)
+                _engines[url] = engine
+    return engine
+
+
+def get_pool_stats() -> list[dict[str, Any]]:
+    """Return connection usage of every shared pool."""
+    with _lock:
+        psycopg2_pools = list(_psycopg2_pools.values())
+        engines = list(_engines.values())
+
+    stats = [pool.stats() for pool in psycopg2_pools]
+    for engine in engines:
+        stats.append(
+            {
+                "host": f"{engine.url.host}:{engine.url.port}/{engine.url.database}",
+                "status": engine.pool.status(),
+            }
+        )
+    return stats
+
+
+@atexit.register
+def close_all_pools() -> None:
+    with _lock:
+        for pool in _psycopg2_pools.values():
+            pool.closeall()
+        _psycopg2_pools.clear()
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
@@ -4,10 +4,10 @@ from contextlib import contextmanager
 from typing import Any
 
 import psycopg2.extras  # type: ignore
-import psycopg2.pool  # type: ignore
 from pydantic import BaseModel, model_validator
 
 from configs import dify_config
+from core.rag.datasource.vdb.connection_pool import get_psycopg2_pool
 from core.rag.datasource.vdb.vector_base import BaseVector
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
@@ -80,7 +80,7 @@ class OpenGauss(BaseVector):
         return VectorType.OPENGAUSS
 
     def _create_connection_pool(self, config: OpenGaussConfig):
-        return psycopg2.pool.SimpleConnectionPool(
+        return get_psycopg2_pool(
             config.min_connection,
             config.max_connection,
             host=config.host,
@@ -97,9 +97,12 @@ class OpenGauss(BaseVector):
         try:
             yield cur
         finally:
-            cur.close()
-            conn.commit()
-            self.pool.putconn(conn)
+            try:
+                cur.close()
+                conn.commit()
+            finally:
+                # the pool is shared by the process, a connection must be returned even if the commit fails
+                self.pool.putconn(conn)
 
     def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
         dimension = len(embeddings[0])
@@ -3,7 +3,7 @@ import uuid
 from typing import Any, Optional
 
 from pydantic import BaseModel, model_validator
-from sqlalchemy import Column, String, Table, create_engine, insert
+from sqlalchemy import Column, String, Table, insert
 from sqlalchemy import text as sql_text
 from sqlalchemy.dialects.postgresql import JSON, TEXT
 from sqlalchemy.orm import Session
@@ -19,6 +19,7 @@ except ImportError:
     from sqlalchemy.ext.declarative import declarative_base
 
 from configs import dify_config
+from core.rag.datasource.vdb.connection_pool import get_sqlalchemy_engine
 from core.rag.datasource.vdb.vector_base import BaseVector
 from core.rag.models.document import Document
 from extensions.ext_redis import redis_client
@@ -57,7 +58,7 @@ class RelytVector(BaseVector):
         self._url = (
             f"postgresql+psycopg2://{config.user}:{config.password}@{config.host}:{config.port}/{config.database}"
         )
-        self.client = create_engine(self._url)
+        self.client = get_sqlalchemy_engine(self._url)
         self._fields: list[str] = []
         self._group_id = group_id
 
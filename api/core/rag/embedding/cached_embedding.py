@@ -1,8 +1,11 @@
-import base64
 import logging
+import threading
+from collections import Counter
 from typing import Any, Optional, cast
 
 import numpy as np
+from cachetools import TTLCache
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 
 from configs import dify_config
@@ -14,12 +17,22 @@ from core.rag.embedding.embedding_base import Embeddings
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from libs import helper
-from models.dataset import Embedding
+from models.dataset import Embedding, decode_embedding, encode_embedding
 
 logger = logging.getLogger(__name__)
 
+# number of hashes probed or rows upserted per round trip to the embedding cache table
+EMBEDDING_CACHE_BATCH_SIZE = 1000
+
 
 class CacheEmbedding(Embeddings):
+    # per-process query embedding cache shared by all instances, in front of redis
+    _local_query_cache: TTLCache = TTLCache(
+        maxsize=dify_config.EMBEDDING_QUERY_LOCAL_CACHE_MAX_SIZE, ttl=dify_config.EMBEDDING_QUERY_CACHE_TTL
+    )
+    _local_query_cache_lock = threading.Lock()
+    _query_cache_stats: Counter[str] = Counter()
+
     def __init__(self, model_instance: ModelInstance, user: Optional[str] = None) -> None:
         self._model_instance = model_instance
         self._user = user
@@ -28,18 +41,12 @@ class CacheEmbedding(Embeddings):
         """Embed search docs in batches of 10."""
         # use doc embedding cache or store if not exists
         text_embeddings: list[Any] = [None for _ in range(len(texts))]
+        text_hashes = [helper.generate_text_hash(text) for text in texts]
+        cached_embeddings = self._load_cached_embeddings(set(text_hashes))
         embedding_queue_indices = []
-        for i, text in enumerate(texts):
-            hash = helper.generate_text_hash(text)
-            embedding = (
-                db.session.query(Embedding)
-                .filter_by(
-                    model_name=self._model_instance.model, hash=hash, provider_name=self._model_instance.provider
-                )
-                .first()
-            )
-            if embedding:
-                text_embeddings[i] = embedding.get_embedding()
+        for i, hash in enumerate(text_hashes):
+            if hash in cached_embeddings:
+                text_embeddings[i] = cached_embeddings[hash]
             else:
                 embedding_queue_indices.append(i)
         if embedding_queue_indices:
@@ -76,23 +83,11 @@ class CacheEmbedding(Embeddings):
                             db.session.rollback()
                         except Exception:
                             logging.exception("Failed transform embedding")
-                cache_embeddings = []
-                try:
-                    for i, n_embedding in zip(embedding_queue_indices, embedding_queue_embeddings):
-                        text_embeddings[i] = n_embedding
-                        hash = helper.generate_text_hash(texts[i])
-                        if hash not in cache_embeddings:
-                            embedding_cache = Embedding(
-                                model_name=self._model_instance.model,
-                                hash=hash,
-                                provider_name=self._model_instance.provider,
-                            )
-                            embedding_cache.set_embedding(n_embedding)
-                            db.session.add(embedding_cache)
-                            cache_embeddings.append(hash)
-                    db.session.commit()
-                except IntegrityError:
-                    db.session.rollback()
+                new_embeddings: dict[str, list[float]] = {}
+                for i, n_embedding in zip(embedding_queue_indices, embedding_queue_embeddings):
+                    text_embeddings[i] = n_embedding
+                    new_embeddings.setdefault(text_hashes[i], n_embedding)
+                self._save_cached_embeddings(new_embeddings)
             except Exception as ex:
                 db.session.rollback()
                 logger.exception("Failed to embed documents: %s")
@@ -100,16 +95,76 @@ class CacheEmbedding(Embeddings):
 
         return text_embeddings
 
+    def _load_cached_embeddings(self, hashes: set[str]) -> dict[str, list[float]]:
+        """Fetch cached document embeddings with one `IN` query per batch of hashes."""
+        cached_embeddings: dict[str, list[float]] = {}
+        hash_list = list(hashes)
+        for i in range(0, len(hash_list), EMBEDDING_CACHE_BATCH_SIZE):
+            batch_hashes = hash_list[i : i + EMBEDDING_CACHE_BATCH_SIZE]
+            embeddings = (
+                db.session.query(Embedding)
+                .filter(
+                    Embedding.model_name == self._model_instance.model,
+                    Embedding.provider_name == self._model_instance.provider,
+                    Embedding.hash.in_(batch_hashes),
+                )
+                .all()
+            )
+            for embedding in embeddings:
+                cached_embeddings[embedding.hash] = embedding.get_embedding()
+        return cached_embeddings
+
+    def _save_cached_embeddings(self, embeddings: dict[str, list[float]]) -> None:
+        """Bulk insert new document embeddings, skipping rows another worker has already cached."""
+        if not embeddings:
+            return
+        rows = []
+        for hash, n_embedding in embeddings.items():
+            embedding_cache = Embedding(
+                model_name=self._model_instance.model,
+                hash=hash,
+                provider_name=self._model_instance.provider,
+            )
+            embedding_cache.set_embedding(n_embedding)
+            rows.append(
+                {
+                    "model_name": embedding_cache.model_name,
+                    "hash": embedding_cache.hash,
+                    "provider_name": embedding_cache.provider_name,
+                    "embedding": embedding_cache.embedding,
+                }
+            )
+        try:
+            for i in range(0, len(rows), EMBEDDING_CACHE_BATCH_SIZE):
+                stmt = (
+                    insert(Embedding)
+                    .values(rows[i : i + EMBEDDING_CACHE_BATCH_SIZE])
+                    .on_conflict_do_nothing(index_elements=["model_name", "hash", "provider_name"])
+                )
+                db.session.execute(stmt)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
     def embed_query(self, text: str) -> list[float]:
         """Embed query text."""
-        # use doc embedding cache or store if not exists
+        # use the in-process cache first, then the redis cache, then the model
         hash = helper.generate_text_hash(text)
-        embedding_cache_key = f"{self._model_instance.provider}_{self._model_instance.model}_{hash}"
+        embedding_cache_key = f"query_embedding:{self._model_instance.provider}_{self._model_instance.model}_{hash}"
+        with self._local_query_cache_lock:
+            local_embedding = self._local_query_cache.get(embedding_cache_key)
+        if local_embedding is not None:
+            self._record_query_cache("local_hit")
+            return list(local_embedding)
+
         embedding = redis_client.get(embedding_cache_key)
         if embedding:
-            redis_client.expire(embedding_cache_key, 600)
-            decoded_embedding = np.frombuffer(base64.b64decode(embedding), dtype="float")
-            return [float(x) for x in decoded_embedding]
+            self._record_query_cache("redis_hit")
+            embedding_results = decode_embedding(embedding).tolist()
+            self._put_local_query_cache(embedding_cache_key, embedding_results)
+            return embedding_results  # type: ignore
+
+        self._record_query_cache("miss")
         try:
             embedding_result = self._model_instance.invoke_text_embedding(
                 texts=[text], user=self._user, input_type=EmbeddingInputType.QUERY
@@ -126,17 +181,28 @@ class CacheEmbedding(Embeddings):
             raise ex
 
         try:
-            # encode embedding to base64
-            embedding_vector = np.array(embedding_results)
-            vector_bytes = embedding_vector.tobytes()
-            # Transform to Base64
-            encoded_vector = base64.b64encode(vector_bytes)
-            # Transform to string
-            encoded_str = encoded_vector.decode("utf-8")
-            redis_client.setex(embedding_cache_key, 600, encoded_str)
+            vector_bytes = encode_embedding(embedding_results, dify_config.EMBEDDING_QUERY_CACHE_DTYPE)
+            redis_client.setex(embedding_cache_key, dify_config.EMBEDDING_QUERY_CACHE_TTL, vector_bytes)
         except Exception as ex:
             if dify_config.DEBUG:
                 logging.exception(f"Failed to add embedding to redis for the text '{text[:10]}...({len(text)} chars)'")
             raise ex
+        self._put_local_query_cache(embedding_cache_key, embedding_results)
 
         return embedding_results  # type: ignore
+
+    @classmethod
+    def _put_local_query_cache(cls, key: str, embedding: list[float]) -> None:
+        with cls._local_query_cache_lock:
+            cls._local_query_cache[key] = embedding
+
+    @classmethod
+    def _record_query_cache(cls, outcome: str) -> None:
+        with cls._local_query_cache_lock:
+            cls._query_cache_stats[outcome] += 1
+
+    @classmethod
+    def get_query_cache_stats(cls) -> dict[str, int]:
+        """Return the query embedding cache counters of this process: local_hit, redis_hit and miss."""
+        with cls._local_query_cache_lock:
+            return {outcome: cls._query_cache_stats[outcome] for outcome in ("local_hit", "redis_hit", "miss")}
@@ -6,6 +6,7 @@ from urllib.parse import unquote
 
 from configs import dify_config
 from core.helper import ssrf_proxy
+from core.helper.extraction_cache import ExtractionCache
 from core.rag.extractor.csv_extractor import CSVExtractor
 from core.rag.extractor.entity.datasource_type import DatasourceType
 from core.rag.extractor.entity.extract_setting import ExtractSetting
@@ -91,6 +92,40 @@ class ExtractProcessor:
     @classmethod
     def extract(
         cls, extract_setting: ExtractSetting, is_automatic: bool = False, file_path: Optional[str] = None
+    ) -> list[Document]:
+        cache = None if file_path else cls._get_extraction_cache(extract_setting, is_automatic)
+        if cache is None:
+            return cls._extract(extract_setting, is_automatic, file_path)
+
+        cached_documents = cache.get()
+        if isinstance(cached_documents, list):
+            return [Document.model_validate(document) for document in cached_documents]
+
+        documents = cls._extract(extract_setting, is_automatic, file_path)
+        cache.set([document.model_dump(include={"page_content", "metadata"}) for document in documents])
+        return documents
+
+    @staticmethod
+    def _get_extraction_cache(extract_setting: ExtractSetting, is_automatic: bool) -> Optional[ExtractionCache]:
+        """
+        Get the extraction cache of an upload file, keyed by the content hash recorded when the file was uploaded,
+        so cached files are not downloaded. None if the file can not be cached.
+        """
+        upload_file = extract_setting.upload_file
+        if extract_setting.datasource_type != DatasourceType.FILE.value or not upload_file or not upload_file.hash:
+            return None
+        file_extension = Path(upload_file.key).suffix.lower()
+        # docx extraction saves the embedded images as upload files, which its text links to
+        if file_extension == ".docx":
+            return None
+        return ExtractionCache(
+            namespace=f"extract_processor:{upload_file.tenant_id}:{dify_config.ETL_TYPE}:{is_automatic}:{file_extension}",
+            content_hash=upload_file.hash,
+        )
+
+    @classmethod
+    def _extract(
+        cls, extract_setting: ExtractSetting, is_automatic: bool = False, file_path: Optional[str] = None
     ) -> list[Document]:
         if extract_setting.datasource_type == DatasourceType.FILE.value:
             with tempfile.TemporaryDirectory() as temp_dir:
@@ -0,0 +1,115 @@
+from collections import Counter
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+
+
+def calculate_tfidf_similarities(
+    query_keywords: Iterable[str], documents_keywords: Sequence[Iterable[str]]
+) -> list[float]:
+    """
+    Score documents by the cosine similarity of their TF-IDF keyword vectors to the query's,
+    with the IDF computed over the candidate documents.
+
+    The document-term matrix is kept in sparse coordinate form (one entry per distinct keyword
+    of a document), so every step is a NumPy reduction over all candidates at once.
+    :param query_keywords: keywords of the search query
+    :param documents_keywords: keywords of each candidate document
+
+    :return: one similarity in [0, 1] per document
+    """
+    total_documents = len(documents_keywords)
+    if not total_documents:
+        return []
+
+    vocabulary: dict[str, int] = {}
+    doc_indices: list[int] = []
+    term_indices: list[int] = []
+    term_counts: list[int] = []
+    for doc_index, document_keywords in enumerate(documents_keywords):
+        for keyword, count in Counter(document_keywords).items():
+            doc_indices.append(doc_index)
+            term_indices.append(vocabulary.setdefault(keyword, len(vocabulary)))
+            term_counts.append(count)
+
+    query_counts = np.zeros(len(vocabulary), dtype=np.float64)
+    for keyword, count in Counter(query_keywords).items():
+        # query keywords that no document contains have an IDF of 0
+        if keyword in vocabulary:
+            query_counts[vocabulary[keyword]] = count
+    if not query_counts.any():
+        return [0.0] * total_documents
+
+    rows = np.asarray(doc_indices, dtype=np.intp)
+    cols = np.asarray(term_indices, dtype=np.intp)
+    counts = np.asarray(term_counts, dtype=np.float64)
+
+    # each (document, keyword) pair occurs once, so the column counts are the document frequencies
+    document_frequency = np.bincount(cols, minlength=len(vocabulary))
+    idf = np.log((1 + total_documents) / (1 + document_frequency)) + 1
+
+    query_tfidf = query_counts * idf
+    document_tfidf = counts * idf[cols]
+
+    dot_products = np.bincount(rows, weights=document_tfidf * query_tfidf[cols], minlength=total_documents)
+    document_norms = np.sqrt(np.bincount(rows, weights=document_tfidf**2, minlength=total_documents))
+    denominators = document_norms * np.linalg.norm(query_tfidf)
+
+    similarities = np.divide(
+        dot_products, denominators, out=np.zeros(total_documents, dtype=np.float64), where=denominators > 0
+    )
+    return similarities.tolist()
+
+
+def calculate_cosine_similarities(
+    query_vector: Sequence[float], document_vectors: Sequence[Sequence[float]]
+) -> list[float]:
+    """
+    Score documents by the cosine similarity of their embeddings to the query embedding,
+    as a single matrix-vector product.
+    :param query_vector: embedding of the search query
+    :param document_vectors: embedding of each candidate document
+
+    :return: one similarity per document
+    """
+    if not document_vectors:
+        return []
+
+    query = np.asarray(query_vector, dtype=np.float64)
+    matrix = np.asarray(document_vectors, dtype=np.float64)
+
+    denominators = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    return (matrix @ query / denominators).tolist()
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> list[tuple[str, float]]:
+    """
+    Fuse rankings whose scores are not comparable, e.g. of different datasets or search methods,
+    by summing 1 / (k + rank) of every item over the rankings it appears in.
+    :param rankings: ids of the ranked items, best first, per ranking
+    :param k: damping of the top ranks, 60 as in the original paper
+
+    :return: (id, fused score) pairs, best first
+    """
+    if not rankings:
+        return []
+
+    ids: dict[str, int] = {}
+    item_indices: list[int] = []
+    ranks: list[int] = []
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            item_indices.append(ids.setdefault(item_id, len(ids)))
+            ranks.append(rank)
+    if not ids:
+        return []
+
+    scores = np.bincount(
+        np.asarray(item_indices, dtype=np.intp),
+        weights=1.0 / (k + np.asarray(ranks, dtype=np.float64)),
+        minlength=len(ids),
+    )
+    # stable, so ties keep the order in which items were first ranked
+    order = np.argsort(-scores, kind="stable")
+    item_ids = list(ids)
+    return [(item_ids[i], float(scores[i])) for i in order]
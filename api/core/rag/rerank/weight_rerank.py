@@ -1,9 +1,5 @@
-import math
-from collections import Counter
 from typing import Optional
 
-import numpy as np
-
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
 from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
@@ -11,6 +7,9 @@ from core.rag.embedding.cached_embedding import CacheEmbedding
 from core.rag.models.document import Document
 from core.rag.rerank.entity.weight import VectorSetting, Weights
 from core.rag.rerank.rerank_base import BaseRerankRunner
+from core.rag.rerank.scoring import calculate_cosine_similarities, calculate_tfidf_similarities
+from extensions.ext_database import db
+from models.dataset import DocumentSegment
 
 
 class WeightRerankRunner(BaseRerankRunner):
@@ -39,8 +38,15 @@ class WeightRerankRunner(BaseRerankRunner):
         unique_documents = []
         doc_ids = set()
         for document in documents:
-            if document.metadata is not None and document.metadata["doc_id"] not in doc_ids:
-                doc_ids.add(document.metadata["doc_id"])
+            if document.metadata is None:
+                continue
+            doc_id = document.metadata.get("doc_id")
+            if doc_id is None:
+                # documents of external knowledge have no doc id
+                if document not in unique_documents:
+                    unique_documents.append(document)
+            elif doc_id not in doc_ids:
+                doc_ids.add(doc_id)
                 unique_documents.append(document)
 
         documents = unique_documents
@@ -65,7 +71,7 @@ class WeightRerankRunner(BaseRerankRunner):
 
     def _calculate_keyword_score(self, query: str, documents: list[Document]) -> list[float]:
         """
-        Calculate BM25 scores
+        Calculate TF-IDF cosine scores
         :param query: search query
         :param documents: documents for reranking
 
@@ -73,72 +79,42 @@ class WeightRerankRunner(BaseRerankRunner):
         """
         keyword_table_handler = JiebaKeywordTableHandler()
         query_keywords = keyword_table_handler.extract_keywords(query, None)
+        stored_keywords = self._get_stored_keywords(documents)
         documents_keywords = []
         for document in documents:
-            # get the document keywords
-            document_keywords = keyword_table_handler.extract_keywords(document.page_content, None)
+            # reuse the keywords extracted at indexing time, extract them only for chunks without any
+            document_keywords = stored_keywords.get(document.metadata.get("doc_id")) if document.metadata else None
+            if not document_keywords:
+                document_keywords = keyword_table_handler.extract_keywords(document.page_content, None)
             if document.metadata is not None:
                 document.metadata["keywords"] = document_keywords
                 documents_keywords.append(document_keywords)
 
-        # Counter query keywords(TF)
-        query_keyword_counts = Counter(query_keywords)
-
-        # total documents
-        total_documents = len(documents)
-
-        # calculate all documents' keywords IDF
-        all_keywords = set()
-        for document_keywords in documents_keywords:
-            all_keywords.update(document_keywords)
-
-        keyword_idf = {}
-        for keyword in all_keywords:
-            # calculate include query keywords' documents
-            doc_count_containing_keyword = sum(1 for doc_keywords in documents_keywords if keyword in doc_keywords)
-            # IDF
-            keyword_idf[keyword] = math.log((1 + total_documents) / (1 + doc_count_containing_keyword)) + 1
-
-        query_tfidf = {}
-
-        for keyword, count in query_keyword_counts.items():
-            tf = count
-            idf = keyword_idf.get(keyword, 0)
-            query_tfidf[keyword] = tf * idf
-
-        # calculate all documents' TF-IDF
-        documents_tfidf = []
-        for document_keywords in documents_keywords:
-            document_keyword_counts = Counter(document_keywords)
-            document_tfidf = {}
-            for keyword, count in document_keyword_counts.items():
-                tf = count
-                idf = keyword_idf.get(keyword, 0)
-                document_tfidf[keyword] = tf * idf
-            documents_tfidf.append(document_tfidf)
-
-        def cosine_similarity(vec1, vec2):
-            intersection = set(vec1.keys()) & set(vec2.keys())
-            numerator = sum(vec1[x] * vec2[x] for x in intersection)
-
-            sum1 = sum(vec1[x] ** 2 for x in vec1)
-            sum2 = sum(vec2[x] ** 2 for x in vec2)
-            denominator = math.sqrt(sum1) * math.sqrt(sum2)
-
-            if not denominator:
-                return 0.0
-            else:
-                return float(numerator) / denominator
+        return calculate_tfidf_similarities(query_keywords, documents_keywords)
 
-        similarities = []
-        for document_tfidf in documents_tfidf:
-            similarity = cosine_similarity(query_tfidf, document_tfidf)
-            similarities.append(similarity)
-
-        # for idx, similarity in enumerate(similarities):
-        #     print(f"Document {idx + 1} similarity: {similarity}")
+    @staticmethod
+    def _get_stored_keywords(documents: list[Document]) -> dict[str, list[str]]:
+        """
+        Load the keywords saved on the document segments of all candidates with one query
+        :param documents: documents for reranking
 
-        return similarities
+        :return: keywords by index node id
+        """
+        doc_ids = [
+            document.metadata["doc_id"]
+            for document in documents
+            if document.metadata and document.metadata.get("doc_id")
+        ]
+        dataset_ids = {document.metadata.get("dataset_id") for document in documents if document.metadata}
+        dataset_ids.discard(None)
+        if not doc_ids or not dataset_ids:
+            return {}
+        segments = (
+            db.session.query(DocumentSegment.index_node_id, DocumentSegment.keywords)
+            .filter(DocumentSegment.dataset_id.in_(dataset_ids), DocumentSegment.index_node_id.in_(doc_ids))
+            .all()
+        )
+        return {segment.index_node_id: segment.keywords for segment in segments if segment.keywords}
 
     def _calculate_cosine(
         self, tenant_id: str, query: str, documents: list[Document], vector_setting: VectorSetting
@@ -150,7 +126,15 @@ class WeightRerankRunner(BaseRerankRunner):
 
         :return:
         """
-        query_vector_scores = []
+        query_vector_scores: list[float] = [0.0] * len(documents)
+        unscored_indices = []
+        for i, document in enumerate(documents):
+            if document.metadata and "score" in document.metadata:
+                query_vector_scores[i] = document.metadata["score"]
+            else:
+                unscored_indices.append(i)
+        if not unscored_indices:
+            return query_vector_scores
 
         model_manager = ModelManager()
 
@@ -162,24 +146,12 @@ class WeightRerankRunner(BaseRerankRunner):
         )
         cache_embedding = CacheEmbedding(embedding_model)
         query_vector = cache_embedding.embed_query(query)
-        for document in documents:
-            # calculate cosine similarity
-            if document.metadata and "score" in document.metadata:
-                query_vector_scores.append(document.metadata["score"])
-            else:
-                # transform to NumPy
-                vec1 = np.array(query_vector)
-                vec2 = np.array(document.vector)
-
-                # calculate dot product
-                dot_product = np.dot(vec1, vec2)
-
-                # calculate norm
-                norm_vec1 = np.linalg.norm(vec1)
-                norm_vec2 = np.linalg.norm(vec2)
-
-                # calculate cosine similarity
-                cosine_sim = dot_product / (norm_vec1 * norm_vec2)
-                query_vector_scores.append(cosine_sim)
+        # calculate cosine similarity of all unscored documents at once
+        cosine_scores = calculate_cosine_similarities(
+            query_vector,
+            [documents[i].vector for i in unscored_indices],  # type: ignore
+        )
+        for i, cosine_score in zip(unscored_indices, cosine_scores):
+            query_vector_scores[i] = cosine_score
 
         return query_vector_scores
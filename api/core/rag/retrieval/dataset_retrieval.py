@@ -1,8 +1,9 @@
+import concurrent.futures
 import json
-import math
+import logging
 import re
 import threading
-from collections import Counter, defaultdict
+from collections import defaultdict
 from collections.abc import Generator, Mapping
 from typing import Any, Optional, Union, cast
 
@@ -10,6 +11,7 @@ from flask import Flask, current_app
 from sqlalchemy import Float, and_, or_, text
 from sqlalchemy import cast as sqlalchemy_cast
 
+from configs import dify_config
 from core.app.app_config.entities import (
     DatasetEntity,
     DatasetRetrieveConfigEntity,
@@ -41,6 +43,7 @@ from core.rag.entities.metadata_entities import Condition, MetadataCondition
 from core.rag.index_processor.constant.index_type import IndexType
 from core.rag.models.document import Document
 from core.rag.rerank.rerank_type import RerankMode
+from core.rag.rerank.scoring import calculate_tfidf_similarities
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
 from core.rag.retrieval.router.multi_dataset_function_call_router import FunctionCallMultiDatasetRouter
 from core.rag.retrieval.router.multi_dataset_react_route import ReactMultiDatasetRouter
@@ -60,6 +63,8 @@ from models.dataset import ChildChunk, Dataset, DatasetMetadata, DatasetQuery, D
 from models.dataset import Document as DatasetDocument
 from services.external_knowledge_service import ExternalDatasetService
 
+logger = logging.getLogger(__name__)
+
 default_retrieval_model: dict[str, Any] = {
     "search_method": RetrievalMethod.SEMANTIC_SEARCH.value,
     "reranking_enable": False,
@@ -68,6 +73,24 @@ default_retrieval_model: dict[str, Any] = {
     "score_threshold_enabled": False,
 }
 
+_retrieval_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_retrieval_executor_lock = threading.Lock()
+
+
+def _get_retrieval_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """
+    Get the executor shared by the multi-dataset retrievals of the process, which bounds the number of
+    datasets retrieved at once however many datasets an app is bound to.
+    """
+    global _retrieval_executor
+    if _retrieval_executor is None:
+        with _retrieval_executor_lock:
+            if _retrieval_executor is None:
+                _retrieval_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=dify_config.DATASET_RETRIEVAL_MAX_WORKERS, thread_name_prefix="dataset_retrieval"
+                )
+    return _retrieval_executor
+
 
 class DatasetRetrieval:
     def __init__(self, application_generate_entity=None):
@@ -420,7 +443,7 @@ class DatasetRetrieval:
     ):
         if not available_datasets:
             return []
-        threads = []
+        futures: dict[concurrent.futures.Future[list[Document]], str] = {}
         all_documents: list[Document] = []
         dataset_ids = [dataset.id for dataset in available_datasets]
         index_type_check = all(
@@ -466,22 +489,31 @@ class DatasetRetrieval:
                         document_ids_filter = document_ids
                     else:
                         continue
-            retrieval_thread = threading.Thread(
-                target=self._retriever,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset.id,
-                    "query": query,
-                    "top_k": top_k,
-                    "all_documents": all_documents,
-                    "document_ids_filter": document_ids_filter,
-                    "metadata_condition": metadata_condition,
-                },
-            )
-            threads.append(retrieval_thread)
-            retrieval_thread.start()
-        for thread in threads:
-            thread.join()
+            futures[
+                _get_retrieval_executor().submit(
+                    self._retrieve_dataset,
+                    flask_app=current_app._get_current_object(),  # type: ignore
+                    dataset_id=dataset.id,
+                    query=query,
+                    top_k=top_k,
+                    document_ids_filter=document_ids_filter,
+                    metadata_condition=metadata_condition,
+                )
+            ] = dataset.id
+
+        # datasets that did not answer in time are left out, instead of failing or delaying the whole retrieval
+        done, not_done = concurrent.futures.wait(futures, timeout=dify_config.DATASET_RETRIEVAL_TIMEOUT)
+        for future in not_done:
+            future.cancel()
+            logger.warning("Retrieval of dataset %s timed out", futures[future])
+        # gather in the order of the datasets, as the results of the retrieval threads did not have one
+        for future, dataset_id in futures.items():
+            if future not in done:
+                continue
+            try:
+                all_documents.extend(future.result())
+            except Exception:
+                logger.exception("Retrieval of dataset %s failed", dataset_id)
 
         with measure_time() as timer:
             if reranking_enable:
@@ -585,6 +617,27 @@ class DatasetRetrieval:
             db.session.add_all(dataset_queries)
         db.session.commit()
 
+    def _retrieve_dataset(
+        self,
+        flask_app: Flask,
+        dataset_id: str,
+        query: str,
+        top_k: int,
+        document_ids_filter: Optional[list[str]] = None,
+        metadata_condition: Optional[MetadataCondition] = None,
+    ) -> list[Document]:
+        documents: list[Document] = []
+        self._retriever(
+            flask_app=flask_app,
+            dataset_id=dataset_id,
+            query=query,
+            top_k=top_k,
+            all_documents=documents,
+            document_ids_filter=document_ids_filter,
+            metadata_condition=metadata_condition,
+        )
+        return documents
+
     def _retriever(
         self,
         flask_app: Flask,
@@ -765,65 +818,13 @@ class DatasetRetrieval:
         query_keywords = keyword_table_handler.extract_keywords(query, None)
         documents_keywords = []
         for document in documents:
+            # get the document keywords
+            document_keywords = keyword_table_handler.extract_keywords(document.page_content, None)
             if document.metadata is not None:
-                # get the document keywords
-                document_keywords = keyword_table_handler.extract_keywords(document.page_content, None)
                 document.metadata["keywords"] = document_keywords
-                documents_keywords.append(document_keywords)
-
-        # Counter query keywords(TF)
-        query_keyword_counts = Counter(query_keywords)
-
-        # total documents
-        total_documents = len(documents)
-
-        # calculate all documents' keywords IDF
-        all_keywords = set()
-        for document_keywords in documents_keywords:
-            all_keywords.update(document_keywords)
-
-        keyword_idf = {}
-        for keyword in all_keywords:
-            # calculate include query keywords' documents
-            doc_count_containing_keyword = sum(1 for doc_keywords in documents_keywords if keyword in doc_keywords)
-            # IDF
-            keyword_idf[keyword] = math.log((1 + total_documents) / (1 + doc_count_containing_keyword)) + 1
-
-        query_tfidf = {}
-
-        for keyword, count in query_keyword_counts.items():
-            tf = count
-            idf = keyword_idf.get(keyword, 0)
-            query_tfidf[keyword] = tf * idf
-
-        # calculate all documents' TF-IDF
-        documents_tfidf = []
-        for document_keywords in documents_keywords:
-            document_keyword_counts = Counter(document_keywords)
-            document_tfidf = {}
-            for keyword, count in document_keyword_counts.items():
-                tf = count
-                idf = keyword_idf.get(keyword, 0)
-                document_tfidf[keyword] = tf * idf
-            documents_tfidf.append(document_tfidf)
-
-        def cosine_similarity(vec1, vec2):
-            intersection = set(vec1.keys()) & set(vec2.keys())
-            numerator = sum(vec1[x] * vec2[x] for x in intersection)
-
-            sum1 = sum(vec1[x] ** 2 for x in vec1)
-            sum2 = sum(vec2[x] ** 2 for x in vec2)
-            denominator = math.sqrt(sum1) * math.sqrt(sum2)
-
-            if not denominator:
-                return 0.0
-            else:
-                return float(numerator) / denominator
+            documents_keywords.append(document_keywords)
 
-        similarities = []
-        for document_tfidf in documents_tfidf:
-            similarity = cosine_similarity(query_tfidf, document_tfidf)
-            similarities.append(similarity)
+        similarities = calculate_tfidf_similarities(query_keywords, documents_keywords)
 
         for document, score in zip(documents, similarities):
             # format document
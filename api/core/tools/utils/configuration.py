@@ -92,6 +92,8 @@ class ProviderConfigEncrypter(BaseModel):
         for credential in self.config:
             fields[credential.name] = credential
 
+        # the tenant's key is loaded once, for the first secret to decrypt
+        decoding = None
         for field_name, field in fields.items():
             if field.type == BasicProviderConfig.Type.SECRET_INPUT:
                 if field_name in data:
@@ -100,7 +102,9 @@ class ProviderConfigEncrypter(BaseModel):
                         if not data[field_name]:
                             continue
 
-                        data[field_name] = encrypter.decrypt_token(self.tenant_id, data[field_name])
+                        if decoding is None:
+                            decoding = encrypter.get_decrypt_decoding(self.tenant_id)
+                        data[field_name] = encrypter.decrypt_token_with_decoding(data[field_name], *decoding)
                     except Exception:
                         pass
 
@@ -236,6 +240,7 @@ class ToolParameterConfigurationManager:
         # override parameters
         current_parameters = self._merge_parameters()
         has_secret_input = False
+        decoding = None
 
         for parameter in current_parameters:
             if (
@@ -245,7 +250,11 @@ class ToolParameterConfigurationManager:
                 if parameter.name in parameters:
                     try:
                         has_secret_input = True
-                        parameters[parameter.name] = encrypter.decrypt_token(self.tenant_id, parameters[parameter.name])
+                        if decoding is None:
+                            decoding = encrypter.get_decrypt_decoding(self.tenant_id)
+                        parameters[parameter.name] = encrypter.decrypt_token_with_decoding(
+                            parameters[parameter.name], *decoding
+                        )
                     except Exception:
                         pass
 
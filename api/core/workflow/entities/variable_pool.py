@@ -1,12 +1,32 @@
+import json
 import re
+import sys
 from collections import defaultdict
 from collections.abc import Mapping, Sequence
+from functools import lru_cache
 from typing import Any, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_serializer, field_validator
 
 from core.file import File, FileAttribute, file_manager
-from core.variables import Segment, SegmentGroup, Variable
+from core.variables import (
+    ArrayAnyVariable,
+    ArrayFileVariable,
+    ArrayNumberVariable,
+    ArrayObjectVariable,
+    ArrayStringVariable,
+    FileVariable,
+    FloatVariable,
+    IntegerVariable,
+    NoneVariable,
+    ObjectVariable,
+    SecretVariable,
+    Segment,
+    SegmentGroup,
+    SegmentType,
+    StringVariable,
+    Variable,
+)
 from core.variables.segments import FileSegment, NoneSegment
 from factories import variable_factory
 
@@ -17,15 +37,127 @@ VariableValue = Union[str, int, float, dict, list, File]
 
 VARIABLE_PATTERN = re.compile(r"\{\{#([a-zA-Z0-9_]{1,50}(?:\.[a-zA-Z_][a-zA-Z0-9_]{0,29}){1,10})#\}\}")
 
+# maximum number of distinct templates whose parsed form is cached
+TEMPLATE_CACHE_MAX_SIZE = 4096
+
+# Python support `attr in FileAttribute` after 3.12
+_FILE_ATTRIBUTE_VALUES = frozenset(item.value for item in FileAttribute)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_MAX_SIZE)
+def _parse_template(template: str) -> tuple[tuple[str, tuple[str, ...] | None], ...]:
+    """
+    Split a template into its non-empty parts, each with the selector it is looked up by, if any.
+    Templates are static per workflow version, so the parsed form is cached by template text.
+    """
+    return tuple(
+        (part, tuple(part.split(".")) if "." in part else None) for part in VARIABLE_PATTERN.split(template) if part
+    )
+
+
+_SelectorKey = Union[str, tuple[str, ...]]
+
+
+def _selector_key(selector: Sequence[str]) -> _SelectorKey:
+    """
+    Key of a selector in its node's variables. The common two-element selector is keyed by its
+    variable name, so it needs no new object at all. Longer selectors are keyed by the tuple of
+    their elements after the node id, since elements may contain dots, e.g. keys of JSON outputs
+    of HTTP request or code nodes.
+    """
+    if len(selector) == 2:
+        return selector[1]
+    return tuple(selector[1:])
+
+
+def _dump_selector_key(key: _SelectorKey) -> str:
+    """
+    JSON object key of a selector key. Tuple keys are dumped as JSON arrays, and so are string keys
+    starting with a bracket, as one-element arrays, so that every dumped key loads back unchanged.
+    """
+    if isinstance(key, tuple):
+        return json.dumps(key)
+    if key.startswith("["):
+        return json.dumps([key])
+    return key
+
+
+def _load_selector_key(key: Any) -> Any:
+    """
+    Inverse of `_dump_selector_key`, keys that are not dumped keys are returned as is.
+    """
+    if not isinstance(key, str) or not key.startswith("["):
+        return key
+    elements = json.loads(key)
+    if len(elements) == 1:
+        return elements[0]
+    return tuple(elements)
+
+
+# variable classes by dumped value type, numbers are told apart by their value
+_VARIABLE_CLASSES: Mapping[SegmentType, type[Variable]] = {
+    SegmentType.STRING: StringVariable,
+    SegmentType.SECRET: SecretVariable,
+    SegmentType.OBJECT: ObjectVariable,
+    SegmentType.FILE: FileVariable,
+    SegmentType.NONE: NoneVariable,
+    SegmentType.ARRAY_ANY: ArrayAnyVariable,
+    SegmentType.ARRAY_STRING: ArrayStringVariable,
+    SegmentType.ARRAY_NUMBER: ArrayNumberVariable,
+    SegmentType.ARRAY_OBJECT: ArrayObjectVariable,
+    SegmentType.ARRAY_FILE: ArrayFileVariable,
+}
+
+
+def _load_variable(selector: Sequence[str], value: Any) -> Any:
+    """
+    Load a variable of a dumped variable dictionary. Only the segment fields of variables are dumped,
+    so the variable is named after its selector, like `VariablePool.add` does. Values that are not
+    dumped segments are returned as is.
+    """
+    if not isinstance(value, Mapping):
+        return value
+    variable_cls: type[Variable] | None
+    value_type = value.get("value_type")
+    if value_type == SegmentType.NUMBER:
+        variable_cls = FloatVariable if isinstance(value.get("value"), float) else IntegerVariable
+    else:
+        variable_cls = _VARIABLE_CLASSES.get(value_type)  # type: ignore[arg-type]
+    if variable_cls is None:
+        return value
+    return variable_cls.model_validate({**value, "name": selector[-1], "selector": selector})
+
+
+class _ForkedVariableDictionary(dict[str, dict[_SelectorKey, Segment]]):
+    """
+    Variable dictionary of a forked pool. Variables of a node are read from the parent pool until
+    the fork writes one of them, then the node's variables are copied into the fork (copy-on-write
+    per node), so writes of the fork never reach the parent.
+    """
+
+    def __init__(self, parent: Mapping[str, dict[_SelectorKey, Segment]]) -> None:
+        super().__init__()
+        self._parent = parent
+
+    def __missing__(self, node_id: str) -> dict[_SelectorKey, Segment]:
+        # item access is write access, see `VariablePool.add` and `VariablePool.remove`
+        node_variables = dict(self._parent.get(node_id) or {})
+        self[node_id] = node_variables
+        return node_variables
+
+    def get(self, node_id: str, default: Any = None) -> Any:  # type: ignore[override]
+        if node_id in self:
+            return dict.__getitem__(self, node_id)
+        return self._parent.get(node_id, default)
+
 
 class VariablePool(BaseModel):
     # Variable dictionary is a dictionary for looking up variables by their selector.
     # The first element of the selector is the node id, it's the first-level key in the dictionary.
-    # Other elements of the selector are the keys in the second-level dictionary. To get the key, we hash the
-    # elements of the selector except the first one.
-    variable_dictionary: dict[str, dict[int, Segment]] = Field(
+    # Other elements of the selector are the key of the second-level dictionary, see `_selector_key`.
+    variable_dictionary: dict[str, dict[_SelectorKey, Segment]] = Field(
         description="Variables mapping",
-        default=defaultdict(dict),
+        default_factory=lambda: defaultdict(dict),
     )
     # TODO: This user inputs is not used for pool.
     user_inputs: Mapping[str, Any] = Field(
@@ -74,6 +206,37 @@ class VariablePool(BaseModel):
         for var in self.conversation_variables:
             self.add((CONVERSATION_VARIABLE_NODE_ID, var.name), var)
 
+    @field_serializer("variable_dictionary")
+    def _dump_variable_dictionary(
+        self, variable_dictionary: Mapping[str, Mapping[_SelectorKey, Segment]]
+    ) -> dict[str, dict[str, Segment]]:
+        return {
+            node_id: {_dump_selector_key(key): variable for key, variable in node_variables.items()}
+            for node_id, node_variables in variable_dictionary.items()
+        }
+
+    @field_validator("variable_dictionary", mode="before")
+    @classmethod
+    def _load_variable_dictionary(cls, value: Any) -> Any:
+        if not isinstance(value, Mapping):
+            return value
+        variable_dictionary: dict[str, dict[_SelectorKey, Any]] = {}
+        for node_id, node_variables in value.items():
+            variable_dictionary[node_id] = {}
+            for dumped_key, variable in node_variables.items():
+                key = _load_selector_key(dumped_key)
+                selector = [node_id, *key] if isinstance(key, tuple) else [node_id, key]
+                variable_dictionary[node_id][key] = _load_variable(selector, variable)
+        return variable_dictionary
+
+    @field_validator("variable_dictionary", mode="after")
+    @classmethod
+    def _restore_default_factory(
+        cls, value: dict[str, dict[_SelectorKey, Segment]]
+    ) -> dict[str, dict[_SelectorKey, Segment]]:
+        # `add` relies on missing nodes being created on first write
+        return defaultdict(dict, value)
+
     def add(self, selector: Sequence[str], value: Any, /) -> None:
         """
         Adds a variable to the variable pool.
@@ -96,14 +259,16 @@ class VariablePool(BaseModel):
 
         if isinstance(value, Variable):
             variable = value
-        if isinstance(value, Segment):
+        elif isinstance(value, Segment):
             variable = variable_factory.segment_to_variable(segment=value, selector=selector)
         else:
             segment = variable_factory.build_segment(value)
             variable = variable_factory.segment_to_variable(segment=segment, selector=selector)
 
-        hash_key = hash(tuple(selector[1:]))
-        self.variable_dictionary[selector[0]][hash_key] = variable
+        key = _selector_key(selector)
+        if isinstance(key, str):
+            key = sys.intern(key)
+        self.variable_dictionary[selector[0]][key] = variable
 
     def get(self, selector: Sequence[str], /) -> Segment | None:
         """
@@ -121,13 +286,12 @@ class VariablePool(BaseModel):
         if len(selector) < 2:
             return None
 
-        hash_key = hash(tuple(selector[1:]))
-        value = self.variable_dictionary[selector[0]].get(hash_key)
+        node_variables = self.variable_dictionary.get(selector[0])
+        value = node_variables.get(_selector_key(selector)) if node_variables else None
 
         if value is None:
             selector, attr = selector[:-1], selector[-1]
-            # Python support `attr in FileAttribute` after 3.12
-            if attr not in {item.value for item in FileAttribute}:
+            if attr not in _FILE_ATTRIBUTE_VALUES:
                 return None
             value = self.get(selector)
             if not isinstance(value, FileSegment | NoneSegment):
@@ -155,19 +319,47 @@ class VariablePool(BaseModel):
         if len(selector) == 1:
             self.variable_dictionary[selector[0]] = {}
             return
-        hash_key = hash(tuple(selector[1:]))
-        self.variable_dictionary[selector[0]].pop(hash_key, None)
+        self.variable_dictionary[selector[0]].pop(_selector_key(selector), None)
+
+    def fork(self) -> "VariablePool":
+        """
+        Create a pool that reads the variables of this pool and keeps its own writes, to run a
+        sub-graph, like an item of a parallel iteration, on its own variables.
+
+        A fork costs what it writes instead of a deep copy of the whole pool: variables of a node are
+        only copied into the fork when it writes to the node. Variables themselves are shared, they are
+        replaced in the pool rather than changed in place. Forks are not meant to be serialized.
+        """
+        return VariablePool.model_construct(
+            variable_dictionary=_ForkedVariableDictionary(self.variable_dictionary),
+            user_inputs=self.user_inputs,
+            system_variables=self.system_variables,
+            environment_variables=self.environment_variables,
+            conversation_variables=self.conversation_variables,
+        )
 
     def convert_template(self, template: str, /):
-        parts = VARIABLE_PATTERN.split(template)
         segments = []
-        for part in filter(lambda x: x, parts):
-            if "." in part and (variable := self.get(part.split("."))):
+        for part, selector in _parse_template(template):
+            if selector and (variable := self.get(selector)):
                 segments.append(variable)
             else:
                 segments.append(variable_factory.build_segment(part))
         return SegmentGroup(value=segments)
 
+    def render_template(self, template: str, /) -> str:
+        """
+        Render a template to text, same as `convert_template(template).text` without
+        building a segment for every literal part.
+        """
+        texts = []
+        for part, selector in _parse_template(template):
+            if selector and (variable := self.get(selector)):
+                texts.append(variable.text)
+            else:
+                texts.append(part)
+        return "".join(texts)
+
     def get_file(self, selector: Sequence[str], /) -> FileSegment | None:
         segment = self.get(selector)
         if isinstance(segment, FileSegment):
@@ -1,9 +1,11 @@
+import threading
 import uuid
 from collections import defaultdict
 from collections.abc import Mapping
 from typing import Any, Optional, cast
 
-from pydantic import BaseModel, Field
+from cachetools import LRUCache
+from pydantic import BaseModel, Field, PrivateAttr
 
 from configs import dify_config
 from core.workflow.graph_engine.entities.run_condition import RunCondition
@@ -32,6 +34,11 @@ class GraphParallel(BaseModel):
     """end to node id"""
 
 
+# compiled graphs of workflow versions, see `Graph.get_or_init`
+_compiled_graphs: LRUCache = LRUCache(maxsize=dify_config.WORKFLOW_GRAPH_CACHE_MAX_SIZE)
+_compiled_graphs_lock = threading.Lock()
+
+
 class Graph(BaseModel):
     root_node_id: str = Field(..., description="root node id of the graph")
     node_ids: list[str] = Field(default_factory=list, description="graph node ids")
@@ -53,6 +60,47 @@ class Graph(BaseModel):
     answer_stream_generate_routes: AnswerStreamGenerateRoute = Field(..., description="answer stream generate routes")
     end_stream_param: EndStreamParam = Field(..., description="end stream param")
 
+    # sub-graphs of iteration and loop nodes, by root node id
+    _sub_graphs: dict[str, "Graph"] = PrivateAttr(default_factory=dict)
+
+    @classmethod
+    def get_or_init(
+        cls, graph_config: Mapping[str, Any], cache_key: tuple[str, str], root_node_id: Optional[str] = None
+    ) -> "Graph":
+        """
+        Get the compiled graph of a workflow version, init it on first use.
+        Compiled graphs are shared by all runs of the process and must not be changed.
+
+        :param graph_config: graph config
+        :param cache_key: workflow id and hash of the workflow graph the graph config was parsed from
+        :param root_node_id: root node id
+        :return: graph
+        """
+        key = (*cache_key, root_node_id)
+        with _compiled_graphs_lock:
+            graph = _compiled_graphs.get(key)
+        if graph is None:
+            # concurrent misses of the same workflow version may both init it, the last one is kept
+            graph = cls.init(graph_config=graph_config, root_node_id=root_node_id)
+            with _compiled_graphs_lock:
+                _compiled_graphs[key] = graph
+        return graph
+
+    def get_sub_graph(self, graph_config: Mapping[str, Any], root_node_id: str) -> "Graph":
+        """
+        Get the sub-graph of an iteration or loop node of this graph, init it on first use,
+        so nodes run many times (or by many runs of a cached graph) do not init it again.
+
+        :param graph_config: graph config this graph was initialized from
+        :param root_node_id: start node id of the iteration or loop
+        :return: graph
+        """
+        sub_graph = self._sub_graphs.get(root_node_id)
+        if sub_graph is None:
+            sub_graph = Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+            self._sub_graphs[root_node_id] = sub_graph
+        return sub_graph
+
     @classmethod
     def init(cls, graph_config: Mapping[str, Any], root_node_id: Optional[str] = None) -> "Graph":
         """
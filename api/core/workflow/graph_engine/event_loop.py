@@ -0,0 +1,70 @@
+import asyncio
+import contextvars
+import threading
+from collections.abc import Coroutine
+from concurrent.futures import Future
+from typing import Any, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class AwaitRequest:
+    """
+    Yielded by a generator driven on the workflow event loop, to have a coroutine awaited on the
+    loop instead of blocking the thread the generator runs in. The driver resumes the generator
+    once the coroutine is done, and the generator reads the outcome with `result()`.
+    """
+
+    def __init__(self, coroutine: Coroutine[Any, Any, Any]) -> None:
+        self._coroutine = coroutine
+        self._result: Any = None
+        self._exception: Optional[Exception] = None
+
+    async def resolve(self, context: contextvars.Context) -> None:
+        """
+        Await the coroutine as a task running in `context`, must be called on the event loop.
+        """
+        try:
+            self._result = await asyncio.get_running_loop().create_task(self._coroutine, context=context)
+        except Exception as e:
+            self._exception = e
+
+    def result(self) -> Any:
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+class WorkflowEventLoop:
+    """
+    Process-wide asyncio event loop running the parallel branches of workflow runs in async
+    execution mode, in a single daemon thread.
+    """
+
+    _instance: Optional["WorkflowEventLoop"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="workflow_event_loop", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def get_instance(cls) -> "WorkflowEventLoop":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, coroutine: Coroutine[Any, Any, T]) -> Future[T]:
+        """
+        Run a coroutine on the loop, from any thread.
+        :param coroutine: coroutine to run
+        :return: future of the coroutine result
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
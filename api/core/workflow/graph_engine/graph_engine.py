@@ -1,11 +1,13 @@
+import asyncio
 import contextvars
 import logging
 import queue
+import threading
 import time
 import uuid
-from collections.abc import Generator, Mapping
-from concurrent.futures import ThreadPoolExecutor, wait
-from copy import copy, deepcopy
+from collections.abc import Callable, Generator, Mapping
+from concurrent.futures import Future, wait
+from copy import copy
 from datetime import UTC, datetime
 from typing import Any, Optional, cast
 
@@ -42,6 +44,8 @@ from core.workflow.graph_engine.entities.graph import Graph, GraphEdge
 from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
 from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
 from core.workflow.graph_engine.entities.runtime_route_state import RouteNodeState
+from core.workflow.graph_engine.event_loop import AwaitRequest, WorkflowEventLoop
+from core.workflow.graph_engine.scheduler import GraphEngineScheduler
 from core.workflow.nodes import NodeType
 from core.workflow.nodes.agent.agent_node import AgentNode
 from core.workflow.nodes.agent.entities import AgentNodeData
@@ -59,27 +63,47 @@ from models.workflow import WorkflowType
 logger = logging.getLogger(__name__)
 
 
-class GraphEngineThreadPool(ThreadPoolExecutor):
+class GraphEngineThreadPool:
+    """
+    Per-run handle on the process-wide `GraphEngineScheduler`.
+
+    It owns no threads: it caps the number of running tasks of the run at `max_workers`
+    and the number of submitted but unfinished tasks at `max_submit_count`.
+    """
+
     def __init__(
         self,
-        max_workers=None,
-        thread_name_prefix="",
-        initializer=None,
-        initargs=(),
-        max_submit_count=dify_config.MAX_SUBMIT_COUNT,
+        tenant_id: str,
+        max_workers: int = 10,
+        max_submit_count: int = dify_config.MAX_SUBMIT_COUNT,
     ) -> None:
-        super().__init__(max_workers, thread_name_prefix, initializer, initargs)
+        self.tenant_id = tenant_id
+        self.max_workers = max_workers
         self.max_submit_count = max_submit_count
         self.submit_count = 0
+        self.group_id = str(uuid.uuid4())
+        self._lock = threading.Lock()
 
-    def submit(self, fn, /, *args, **kwargs):
-        self.submit_count += 1
-        self.check_is_full()
+    def submit(self, fn, /, **kwargs) -> Future:
+        with self._lock:
+            self.submit_count += 1
+            try:
+                self.check_is_full()
+            except ValueError:
+                self.submit_count -= 1
+                raise
 
-        return super().submit(fn, *args, **kwargs)
+        try:
+            return GraphEngineScheduler.get_instance().submit(
+                fn, tenant_id=self.tenant_id, group_id=self.group_id, max_running=self.max_workers, **kwargs
+            )
+        except ValueError:
+            self.task_done_callback(None)
+            raise
 
-    def task_done_callback(self, future):
-        self.submit_count -= 1
+    def task_done_callback(self, future) -> None:
+        with self._lock:
+            self.submit_count -= 1
 
     def check_is_full(self) -> None:
         if self.submit_count > self.max_submit_count:
@@ -119,12 +143,17 @@ class GraphEngine:
             self.is_main_thread_pool = False
         else:
             self.thread_pool = GraphEngineThreadPool(
-                max_workers=thread_pool_max_workers, max_submit_count=thread_pool_max_submit_count
+                tenant_id=tenant_id,
+                max_workers=thread_pool_max_workers,
+                max_submit_count=thread_pool_max_submit_count,
             )
             self.thread_pool_id = str(uuid.uuid4())
             self.is_main_thread_pool = True
             GraphEngine.workflow_thread_pool_mapping[self.thread_pool_id] = self.thread_pool
 
+        # graph engines of iteration and loop nodes run inside a node, they keep running their branches in threads
+        self.async_execution = dify_config.WORKFLOW_ASYNC_EXECUTION_ENABLED and self.is_main_thread_pool
+
         self.graph = graph
         self.init_params = GraphInitParams(
             tenant_id=tenant_id,
@@ -159,9 +188,12 @@ class GraphEngine:
                     graph=self.graph, variable_pool=self.graph_runtime_state.variable_pool
                 )
 
-            # run graph
+            # run graph, only parallel branches hand awaitables to the event loop, never the main chain
             generator = stream_processor.process(
-                self._run(start_node_id=self.graph.root_node_id, handle_exceptions=handle_exceptions)
+                cast(
+                    Generator[GraphEngineEvent, None, None],
+                    self._run(start_node_id=self.graph.root_node_id, handle_exceptions=handle_exceptions),
+                )
             )
             for item in generator:
                 try:
@@ -228,7 +260,7 @@ class GraphEngine:
         parent_parallel_id: Optional[str] = None,
         parent_parallel_start_node_id: Optional[str] = None,
         handle_exceptions: list[str] = [],
-    ) -> Generator[GraphEngineEvent, None, None]:
+    ) -> Generator[GraphEngineEvent | AwaitRequest, None, None]:
         parallel_start_node_id = None
         if in_parallel_id:
             parallel_start_node_id = start_node_id
@@ -273,6 +305,7 @@ class GraphEngine:
                 thread_pool_id=self.thread_pool_id,
             )
             node_instance = cast(BaseNode[BaseNodeData], node_instance)
+            node_instance.await_io_on_event_loop = self.async_execution and in_parallel_id is not None
             try:
                 # run node
                 generator = self._run_node(
@@ -443,7 +476,7 @@ class GraphEngine:
         in_parallel_id: Optional[str] = None,
         parallel_start_node_id: Optional[str] = None,
         handle_exceptions: list[str] = [],
-    ) -> Generator[GraphEngineEvent | str, None, None]:
+    ) -> Generator[GraphEngineEvent | AwaitRequest | str, None, None]:
         # if nodes has no run conditions, parallel run all nodes
         parallel_id = self.graph.node_parallel_mapping.get(edge_mappings[0].target_node_id)
         if not parallel_id:
@@ -463,6 +496,18 @@ class GraphEngine:
         if not parallel:
             raise GraphRunFailedError(f"Parallel {parallel_id} not found.")
 
+        if self.async_execution:
+            yield from self._run_parallel_branches_on_event_loop(
+                edge_mappings=edge_mappings,
+                parallel_id=parallel_id,
+                in_parallel_id=in_parallel_id,
+                parallel_start_node_id=parallel_start_node_id,
+                handle_exceptions=handle_exceptions,
+            )
+            if parallel.end_to_node_id:
+                yield parallel.end_to_node_id
+            return
+
         # run parallel nodes, run in new thread and use queue to get results
         q: queue.Queue = queue.Queue()
 
@@ -523,6 +568,118 @@ class GraphEngine:
         if final_node_id:
             yield final_node_id
 
+    def _run_parallel_branches_on_event_loop(
+        self,
+        edge_mappings: list[GraphEdge],
+        parallel_id: str,
+        in_parallel_id: Optional[str] = None,
+        parallel_start_node_id: Optional[str] = None,
+        handle_exceptions: list[str] = [],
+    ) -> Generator[GraphEngineEvent | AwaitRequest, None, None]:
+        """
+        Run parallel branches as tasks on the workflow event loop
+        """
+        branch_kwargs = [
+            {
+                "flask_app": current_app._get_current_object(),  # type: ignore[attr-defined]
+                "context": contextvars.copy_context(),
+                "parallel_id": parallel_id,
+                "parallel_start_node_id": edge.target_node_id,
+                "parent_parallel_id": in_parallel_id,
+                "parent_parallel_start_node_id": parallel_start_node_id,
+                "handle_exceptions": handle_exceptions,
+            }
+            for edge in edge_mappings
+            if self.graph.node_parallel_mapping.get(edge.target_node_id, "") == parallel_id
+        ]
+
+        event_loop = WorkflowEventLoop.get_instance()
+        if in_parallel_id:
+            # nested parallel, this generator is itself driven by the event loop, so wait for events there
+            events: asyncio.Queue = asyncio.Queue()
+            future = event_loop.submit(self._arun_parallel_branches(events.put_nowait, branch_kwargs))
+        else:
+            q: queue.Queue = queue.Queue()
+            future = event_loop.submit(self._arun_parallel_branches(q.put, branch_kwargs))
+
+        succeeded_count = 0
+        while succeeded_count < len(branch_kwargs):
+            if in_parallel_id:
+                request = AwaitRequest(events.get())
+                yield request
+                event = request.result()
+            else:
+                event = q.get()
+
+            yield event
+            if not isinstance(event, BaseAgentEvent) and event.parallel_id == parallel_id:
+                if isinstance(event, ParallelBranchRunSucceededEvent):
+                    succeeded_count += 1
+                elif isinstance(event, ParallelBranchRunFailedEvent):
+                    raise GraphRunFailedError(event.error)
+
+        future.result()
+
+    async def _arun_parallel_branches(
+        self, put_event: Callable[[GraphEngineEvent], None], branch_kwargs: list[dict[str, Any]]
+    ) -> None:
+        await asyncio.gather(*(self._arun_parallel_node(put_event, **kwargs) for kwargs in branch_kwargs))
+
+    async def _arun_parallel_node(
+        self,
+        put_event: Callable[[GraphEngineEvent], None],
+        flask_app: Flask,
+        context: contextvars.Context,
+        parallel_id: str,
+        parallel_start_node_id: str,
+        parent_parallel_id: Optional[str] = None,
+        parent_parallel_start_node_id: Optional[str] = None,
+        handle_exceptions: list[str] = [],
+    ) -> None:
+        """
+        Drive a parallel branch on the event loop, the synchronous steps of the branch run in
+        scheduler threads and the awaitables it yields are awaited on the loop without holding a thread
+        """
+        generator = context.run(
+            self._iter_parallel_node,
+            flask_app=flask_app,
+            parallel_id=parallel_id,
+            parallel_start_node_id=parallel_start_node_id,
+            parent_parallel_id=parent_parallel_id,
+            parent_parallel_start_node_id=parent_parallel_start_node_id,
+            handle_exceptions=handle_exceptions,
+        )
+        try:
+            while True:
+                future = self.thread_pool.submit(self._next_in_context, context=context, generator=generator)
+                future.add_done_callback(self.thread_pool.task_done_callback)
+                item = await asyncio.wrap_future(future)
+                if item is None:
+                    return
+
+                if isinstance(item, AwaitRequest):
+                    await item.resolve(context.copy())
+                else:
+                    put_event(item)
+        except Exception as e:
+            logger.exception("Unknown Error when driving parallel branch on event loop")
+            put_event(
+                ParallelBranchRunFailedEvent(
+                    parallel_id=parallel_id,
+                    parallel_start_node_id=parallel_start_node_id,
+                    parent_parallel_id=parent_parallel_id,
+                    parent_parallel_start_node_id=parent_parallel_start_node_id,
+                    error=str(e),
+                )
+            )
+            context.run(generator.close)
+
+    @staticmethod
+    def _next_in_context(
+        context: contextvars.Context, generator: Generator[GraphEngineEvent | AwaitRequest, None, None]
+    ) -> Optional[GraphEngineEvent | AwaitRequest]:
+        return context.run(next, generator, None)
+
     def _run_parallel_node(
         self,
         flask_app: Flask,
@@ -540,6 +697,28 @@ class GraphEngine:
         for var, val in context.items():
             var.set(val)
 
+        for item in self._iter_parallel_node(
+            flask_app=flask_app,
+            parallel_id=parallel_id,
+            parallel_start_node_id=parallel_start_node_id,
+            parent_parallel_id=parent_parallel_id,
+            parent_parallel_start_node_id=parent_parallel_start_node_id,
+            handle_exceptions=handle_exceptions,
+        ):
+            q.put(item)
+
+    def _iter_parallel_node(
+        self,
+        flask_app: Flask,
+        parallel_id: str,
+        parallel_start_node_id: str,
+        parent_parallel_id: Optional[str] = None,
+        parent_parallel_start_node_id: Optional[str] = None,
+        handle_exceptions: list[str] = [],
+    ) -> Generator[GraphEngineEvent | AwaitRequest, None, None]:
+        """
+        Run a parallel branch, wrapped in its branch started and succeeded or failed events
+        """
         # FIXME(-LAN-): Save current user before entering new app context
         from flask import g
 
@@ -555,13 +734,11 @@ class GraphEngine:
 
                     g._login_user = saved_user
 
-                q.put(
-                    ParallelBranchRunStartedEvent(
-                        parallel_id=parallel_id,
-                        parallel_start_node_id=parallel_start_node_id,
-                        parent_parallel_id=parent_parallel_id,
-                        parent_parallel_start_node_id=parent_parallel_start_node_id,
-                    )
+                yield ParallelBranchRunStartedEvent(
+                    parallel_id=parallel_id,
+                    parallel_start_node_id=parallel_start_node_id,
+                    parent_parallel_id=parent_parallel_id,
+                    parent_parallel_start_node_id=parent_parallel_start_node_id,
                 )
 
                 # run node
@@ -573,38 +750,31 @@ class GraphEngine:
                     handle_exceptions=handle_exceptions,
                 )
 
-                for item in generator:
-                    q.put(item)
+                yield from generator
 
                 # trigger graph run success event
-                q.put(
-                    ParallelBranchRunSucceededEvent(
-                        parallel_id=parallel_id,
-                        parallel_start_node_id=parallel_start_node_id,
-                        parent_parallel_id=parent_parallel_id,
-                        parent_parallel_start_node_id=parent_parallel_start_node_id,
-                    )
+                yield ParallelBranchRunSucceededEvent(
+                    parallel_id=parallel_id,
+                    parallel_start_node_id=parallel_start_node_id,
+                    parent_parallel_id=parent_parallel_id,
+                    parent_parallel_start_node_id=parent_parallel_start_node_id,
                 )
             except GraphRunFailedError as e:
-                q.put(
-                    ParallelBranchRunFailedEvent(
-                        parallel_id=parallel_id,
-                        parallel_start_node_id=parallel_start_node_id,
-                        parent_parallel_id=parent_parallel_id,
-                        parent_parallel_start_node_id=parent_parallel_start_node_id,
-                        error=e.error,
-                    )
+                yield ParallelBranchRunFailedEvent(
+                    parallel_id=parallel_id,
+                    parallel_start_node_id=parallel_start_node_id,
+                    parent_parallel_id=parent_parallel_id,
+                    parent_parallel_start_node_id=parent_parallel_start_node_id,
+                    error=e.error,
                 )
             except Exception as e:
                 logger.exception("Unknown Error when generating in parallel")
-                q.put(
-                    ParallelBranchRunFailedEvent(
-                        parallel_id=parallel_id,
-                        parallel_start_node_id=parallel_start_node_id,
-                        parent_parallel_id=parent_parallel_id,
-                        parent_parallel_start_node_id=parent_parallel_start_node_id,
-                        error=str(e),
-                    )
+                yield ParallelBranchRunFailedEvent(
+                    parallel_id=parallel_id,
+                    parallel_start_node_id=parallel_start_node_id,
+                    parent_parallel_id=parent_parallel_id,
+                    parent_parallel_start_node_id=parent_parallel_start_node_id,
+                    error=str(e),
                 )
 
     def _run_node(
@@ -616,7 +786,7 @@ class GraphEngine:
         parent_parallel_id: Optional[str] = None,
         parent_parallel_start_node_id: Optional[str] = None,
         handle_exceptions: list[str] = [],
-    ) -> Generator[GraphEngineEvent, None, None]:
+    ) -> Generator[GraphEngineEvent | AwaitRequest, None, None]:
         """
         Run node
         """
@@ -655,6 +825,11 @@ class GraphEngine:
                 time.sleep(0.001)
                 generator = node_instance.run()
                 for item in generator:
+                    if isinstance(item, AwaitRequest):
+                        # hand the awaitable up to the branch driver on the event loop
+                        yield item
+                        continue
+
                     if isinstance(item, GraphEngineEvent):
                         if isinstance(item, BaseIterationEvent):
                             # add parallel info to iteration event
@@ -699,7 +874,10 @@ class GraphEngine:
                                         retry_index=retries,
                                         start_at=retry_start_at,
                                     )
-                                    time.sleep(retry_interval)
+                                    if node_instance.await_io_on_event_loop:
+                                        yield AwaitRequest(asyncio.sleep(retry_interval))
+                                    else:
+                                        time.sleep(retry_interval)
                                     break
                             route_node_state.set_finished(run_result=run_result)
 
@@ -891,11 +1069,11 @@ class GraphEngine:
     def create_copy(self):
         """
         create a graph engine copy
-        :return: graph engine with a new variable pool and initialized total tokens
+        :return: graph engine with a fork of the variable pool and initialized total tokens
         """
         new_instance = copy(self)
         new_instance.graph_runtime_state = copy(self.graph_runtime_state)
-        new_instance.graph_runtime_state.variable_pool = deepcopy(self.graph_runtime_state.variable_pool)
+        new_instance.graph_runtime_state.variable_pool = self.graph_runtime_state.variable_pool.fork()
         new_instance.graph_runtime_state.total_tokens = 0
         return new_instance
 
@@ -0,0 +1,188 @@
+import logging
+import threading
+from collections import Counter, OrderedDict, deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+
+class GraphEngineSchedulerSaturatedError(ValueError):
+    """Raised when the process-wide graph engine scheduler cannot accept more queued tasks."""
+
+
+@dataclass
+class _ScheduledTask:
+    fn: Callable[..., Any]
+    kwargs: dict[str, Any]
+    tenant_id: str
+    group_id: str
+    max_running: int
+    future: Future = field(default_factory=Future)
+
+
+_worker_context = threading.local()
+
+
+class GraphEngineScheduler:
+    """
+    Process-wide, size-bounded executor for parallel branches and parallel iterations
+    of all workflow runs.
+
+    Tasks are dispatched round-robin across tenants, and each tenant and each task group
+    (a workflow run or a parallel iteration) is capped at a number of running tasks.
+    Tasks submitted from a scheduler worker that cannot start right away run inline in
+    the submitting thread, so a branch waiting on nested branches can never starve the
+    pool. Tasks submitted from any other thread wait in a bounded queue, and submitting
+    to a full queue raises `GraphEngineSchedulerSaturatedError`.
+    """
+
+    _instance: Optional["GraphEngineScheduler"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_workers: int, max_workers_per_tenant: int, max_queue_size: int) -> None:
+        self.max_workers = max_workers
+        self.max_workers_per_tenant = max_workers_per_tenant
+        self.max_queue_size = max_queue_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="graph_engine")
+        self._lock = threading.Lock()
+        # pending tasks by tenant, rotated to dispatch tenants round-robin
+        self._pending: OrderedDict[str, deque[_ScheduledTask]] = OrderedDict()
+        self._queued_count = 0
+        self._running_count = 0
+        self._running_by_tenant: Counter[str] = Counter()
+        self._running_by_group: Counter[str] = Counter()
+        self._inline_count = 0
+        self._rejected_count = 0
+
+    @classmethod
+    def get_instance(cls) -> "GraphEngineScheduler":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        max_workers=dify_config.WORKFLOW_SCHEDULER_MAX_WORKERS,
+                        max_workers_per_tenant=dify_config.WORKFLOW_SCHEDULER_MAX_WORKERS_PER_TENANT,
+                        max_queue_size=dify_config.WORKFLOW_SCHEDULER_MAX_QUEUE_SIZE,
+                    )
+        return cls._instance
+
+    def submit(
+        self, fn: Callable[..., Any], /, *, tenant_id: str, group_id: str, max_running: int, **kwargs: Any
+    ) -> Future:
+        """
+        Schedule `fn(**kwargs)`.
+        :param tenant_id: tenant the task is accounted to
+        :param group_id: task group the task is accounted to, e.g. a workflow run
+        :param max_running: maximum number of running tasks of the group
+        :return: future of the task result
+        """
+        task = _ScheduledTask(fn=fn, kwargs=kwargs, tenant_id=tenant_id, group_id=group_id, max_running=max_running)
+        with self._lock:
+            if self._can_start(task):
+                self._start(task)
+                return task.future
+
+            if getattr(_worker_context, "active", False):
+                # caller-runs: a worker must not wait on a task queued behind other waiting workers
+                self._inline_count += 1
+                run_inline = True
+            elif self._queued_count >= self.max_queue_size:
+                self._rejected_count += 1
+                raise GraphEngineSchedulerSaturatedError(
+                    f"Workflow scheduler is saturated: {self._running_count} running"
+                    f" and {self._queued_count} queued tasks."
+                )
+            else:
+                self._pending.setdefault(tenant_id, deque()).append(task)
+                self._queued_count += 1
+                run_inline = False
+
+        if run_inline:
+            self._run_task(task)
+        return task.future
+
+    def stats(self) -> dict[str, Any]:
+        """Return queue-depth and saturation metrics of the scheduler."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": self._running_count,
+                "queued": self._queued_count,
+                "inline": self._inline_count,
+                "rejected": self._rejected_count,
+                "running_by_tenant": dict(self._running_by_tenant),
+            }
+
+    def _can_start(self, task: _ScheduledTask) -> bool:
+        return (
+            self._running_count < self.max_workers
+            and self._running_by_tenant[task.tenant_id] < self.max_workers_per_tenant
+            and self._running_by_group[task.group_id] < task.max_running
+        )
+
+    def _start(self, task: _ScheduledTask) -> None:
+        self._running_count += 1
+        self._running_by_tenant[task.tenant_id] += 1
+        self._running_by_group[task.group_id] += 1
+        self._executor.submit(self._run_worker_task, task)
+
+    def _run_worker_task(self, task: _ScheduledTask) -> None:
+        _worker_context.active = True
+        self._run_task(task, on_finished=lambda: self._release(task))
+
+    def _release(self, task: _ScheduledTask) -> None:
+        with self._lock:
+            self._running_count -= 1
+            self._decrement(self._running_by_tenant, task.tenant_id)
+            self._decrement(self._running_by_group, task.group_id)
+            self._dispatch()
+
+    @staticmethod
+    def _run_task(task: _ScheduledTask, on_finished: Optional[Callable[[], None]] = None) -> None:
+        """
+        Run the task and resolve its future. `on_finished` is called before the future is resolved,
+        so a task submitted from a callback of the future can take the slot of the finished one.
+        """
+        run = task.future.set_running_or_notify_cancel()
+        result: Any = None
+        error: Optional[BaseException] = None
+        if run:
+            try:
+                result = task.fn(**task.kwargs)
+            except BaseException as e:
+                error = e
+        if on_finished:
+            on_finished()
+        if not run:
+            return
+        if error is not None:
+            task.future.set_exception(error)
+        else:
+            task.future.set_result(result)
+
+    def _dispatch(self) -> None:
+        """Start pending tasks round-robin across tenants, must be called with the lock held."""
+        for _ in range(len(self._pending)):
+            if self._running_count >= self.max_workers:
+                return
+            tenant_id, tasks = next(iter(self._pending.items()))
+            self._pending.move_to_end(tenant_id)
+            for task in tasks:
+                if self._can_start(task):
+                    tasks.remove(task)
+                    self._queued_count -= 1
+                    self._start(task)
+                    break
+            if not tasks:
+                del self._pending[tenant_id]
+
+    @staticmethod
+    def _decrement(counter: Counter[str], key: str) -> None:
+        counter[key] -= 1
+        if counter[key] <= 0:
+            del counter[key]
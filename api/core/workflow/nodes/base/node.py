@@ -15,6 +15,7 @@ if TYPE_CHECKING:
     from core.workflow.graph_engine.entities.graph import Graph
     from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
     from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
+    from core.workflow.graph_engine.event_loop import AwaitRequest
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +50,9 @@ class BaseNode(Generic[GenericNodeData]):
         self.graph_runtime_state = graph_runtime_state
         self.previous_node_id = previous_node_id
         self.thread_pool_id = thread_pool_id
+        # set by the graph engine when the node runs in a parallel branch on the workflow event loop, the node
+        # may then yield an `AwaitRequest` for its network I/O instead of blocking the thread it runs in
+        self.await_io_on_event_loop = False
 
         node_id = config.get("id")
         if not node_id:
@@ -60,14 +64,14 @@ class BaseNode(Generic[GenericNodeData]):
         self.node_data = node_data
 
     @abstractmethod
-    def _run(self) -> NodeRunResult | Generator[Union[NodeEvent, "InNodeEvent"], None, None]:
+    def _run(self) -> NodeRunResult | Generator[Union[NodeEvent, "InNodeEvent", "AwaitRequest"], None, None]:
         """
         Run node
         :return:
         """
         raise NotImplementedError
 
-    def run(self) -> Generator[Union[NodeEvent, "InNodeEvent"], None, None]:
+    def run(self) -> Generator[Union[NodeEvent, "InNodeEvent", "AwaitRequest"], None, None]:
         try:
             result = self._run()
         except Exception as e:
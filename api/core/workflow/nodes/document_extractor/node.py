@@ -5,6 +5,7 @@ import logging
 import os
 import tempfile
 from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, cast
 
 import chardet
@@ -23,6 +24,7 @@ from docx.text.paragraph import Paragraph
 from configs import dify_config
 from core.file import File, FileTransferMethod, file_manager
 from core.helper import ssrf_proxy
+from core.helper.extraction_cache import ExtractionCache
 from core.variables import ArrayFileSegment
 from core.variables.segments import FileSegment
 from core.workflow.entities.node_entities import NodeRunResult
@@ -62,7 +64,7 @@ class DocumentExtractorNode(BaseNode[DocumentExtractorNodeData]):
 
         try:
             if isinstance(value, list):
-                extracted_text_list = list(map(_extract_text_from_file, value))
+                extracted_text_list = _extract_text_from_files(value)
                 return NodeRunResult(
                     status=WorkflowNodeExecutionStatus.SUCCEEDED,
                     inputs=inputs,
@@ -245,13 +247,13 @@ def _extract_text_from_pdf(file_content: bytes) -> str:
     try:
         pdf_file = io.BytesIO(file_content)
         pdf_document = pypdfium2.PdfDocument(pdf_file, autoclose=True)
-        text = ""
+        page_texts = []
         for page in pdf_document:
             text_page = page.get_textpage()
-            text += text_page.get_text_range()
+            page_texts.append(text_page.get_text_range())
             text_page.close()
             page.close()
-        return text
+        return "".join(page_texts)
     except Exception as e:
         raise TextExtractionError(f"Failed to extract text from PDF: {str(e)}") from e
 
@@ -364,14 +366,38 @@ def _download_file_content(file: File) -> bytes:
         raise FileDownloadError(f"Error downloading file: {str(e)}") from e
 
 
+def _extract_text_from_files(files: Sequence[File]) -> list[str]:
+    """Extract text from files, concurrently when there are several of them."""
+    if len(files) <= 1:
+        return list(map(_extract_text_from_file, files))
+
+    max_workers = min(len(files), dify_config.DOCUMENT_EXTRACTOR_MAX_WORKERS)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="document_extractor") as executor:
+        return list(executor.map(_extract_text_from_file, files))
+
+
 def _extract_text_from_file(file: File):
     file_content = _download_file_content(file)
     if file.extension:
-        extracted_text = _extract_text_by_file_extension(file_content=file_content, file_extension=file.extension)
+        file_type = file.extension
     elif file.mime_type:
-        extracted_text = _extract_text_by_mime_type(file_content=file_content, mime_type=file.mime_type)
+        file_type = file.mime_type
     else:
         raise UnsupportedFileTypeError("Unable to determine file type: MIME type or file extension is missing")
+
+    # the same file is extracted on every run of a workflow, so extracted texts are cached by file content
+    cache = ExtractionCache(
+        namespace=f"document_extractor:{file_type}", content_hash=ExtractionCache.hash_content(file_content)
+    )
+    cached_text = cache.get()
+    if isinstance(cached_text, str):
+        return cached_text
+
+    if file.extension:
+        extracted_text = _extract_text_by_file_extension(file_content=file_content, file_extension=file.extension)
+    else:
+        extracted_text = _extract_text_by_mime_type(file_content=file_content, mime_type=file_type)
+    cache.set(extracted_text)
     return extracted_text
 
 
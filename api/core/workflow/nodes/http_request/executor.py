@@ -81,9 +81,9 @@ class Executor:
         if node_data.authorization.type == "api-key":
             if node_data.authorization.config is None:
                 raise AuthorizationConfigError("authorization config is required")
-            node_data.authorization.config.api_key = variable_pool.convert_template(
+            node_data.authorization.config.api_key = variable_pool.render_template(
                 node_data.authorization.config.api_key
-            ).text
+            )
 
         self.url: str = node_data.url
         self.method = node_data.method
@@ -110,7 +110,7 @@ class Executor:
         self._init_body()
 
     def _init_url(self):
-        self.url = self.variable_pool.convert_template(self.node_data.url).text
+        self.url = self.variable_pool.render_template(self.node_data.url)
 
         # check if url is a valid URL
         if not self.url:
@@ -134,9 +134,7 @@ class Executor:
                 continue
 
             value_str = value[0].strip() if value else ""
-            result.append(
-                (self.variable_pool.convert_template(key).text, self.variable_pool.convert_template(value_str).text)
-            )
+            result.append((self.variable_pool.render_template(key), self.variable_pool.render_template(value_str)))
 
         self.params = result
 
@@ -154,7 +152,7 @@ class Executor:
             'aa\n cc : dd'   -> {'aa': '', 'cc': 'dd'}
 
         """
-        headers = self.variable_pool.convert_template(self.node_data.headers).text
+        headers = self.variable_pool.render_template(self.node_data.headers)
         self.headers = {
             key.strip(): (value[0].strip() if value else "")
             for line in headers.splitlines()
@@ -172,11 +170,11 @@ class Executor:
                 case "raw-text":
                     if len(data) != 1:
                         raise RequestBodyError("raw-text body type should have exactly one item")
-                    self.content = self.variable_pool.convert_template(data[0].value).text
+                    self.content = self.variable_pool.render_template(data[0].value)
                 case "json":
                     if len(data) != 1:
                         raise RequestBodyError("json body type should have exactly one item")
-                    json_string = self.variable_pool.convert_template(data[0].value).text
+                    json_string = self.variable_pool.render_template(data[0].value)
                     try:
                         json_object = json.loads(json_string, strict=False)
                     except json.JSONDecodeError as e:
@@ -194,21 +192,17 @@ class Executor:
                     self.content = file_manager.download(file)
                 case "x-www-form-urlencoded":
                     form_data = {
-                        self.variable_pool.convert_template(item.key).text: self.variable_pool.convert_template(
-                            item.value
-                        ).text
+                        self.variable_pool.render_template(item.key): self.variable_pool.render_template(item.value)
                         for item in data
                     }
                     self.data = form_data
                 case "form-data":
                     form_data = {
-                        self.variable_pool.convert_template(item.key).text: self.variable_pool.convert_template(
-                            item.value
-                        ).text
+                        self.variable_pool.render_template(item.key): self.variable_pool.render_template(item.value)
                         for item in filter(lambda item: item.type == "text", data)
                     }
                     file_selectors = {
-                        self.variable_pool.convert_template(item.key).text: item.file
+                        self.variable_pool.render_template(item.key): item.file
                         for item in filter(lambda item: item.type == "file", data)
                     }
 
@@ -294,10 +288,7 @@ class Executor:
 
         return executor_response
 
-    def _do_http_request(self, headers: dict[str, Any]) -> httpx.Response:
-        """
-        do http request depending on api bundle
-        """
+    def _build_request_args(self, headers: dict[str, Any]) -> dict[str, Any]:
         if self.method not in {
             "get",
             "head",
@@ -316,7 +307,7 @@ class Executor:
         }:
             raise InvalidHttpMethodError(f"Invalid http method {self.method}")
 
-        request_args = {
+        return {
             "url": self.url,
             "data": self.data,
             "files": self.files,
@@ -329,7 +320,12 @@ class Executor:
             "follow_redirects": True,
             "max_retries": self.max_retries,
         }
-        # request_args = {k: v for k, v in request_args.items() if v is not None}
+
+    def _do_http_request(self, headers: dict[str, Any]) -> httpx.Response:
+        """
+        do http request depending on api bundle
+        """
+        request_args = self._build_request_args(headers)
         try:
             response = getattr(ssrf_proxy, self.method.lower())(**request_args)
         except (ssrf_proxy.MaxRetriesExceededError, httpx.RequestError) as e:
@@ -345,6 +341,22 @@ class Executor:
         # validate response
         return self._validate_and_parse_response(response)
 
+    async def _ado_http_request(self, headers: dict[str, Any]) -> httpx.Response:
+        request_args = self._build_request_args(headers)
+        try:
+            response = await ssrf_proxy.amake_request(self.method.upper(), **request_args)
+        except (ssrf_proxy.MaxRetriesExceededError, httpx.RequestError) as e:
+            raise HttpRequestNodeError(str(e))
+        return response
+
+    async def ainvoke(self) -> Response:
+        """
+        Async variant of `invoke`, the request does not block a thread while waiting on the remote server.
+        """
+        headers = self._assembling_headers()
+        response = await self._ado_http_request(headers)
+        return self._validate_and_parse_response(response)
+
     def to_log(self):
         url_parts = urlparse(self.url)
         path = url_parts.path or "/"
@@ -1,6 +1,6 @@
 import logging
 import mimetypes
-from collections.abc import Mapping, Sequence
+from collections.abc import Generator, Mapping, Sequence
 from typing import Any, Optional
 
 from configs import dify_config
@@ -9,8 +9,10 @@ from core.tools.tool_file_manager import ToolFileManager
 from core.workflow.entities.node_entities import NodeRunResult
 from core.workflow.entities.variable_entities import VariableSelector
 from core.workflow.entities.workflow_node_execution import WorkflowNodeExecutionStatus
+from core.workflow.graph_engine.event_loop import AwaitRequest
 from core.workflow.nodes.base import BaseNode
 from core.workflow.nodes.enums import NodeType
+from core.workflow.nodes.event import NodeEvent, RunCompletedEvent
 from core.workflow.nodes.http_request.executor import Executor
 from core.workflow.utils import variable_template_parser
 from factories import file_factory
@@ -60,36 +62,71 @@ class HttpRequestNode(BaseNode[HttpRequestNodeData]):
             },
         }
 
-    def _run(self) -> NodeRunResult:
+    def _run(self) -> NodeRunResult | Generator[NodeEvent | AwaitRequest, None, None]:
+        if self.await_io_on_event_loop:
+            return self._run_awaiting_request()
+
         process_data = {}
         try:
-            http_executor = Executor(
-                node_data=self.node_data,
-                timeout=self._get_request_timeout(self.node_data),
-                variable_pool=self.graph_runtime_state.variable_pool,
-                max_retries=0,
-            )
+            http_executor = self._create_executor()
             process_data["request"] = http_executor.to_log()
 
             response = http_executor.invoke()
-            files = self.extract_files(url=http_executor.url, response=response)
-            if not response.response.is_success and (self.should_continue_on_error or self.should_retry):
-                return NodeRunResult(
-                    status=WorkflowNodeExecutionStatus.FAILED,
-                    outputs={
-                        "status_code": response.status_code,
-                        "body": response.text if not files else "",
-                        "headers": response.headers,
-                        "files": files,
-                    },
-                    process_data={
-                        "request": http_executor.to_log(),
-                    },
-                    error=f"Request failed with status code {response.status_code}",
-                    error_type="HTTPResponseCodeError",
-                )
+            return self._build_run_result(http_executor, response)
+        except HttpRequestNodeError as e:
+            logger.warning(f"http request node {self.node_id} failed to run: {e}")
+            return NodeRunResult(
+                status=WorkflowNodeExecutionStatus.FAILED,
+                error=str(e),
+                process_data=process_data,
+                error_type=type(e).__name__,
+            )
+
+    def _run_awaiting_request(self) -> Generator[NodeEvent | AwaitRequest, None, None]:
+        """
+        Same as the synchronous run, but the request is awaited on the workflow event loop, so the node
+        does not hold a thread while it waits on the remote server.
+        """
+        process_data = {}
+        try:
+            http_executor = self._create_executor()
+            process_data["request"] = http_executor.to_log()
+
+            request = AwaitRequest(http_executor.ainvoke())
+            yield request
+            response = request.result()
+            run_result = self._build_run_result(http_executor, response)
+        except HttpRequestNodeError as e:
+            logger.warning(f"http request node {self.node_id} failed to run: {e}")
+            run_result = NodeRunResult(
+                status=WorkflowNodeExecutionStatus.FAILED,
+                error=str(e),
+                process_data=process_data,
+                error_type=type(e).__name__,
+            )
+        except Exception as e:
+            # `BaseNode.run` only catches what `_run` raises, not what the generator it returns raises
+            logger.exception(f"Node {self.node_id} failed to run")
+            run_result = NodeRunResult(
+                status=WorkflowNodeExecutionStatus.FAILED,
+                error=str(e),
+                error_type="WorkflowNodeError",
+            )
+        yield RunCompletedEvent(run_result=run_result)
+
+    def _create_executor(self) -> Executor:
+        return Executor(
+            node_data=self.node_data,
+            timeout=self._get_request_timeout(self.node_data),
+            variable_pool=self.graph_runtime_state.variable_pool,
+            max_retries=0,
+        )
+
+    def _build_run_result(self, http_executor: Executor, response: Response) -> NodeRunResult:
+        files = self.extract_files(url=http_executor.url, response=response)
+        if not response.response.is_success and (self.should_continue_on_error or self.should_retry):
             return NodeRunResult(
-                status=WorkflowNodeExecutionStatus.SUCCEEDED,
+                status=WorkflowNodeExecutionStatus.FAILED,
                 outputs={
                     "status_code": response.status_code,
                     "body": response.text if not files else "",
@@ -99,15 +136,21 @@ class HttpRequestNode(BaseNode[HttpRequestNodeData]):
                 process_data={
                     "request": http_executor.to_log(),
                 },
+                error=f"Request failed with status code {response.status_code}",
+                error_type="HTTPResponseCodeError",
             )
-        except HttpRequestNodeError as e:
-            logger.warning(f"http request node {self.node_id} failed to run: {e}")
-            return NodeRunResult(
-                status=WorkflowNodeExecutionStatus.FAILED,
-                error=str(e),
-                process_data=process_data,
-                error_type=type(e).__name__,
-            )
+        return NodeRunResult(
+            status=WorkflowNodeExecutionStatus.SUCCEEDED,
+            outputs={
+                "status_code": response.status_code,
+                "body": response.text if not files else "",
+                "headers": response.headers,
+                "files": files,
+            },
+            process_data={
+                "request": http_executor.to_log(),
+            },
+        )
 
     @staticmethod
     def _get_request_timeout(node_data: HttpRequestNodeData) -> HttpRequestNodeTimeout:
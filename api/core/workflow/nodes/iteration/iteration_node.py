@@ -2,9 +2,10 @@ import contextvars
 import logging
 import uuid
 from collections.abc import Generator, Mapping, Sequence
-from concurrent.futures import Future, wait
+from concurrent.futures import Future
+from dataclasses import dataclass
 from datetime import UTC, datetime
-from queue import Empty, Queue
+from queue import Queue
 from typing import TYPE_CHECKING, Any, Optional, cast
 
 from flask import Flask, current_app, has_request_context
@@ -52,6 +53,14 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class _IterationItemDone:
+    """Put on the event queue of a parallel iteration by the future of an item when it is done."""
+
+    index: int
+    error: Optional[Exception] = None
+
+
 class IterationNode(BaseNode[IterationNodeData]):
     """
     Iteration Node.
@@ -107,7 +116,7 @@ class IterationNode(BaseNode[IterationNodeData]):
         root_node_id = self.node_data.start_node_id
 
         # init graph
-        iteration_graph = Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+        iteration_graph = self.graph.get_sub_graph(graph_config=graph_config, root_node_id=root_node_id)
 
         if not iteration_graph:
             raise IterationGraphNotFoundError("iteration graph not found")
@@ -119,7 +128,7 @@ class IterationNode(BaseNode[IterationNodeData]):
         variable_pool.add([self.node_id, "item"], iterator_list_value[0])
 
         # init graph engine
-        from core.workflow.graph_engine.graph_engine import GraphEngine, GraphEngineThreadPool
+        from core.workflow.graph_engine.graph_engine import GraphEngine
 
         graph_engine = GraphEngine(
             tenant_id=self.tenant_id,
@@ -164,54 +173,15 @@ class IterationNode(BaseNode[IterationNodeData]):
         outputs: list[Any] = [None] * len(iterator_list_value)
         try:
             if self.node_data.is_parallel:
-                futures: list[Future] = []
-                q: Queue = Queue()
-                thread_pool = GraphEngineThreadPool(
-                    max_workers=self.node_data.parallel_nums, max_submit_count=dify_config.MAX_SUBMIT_COUNT
+                yield from self._run_parallel_iters(
+                    iterator_list_value=iterator_list_value,
+                    inputs=inputs,
+                    outputs=outputs,
+                    start_at=start_at,
+                    graph_engine=graph_engine,
+                    iteration_graph=iteration_graph,
+                    iter_run_map=iter_run_map,
                 )
-                for index, item in enumerate(iterator_list_value):
-                    future: Future = thread_pool.submit(
-                        self._run_single_iter_parallel,
-                        flask_app=current_app._get_current_object(),  # type: ignore
-                        q=q,
-                        context=contextvars.copy_context(),
-                        iterator_list_value=iterator_list_value,
-                        inputs=inputs,
-                        outputs=outputs,
-                        start_at=start_at,
-                        graph_engine=graph_engine,
-                        iteration_graph=iteration_graph,
-                        index=index,
-                        item=item,
-                        iter_run_map=iter_run_map,
-                    )
-                    future.add_done_callback(thread_pool.task_done_callback)
-                    futures.append(future)
-                succeeded_count = 0
-                while True:
-                    try:
-                        event = q.get(timeout=1)
-                        if event is None:
-                            break
-                        if isinstance(event, IterationRunNextEvent):
-                            succeeded_count += 1
-                            if succeeded_count == len(futures):
-                                q.put(None)
-                        yield event
-                        if isinstance(event, RunCompletedEvent):
-                            q.put(None)
-                            for f in futures:
-                                if not f.done():
-                                    f.cancel()
-                            yield event
-                        if isinstance(event, IterationRunFailedEvent):
-                            q.put(None)
-                            yield event
-                    except Empty:
-                        continue
-
-                # wait all threads
-                wait(futures)
             else:
                 for _ in range(len(iterator_list_value)):
                     yield from self._run_single_iter(
@@ -564,6 +534,102 @@ class IterationNode(BaseNode[IterationNodeData]):
                 )
             )
 
+    def _run_parallel_iters(
+        self,
+        *,
+        iterator_list_value: Sequence[str],
+        inputs: Mapping[str, list],
+        outputs: list,
+        start_at: datetime,
+        graph_engine: "GraphEngine",
+        iteration_graph: Graph,
+        iter_run_map: dict[str, float],
+    ) -> Generator[NodeEvent | InNodeEvent, None, None]:
+        """
+        Run the items in parallel with a sliding window: at most `parallel_nums` items are submitted at
+        once, and the next item is only taken from the list when one of them finishes. Events are yielded
+        in the order the items produce them, outputs keep the order of the items.
+        """
+        from core.workflow.graph_engine.graph_engine import GraphEngineThreadPool
+
+        q: Queue = Queue()
+        thread_pool = GraphEngineThreadPool(
+            tenant_id=self.tenant_id,
+            max_workers=self.node_data.parallel_nums,
+            max_submit_count=dify_config.MAX_SUBMIT_COUNT,
+        )
+        flask_app = current_app._get_current_object()  # type: ignore
+        items = enumerate(iterator_list_value)
+        in_flight: dict[int, Future] = {}
+
+        def submit_next() -> None:
+            next_item = next(items, None)
+            if next_item is None:
+                return
+            index, item = next_item
+            future: Future = thread_pool.submit(
+                self._run_single_iter_parallel,
+                flask_app=flask_app,
+                q=q,
+                context=contextvars.copy_context(),
+                iterator_list_value=iterator_list_value,
+                inputs=inputs,
+                outputs=outputs,
+                start_at=start_at,
+                graph_engine=graph_engine,
+                iteration_graph=iteration_graph,
+                index=index,
+                item=item,
+                iter_run_map=iter_run_map,
+            )
+            future.add_done_callback(thread_pool.task_done_callback)
+            # the item is done for the scheduler when its future is, so the next item can take its slot
+            future.add_done_callback(
+                lambda f: q.put(_IterationItemDone(index=index, error=None if f.cancelled() else f.exception()))
+            )
+            in_flight[index] = future
+
+        def cancel_pending() -> None:
+            # items that have not started yet never run
+            for index, future in list(in_flight.items()):
+                if future.cancel():
+                    in_flight.pop(index)
+
+        for _ in range(max(self.node_data.parallel_nums, 1)):
+            submit_next()
+
+        stopped = False
+        error: Optional[Exception] = None
+        # every submitted item puts its events, then its future puts an _IterationItemDone
+        while in_flight:
+            event = q.get()
+            if isinstance(event, _IterationItemDone):
+                in_flight.pop(event.index, None)
+                if event.error is not None and not stopped:
+                    stopped = True
+                    error = event.error
+                    cancel_pending()
+                if not stopped:
+                    submit_next()
+                continue
+            if stopped:
+                # events of the items still running when the iteration stopped are dropped
+                continue
+
+            yield event
+            if isinstance(event, RunCompletedEvent):
+                stopped = True
+                yield event
+            if isinstance(event, IterationRunFailedEvent):
+                stopped = True
+                yield event
+
+            if stopped:
+                cancel_pending()
+
+        if error is not None:
+            raise IterationNodeError(str(error)) from error
+
     def _run_single_iter_parallel(
         self,
         *,
@@ -600,21 +666,25 @@ class IterationNode(BaseNode[IterationNodeData]):
 
                 g._login_user = saved_user
 
-            parallel_mode_run_id = uuid.uuid4().hex
-            graph_engine_copy = graph_engine.create_copy()
-            variable_pool_copy = graph_engine_copy.graph_runtime_state.variable_pool
-            variable_pool_copy.add([self.node_id, "index"], index)
-            variable_pool_copy.add([self.node_id, "item"], item)
-            for event in self._run_single_iter(
-                iterator_list_value=iterator_list_value,
-                variable_pool=variable_pool_copy,
-                inputs=inputs,
-                outputs=outputs,
-                start_at=start_at,
-                graph_engine=graph_engine_copy,
-                iteration_graph=iteration_graph,
-                iter_run_map=iter_run_map,
-                parallel_mode_run_id=parallel_mode_run_id,
-            ):
-                q.put(event)
-            graph_engine.graph_runtime_state.total_tokens += graph_engine_copy.graph_runtime_state.total_tokens
+            try:
+                parallel_mode_run_id = uuid.uuid4().hex
+                graph_engine_copy = graph_engine.create_copy()
+                variable_pool_copy = graph_engine_copy.graph_runtime_state.variable_pool
+                variable_pool_copy.add([self.node_id, "index"], index)
+                variable_pool_copy.add([self.node_id, "item"], item)
+                for event in self._run_single_iter(
+                    iterator_list_value=iterator_list_value,
+                    variable_pool=variable_pool_copy,
+                    inputs=inputs,
+                    outputs=outputs,
+                    start_at=start_at,
+                    graph_engine=graph_engine_copy,
+                    iteration_graph=iteration_graph,
+                    iter_run_map=iter_run_map,
+                    parallel_mode_run_id=parallel_mode_run_id,
+                ):
+                    q.put(event)
+                graph_engine.graph_runtime_state.total_tokens += graph_engine_copy.graph_runtime_state.total_tokens
+            except Exception:
+                logger.exception("Iteration %s failed to run item %s", self.node_id, index)
+                raise
@@ -99,20 +99,20 @@ class ListOperatorNode(BaseNode[ListOperatorNodeData]):
             if isinstance(variable, ArrayStringSegment):
                 if not isinstance(condition.value, str):
                     raise InvalidFilterValueError(f"Invalid filter value: {condition.value}")
-                value = self.graph_runtime_state.variable_pool.convert_template(condition.value).text
+                value = self.graph_runtime_state.variable_pool.render_template(condition.value)
                 filter_func = _get_string_filter_func(condition=condition.comparison_operator, value=value)
                 result = list(filter(filter_func, variable.value))
                 variable = variable.model_copy(update={"value": result})
             elif isinstance(variable, ArrayNumberSegment):
                 if not isinstance(condition.value, str):
                     raise InvalidFilterValueError(f"Invalid filter value: {condition.value}")
-                value = self.graph_runtime_state.variable_pool.convert_template(condition.value).text
+                value = self.graph_runtime_state.variable_pool.render_template(condition.value)
                 filter_func = _get_number_filter_func(condition=condition.comparison_operator, value=float(value))
                 result = list(filter(filter_func, variable.value))
                 variable = variable.model_copy(update={"value": result})
             elif isinstance(variable, ArrayFileSegment):
                 if isinstance(condition.value, str):
-                    value = self.graph_runtime_state.variable_pool.convert_template(condition.value).text
+                    value = self.graph_runtime_state.variable_pool.render_template(condition.value)
                 else:
                     value = condition.value
                 filter_func = _get_file_filter_func(
@@ -149,7 +149,7 @@ class ListOperatorNode(BaseNode[ListOperatorNodeData]):
     def _extract_slice(
         self, variable: Union[ArrayFileSegment, ArrayNumberSegment, ArrayStringSegment]
     ) -> Union[ArrayFileSegment, ArrayNumberSegment, ArrayStringSegment]:
-        value = int(self.graph_runtime_state.variable_pool.convert_template(self.node_data.extract_by.serial).text)
+        value = int(self.graph_runtime_state.variable_pool.render_template(self.node_data.extract_by.serial))
         if value < 1:
             raise ValueError(f"Invalid serial index: must be >= 1, got {value}")
         value -= 1
@@ -1233,7 +1233,7 @@ def _handle_completion_template(
             template_text = template.text.replace("{#context#}", context)
         else:
             template_text = template.text
-        result_text = variable_pool.convert_template(template_text).text
+        result_text = variable_pool.render_template(template_text)
     prompt_message = _combine_message_content_with_role(
         contents=[TextPromptMessageContent(data=result_text)], role=PromptMessageRole.USER
     )
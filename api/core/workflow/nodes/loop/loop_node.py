@@ -67,7 +67,7 @@ class LoopNode(BaseNode[LoopNodeData]):
             raise ValueError(f"field start_node_id in loop {self.node_id} not found")
 
         # Initialize graph
-        loop_graph = Graph.init(graph_config=self.graph_config, root_node_id=self.node_data.start_node_id)
+        loop_graph = self.graph.get_sub_graph(graph_config=self.graph_config, root_node_id=self.node_data.start_node_id)
         if not loop_graph:
             raise ValueError("loop graph not found")
 
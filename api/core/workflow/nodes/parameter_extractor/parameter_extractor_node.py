@@ -682,7 +682,7 @@ class ParameterExtractorNode(BaseNode):
         model_mode = ModelMode.value_of(node_data.model.mode)
         input_text = query
         memory_str = ""
-        instruction = variable_pool.convert_template(node_data.instruction or "").text
+        instruction = variable_pool.render_template(node_data.instruction or "")
 
         if memory and node_data.memory and node_data.memory.window:
             memory_str = memory.get_history_prompt_text(
@@ -709,7 +709,7 @@ class ParameterExtractorNode(BaseNode):
         model_mode = ModelMode.value_of(node_data.model.mode)
         input_text = query
         memory_str = ""
-        instruction = variable_pool.convert_template(node_data.instruction or "").text
+        instruction = variable_pool.render_template(node_data.instruction or "")
 
         if memory and node_data.memory and node_data.memory.window:
             memory_str = memory.get_history_prompt_text(
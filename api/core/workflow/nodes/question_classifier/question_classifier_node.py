@@ -59,7 +59,7 @@ class QuestionClassifierNode(LLMNode):
         )
         # fetch instruction
         node_data.instruction = node_data.instruction or ""
-        node_data.instruction = variable_pool.convert_template(node_data.instruction).text
+        node_data.instruction = variable_pool.render_template(node_data.instruction)
 
         files = (
             llm_utils.fetch_files(
@@ -50,7 +50,7 @@ class ConditionProcessor:
                 actual_value = variable.value if variable else None
                 expected_value = condition.value
                 if isinstance(expected_value, str):
-                    expected_value = variable_pool.convert_template(expected_value).text
+                    expected_value = variable_pool.render_template(expected_value)
                 input_conditions.append(
                     {
                         "actual_value": actual_value,
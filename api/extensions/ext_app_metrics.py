@@ -65,3 +65,21 @@ def init_app(app: DifyApp):
             "connection_timeout": engine.pool.timeout(),  # type: ignore
             "recycle_time": db.engine.pool._recycle,  # type: ignore
         }
+
+    @app.route("/vector-db-pool-stat")
+    def vector_db_pool_stat():
+        from core.rag.datasource.vdb.connection_pool import get_pool_stats
+
+        return {
+            "pid": os.getpid(),
+            "pools": get_pool_stats(),
+        }
+
+    @app.route("/workflow-scheduler-stat")
+    def workflow_scheduler_stat():
+        from core.workflow.graph_engine.scheduler import GraphEngineScheduler
+
+        return {
+            "pid": os.getpid(),
+            **GraphEngineScheduler.get_instance().stats(),
+        }
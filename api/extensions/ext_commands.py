@@ -13,6 +13,8 @@ def init_app(app: DifyApp):
         fix_app_site_missing,
         install_plugins,
         migrate_data_for_plugin,
+        migrate_embedding_cache_format,
+        migrate_keyword_postings,
         old_metadata_migration,
         remove_orphaned_files_on_storage,
         reset_email,
@@ -40,6 +42,8 @@ def init_app(app: DifyApp):
         clear_free_plan_tenant_expired_logs,
         clear_orphaned_file_records,
         remove_orphaned_files_on_storage,
+        migrate_embedding_cache_format,
+        migrate_keyword_postings,
     ]
     for cmd in cmds_to_register:
         app.cli.add_command(cmd)
@@ -1,9 +1,12 @@
 import hashlib
+import threading
 
+from cachetools import TTLCache
 from Crypto.Cipher import AES
 from Crypto.PublicKey import RSA
 from Crypto.Random import get_random_bytes
 
+from configs import dify_config
 from extensions.ext_redis import redis_client
 from extensions.ext_storage import storage
 from libs import gmpy2_pkcs10aep_cipher
@@ -19,6 +22,7 @@ def generate_key_pair(tenant_id):
     filepath = "privkeys/{tenant_id}".format(tenant_id=tenant_id) + "/private.pem"
 
     storage.save(filepath, pem_private)
+    clear_decrypt_decoding(tenant_id)
 
     return pem_public.decode()
 
@@ -45,7 +49,37 @@ def encrypt(text, public_key):
     return prefix_hybrid + encrypted_data
 
 
+# parsed private keys and their ciphers of tenants, the ciphers only read the key and are shared by threads
+_decodings: TTLCache = TTLCache(
+    maxsize=dify_config.TENANT_DECRYPT_KEY_CACHE_MAX_SIZE,
+    ttl=max(dify_config.TENANT_DECRYPT_KEY_CACHE_TTL, 1),
+)
+_decodings_lock = threading.Lock()
+
+
 def get_decrypt_decoding(tenant_id):
+    if dify_config.TENANT_DECRYPT_KEY_CACHE_TTL <= 0:
+        return _load_decrypt_decoding(tenant_id)
+
+    with _decodings_lock:
+        decoding = _decodings.get(tenant_id)
+    if decoding is None:
+        decoding = _load_decrypt_decoding(tenant_id)
+        with _decodings_lock:
+            _decodings[tenant_id] = decoding
+
+    return decoding
+
+
+def clear_decrypt_decoding(tenant_id=None):
+    with _decodings_lock:
+        if tenant_id is None:
+            _decodings.clear()
+        else:
+            _decodings.pop(tenant_id, None)
+
+
+def _load_decrypt_decoding(tenant_id):
     filepath = "privkeys/{tenant_id}".format(tenant_id=tenant_id) + "/private.pem"
 
     cache_key = "tenant_privkey:{hash}".format(hash=hashlib.sha3_256(filepath.encode()).hexdigest())
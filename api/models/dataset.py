@@ -11,6 +11,7 @@ import time
 from json import JSONDecodeError
 from typing import Any, cast
 
+import numpy as np
 from sqlalchemy import func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped
@@ -912,6 +913,48 @@ class DatasetKeywordTable(Base):
                 return None
 
 
+class DatasetKeywordPosting(Base):
+    """One (keyword, chunk) posting of a dataset's inverted keyword index."""
+
+    __tablename__ = "dataset_keyword_postings"
+    __table_args__ = (
+        db.PrimaryKeyConstraint("id", name="dataset_keyword_posting_pkey"),
+        db.UniqueConstraint("dataset_id", "keyword", "index_node_id", name="dataset_keyword_posting_keyword_idx"),
+        db.Index("dataset_keyword_posting_node_idx", "dataset_id", "index_node_id"),
+    )
+
+    id = db.Column(StringUUID, primary_key=True, server_default=db.text("uuid_generate_v4()"))
+    dataset_id = db.Column(StringUUID, nullable=False)
+    keyword = db.Column(db.Text, nullable=False)
+    index_node_id = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.current_timestamp())
+
+
+# Binary embedding format: magic, format version, dtype code, then little-endian floats.
+# Legacy rows are pickled lists, which always start with the pickle PROTO opcode (0x80).
+EMBEDDING_FORMAT_MAGIC = b"DE"
+EMBEDDING_FORMAT_VERSION = 1
+_EMBEDDING_DTYPE_CODES = {"float32": b"f", "float16": b"e"}
+_EMBEDDING_CODE_DTYPES = {b"f": np.dtype("<f4"), b"e": np.dtype("<f2")}
+_EMBEDDING_HEADER_SIZE = 4
+
+
+def encode_embedding(embedding_data: list[float], dtype: str = "float32") -> bytes:
+    code = _EMBEDDING_DTYPE_CODES[dtype]
+    header = EMBEDDING_FORMAT_MAGIC + bytes([EMBEDDING_FORMAT_VERSION]) + code
+    return header + np.asarray(embedding_data, dtype=_EMBEDDING_CODE_DTYPES[code]).tobytes()
+
+
+def decode_embedding(data: bytes) -> np.ndarray:
+    if not data.startswith(EMBEDDING_FORMAT_MAGIC):
+        return np.asarray(pickle.loads(data), dtype=np.float64)  # noqa: S301
+    version = data[len(EMBEDDING_FORMAT_MAGIC)]
+    if version != EMBEDDING_FORMAT_VERSION:
+        raise ValueError(f"Unsupported embedding format version: {version}")
+    code = data[_EMBEDDING_HEADER_SIZE - 1 : _EMBEDDING_HEADER_SIZE]
+    return np.frombuffer(data, dtype=_EMBEDDING_CODE_DTYPES[code], offset=_EMBEDDING_HEADER_SIZE)
+
+
 class Embedding(Base):
     __tablename__ = "embeddings"
     __table_args__ = (
@@ -930,10 +973,19 @@ class Embedding(Base):
     provider_name = db.Column(db.String(255), nullable=False, server_default=db.text("''::character varying"))
 
     def set_embedding(self, embedding_data: list[float]):
-        self.embedding = pickle.dumps(embedding_data, protocol=pickle.HIGHEST_PROTOCOL)
+        self.embedding = encode_embedding(embedding_data, dify_config.EMBEDDING_CACHE_STORAGE_DTYPE)
 
     def get_embedding(self) -> list[float]:
-        return cast(list[float], pickle.loads(self.embedding))  # noqa: S301
+        if self.is_legacy_format:
+            return cast(list[float], pickle.loads(self.embedding))  # noqa: S301
+        return cast(list[float], decode_embedding(self.embedding).tolist())
+
+    def get_embedding_array(self) -> np.ndarray:
+        return decode_embedding(self.embedding)
+
+    @property
+    def is_legacy_format(self) -> bool:
+        return not self.embedding.startswith(EMBEDDING_FORMAT_MAGIC)
 
 
 class DatasetCollectionBinding(Base):
@@ -291,14 +291,14 @@ class Workflow(Base):
             variable_factory.build_environment_variable_from_mapping(v) for v in environment_variables_dict.values()
         ]
 
-        # decrypt secret variables value
-        def decrypt_func(var):
-            if isinstance(var, SecretVariable):
-                return var.model_copy(update={"value": encrypter.decrypt_token(tenant_id=tenant_id, token=var.value)})
-            else:
-                return var
-
-        results = list(map(decrypt_func, results))
+        # decrypt secret variables value, all with the tenant's key loaded once
+        secret_indexes = [i for i, var in enumerate(results) if isinstance(var, SecretVariable)]
+        if secret_indexes:
+            decrypted_values = encrypter.batch_decrypt_token(
+                tenant_id=tenant_id, tokens=[results[i].value for i in secret_indexes]
+            )
+            for i, value in zip(secret_indexes, decrypted_values):
+                results[i] = results[i].model_copy(update={"value": value})
         return results
 
     @environment_variables.setter
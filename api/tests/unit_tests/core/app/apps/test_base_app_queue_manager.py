@@ -0,0 +1,101 @@
+import gc
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.app.apps.base_app_queue_manager import (
+    AppQueueManager,
+    PublishFrom,
+    TaskStopSubscriber,
+    _may_contain_sqlalchemy_models,
+)
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.entities.queue_entities import (
+    QueueErrorEvent,
+    QueueLLMChunkEvent,
+    QueueNodeSucceededEvent,
+    QueueTextChunkEvent,
+)
+from core.model_runtime.entities.llm_entities import LLMResultChunk, LLMResultChunkDelta
+from core.model_runtime.entities.message_entities import AssistantPromptMessage
+from models.model import Message
+
+
+@patch.object(TaskStopSubscriber, "_run", new=MagicMock())
+def test_stop_signal_sets_event_of_subscribed_task():
+    stopped = TaskStopSubscriber.subscribe("task-1")
+    other_stopped = TaskStopSubscriber.subscribe("task-2")
+
+    TaskStopSubscriber._set_stopped("task-1")
+
+    assert stopped.is_set()
+    assert not other_stopped.is_set()
+
+
+@patch.object(TaskStopSubscriber, "_run", new=MagicMock())
+def test_stop_event_leaves_registry_with_its_owner():
+    stopped = TaskStopSubscriber.subscribe("task-3")
+    assert TaskStopSubscriber._events.get("task-3") is stopped
+
+    del stopped
+    gc.collect()
+
+    assert TaskStopSubscriber._events.get("task-3") is None
+    # stop signals of unknown tasks are ignored
+    TaskStopSubscriber._set_stopped("task-3")
+
+
+@patch.object(TaskStopSubscriber, "_run", new=MagicMock())
+def test_sync_stop_flags_sets_events_of_flagged_tasks():
+    stopped = TaskStopSubscriber.subscribe("task-4")
+    running = TaskStopSubscriber.subscribe("task-5")
+
+    flags = {AppQueueManager._generate_stopped_cache_key("task-4"): b"1"}
+    with patch("core.app.apps.base_app_queue_manager.redis_client", new=MagicMock()) as redis_client:
+        pipeline = redis_client.pipeline.return_value
+        pipeline.execute.side_effect = lambda: [flags.get(call.args[0]) for call in pipeline.get.call_args_list]
+        TaskStopSubscriber._sync_stop_flags()
+
+    assert stopped.is_set()
+    assert not running.is_set()
+
+
+def test_set_stop_flag_publishes_stop_signal():
+    with patch("core.app.apps.base_app_queue_manager.redis_client", new=MagicMock()) as redis_client:
+        redis_client.get.return_value = b"end-user-user-1"
+        AppQueueManager.set_stop_flag("task-6", InvokeFrom.SERVICE_API, "user-1")
+
+    redis_client.setex.assert_called_once_with("generate_task_stopped:task-6", 600, 1)
+    redis_client.publish.assert_called_once_with(TaskStopSubscriber.CHANNEL, "task-6")
+
+
+def test_set_stop_flag_ignores_tasks_of_other_users():
+    with patch("core.app.apps.base_app_queue_manager.redis_client", new=MagicMock()) as redis_client:
+        redis_client.get.return_value = b"end-user-user-1"
+        AppQueueManager.set_stop_flag("task-7", InvokeFrom.SERVICE_API, "user-2")
+
+    redis_client.publish.assert_not_called()
+
+
+def test_chunk_events_are_not_walked():
+    assert not _may_contain_sqlalchemy_models(QueueTextChunkEvent)
+    assert not _may_contain_sqlalchemy_models(QueueLLMChunkEvent)
+    assert _may_contain_sqlalchemy_models(QueueNodeSucceededEvent)
+    assert _may_contain_sqlalchemy_models(QueueErrorEvent)
+
+
+def test_publish_rejects_nested_sqlalchemy_models():
+    queue_manager = object.__new__(AppQueueManager)
+    queue_manager._publish = MagicMock()
+
+    with pytest.raises(TypeError):
+        queue_manager.publish(QueueErrorEvent(error={"messages": [Message()]}), PublishFrom.TASK_PIPELINE)
+    queue_manager._publish.assert_not_called()
+
+    chunk_event = QueueLLMChunkEvent(
+        chunk=LLMResultChunk(
+            model="gpt-4o", delta=LLMResultChunkDelta(index=0, message=AssistantPromptMessage(content="hello"))
+        )
+    )
+    queue_manager.publish(chunk_event, PublishFrom.TASK_PIPELINE)
+    queue_manager._publish.assert_called_once_with(chunk_event, PublishFrom.TASK_PIPELINE)
@@ -0,0 +1,50 @@
+from unittest.mock import MagicMock, patch
+
+from core.helper.extraction_cache import ExtractionCache
+
+
+def test_extraction_cache_round_trip():
+    stored: dict[str, bytes] = {}
+    mock_redis = MagicMock()
+    mock_redis.get.side_effect = stored.get
+    mock_redis.setex.side_effect = lambda key, ttl, value: stored.__setitem__(key, value)
+
+    with patch("core.helper.extraction_cache.redis_client", new=mock_redis):
+        cache = ExtractionCache(namespace="test", content_hash=ExtractionCache.hash_content(b"content"))
+        assert cache.get() is None
+
+        cache.set({"text": "extracted text"})
+        assert cache.get() == {"text": "extracted text"}
+
+
+def test_extraction_cache_skips_large_and_unserializable_values():
+    with (
+        patch("core.helper.extraction_cache.dify_config.EXTRACTION_CACHE_MAX_SIZE", 64),
+        patch("core.helper.extraction_cache.redis_client", new=MagicMock()) as mock_redis,
+    ):
+        cache = ExtractionCache(namespace="test", content_hash="hash")
+        cache.set("".join(chr(0x4E00 + i) for i in range(1000)))
+        cache.set([object()])
+        mock_redis.setex.assert_not_called()
+
+
+def test_extraction_cache_errors_are_misses():
+    with patch("core.helper.extraction_cache.redis_client", new=MagicMock()) as mock_redis:
+        mock_redis.get.side_effect = ConnectionError()
+        mock_redis.setex.side_effect = ConnectionError()
+
+        cache = ExtractionCache(namespace="test", content_hash="hash")
+        assert cache.get() is None
+        cache.set("extracted text")
+
+
+def test_extraction_cache_disabled():
+    with (
+        patch("core.helper.extraction_cache.dify_config.EXTRACTION_CACHE_TTL", 0),
+        patch("core.helper.extraction_cache.redis_client", new=MagicMock()) as mock_redis,
+    ):
+        cache = ExtractionCache(namespace="test", content_hash="hash")
+        cache.set("extracted text")
+        assert cache.get() is None
+        mock_redis.get.assert_not_called()
+        mock_redis.setex.assert_not_called()
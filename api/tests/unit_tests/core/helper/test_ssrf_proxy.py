@@ -1,9 +1,12 @@
+import asyncio
 import secrets
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
 
-from core.helper.ssrf_proxy import SSRF_DEFAULT_MAX_RETRIES, STATUS_FORCELIST, make_request
+from core.helper import ssrf_proxy
+from core.helper.ssrf_proxy import SSRF_DEFAULT_MAX_RETRIES, STATUS_FORCELIST, amake_request, make_request
 
 
 @patch("httpx.Client.request")
@@ -50,3 +53,64 @@ def test_retry_logic_success(mock_request):
     assert response.status_code == 200
     assert mock_request.call_count == SSRF_DEFAULT_MAX_RETRIES + 1
     assert mock_request.call_args_list[0][1].get("method") == "GET"
+
+
+@patch("httpx.AsyncClient.request")
+def test_async_retry_logic_success(mock_request):
+    mock_response_500 = MagicMock()
+    mock_response_500.status_code = 500
+    mock_response_200 = MagicMock()
+    mock_response_200.status_code = 200
+    mock_request.side_effect = [mock_response_500, mock_response_200]
+
+    with patch("core.helper.ssrf_proxy.BACKOFF_FACTOR", 0):
+        response = asyncio.run(amake_request("GET", "http://example.com", max_retries=1))
+
+    assert response.status_code == 200
+    assert mock_request.call_count == 2
+
+
+def test_client_is_reused_per_ssl_verify_mode():
+    assert ssrf_proxy._get_client(True) is ssrf_proxy._get_client(True)
+    assert ssrf_proxy._get_client(True) is not ssrf_proxy._get_client(False)
+
+
+def test_async_client_is_reused_per_event_loop_and_ssl_verify_mode():
+    async def get_clients():
+        return [ssrf_proxy._get_async_client(ssl_verify) for ssl_verify in (True, True, False)]
+
+    first_loop_clients = asyncio.run(get_clients())
+    second_loop_clients = asyncio.run(get_clients())
+
+    assert first_loop_clients[0] is first_loop_clients[1]
+    assert first_loop_clients[0] is not first_loop_clients[2]
+    assert first_loop_clients[0] is not second_loop_clients[0]
+
+
+def test_pooled_client_does_not_keep_cookies(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"Set-Cookie": "session=secret; Path=/"}, request=request)
+
+    client_kwargs = ssrf_proxy._get_client_kwargs(True, httpx.HTTPTransport)
+    monkeypatch.setitem(
+        ssrf_proxy._clients, True, httpx.Client(transport=httpx.MockTransport(handler), **client_kwargs)
+    )
+
+    make_request("GET", "http://example.com", ssl_verify=True)
+    request = ssrf_proxy._get_client(True).build_request("GET", "http://example.com")
+    assert "cookie" not in request.headers
+
+
+def test_stream_request_retries_then_streams(monkeypatch):
+    status_codes = [503, 200]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(status_codes.pop(0), content=b"chunk" * 3, request=request)
+
+    monkeypatch.setattr(ssrf_proxy, "BACKOFF_FACTOR", 0)
+    monkeypatch.setitem(ssrf_proxy._clients, True, httpx.Client(transport=httpx.MockTransport(handler)))
+
+    with ssrf_proxy.stream_request("GET", "http://example.com", max_retries=1, ssl_verify=True) as response:
+        assert response.status_code == 200
+        assert b"".join(response.iter_bytes()) == b"chunkchunkchunk"
+    assert not status_codes
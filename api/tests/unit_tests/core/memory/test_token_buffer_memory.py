@@ -0,0 +1,107 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.memory.token_buffer_memory import TokenBufferMemory
+from core.model_runtime.entities import AssistantPromptMessage, UserPromptMessage
+
+
+def _count_tokens(prompt_messages):
+    # every message costs its length plus 3 tokens of chat format overhead
+    return sum(len(m.content) for m in prompt_messages) + 3 * len(prompt_messages)
+
+
+@pytest.fixture(autouse=True)
+def _enable_token_counting():
+    with patch("core.memory.token_buffer_memory.dify_config.PLUGIN_BASED_TOKEN_COUNTING_ENABLED", True):
+        yield
+
+
+def _make_memory():
+    model_instance = MagicMock()
+    model_instance.provider = "openai"
+    model_instance.model = "gpt-4o"
+    model_instance.get_llm_num_tokens.side_effect = _count_tokens
+    return TokenBufferMemory(conversation=MagicMock(), model_instance=model_instance)
+
+
+def _make_history(turns: int):
+    prompt_messages = []
+    keys = []
+    for i in range(turns):
+        prompt_messages.append(UserPromptMessage(content="q" * 10))
+        prompt_messages.append(AssistantPromptMessage(content="a" * 20))
+        keys.extend((f"m{i}:query", f"m{i}:answer"))
+    return prompt_messages, keys
+
+
+def _prune_by_loop(prompt_messages, max_token_limit):
+    prompt_messages = list(prompt_messages)
+    while _count_tokens(prompt_messages) > max_token_limit and len(prompt_messages) > 1:
+        prompt_messages.pop(0)
+    return prompt_messages
+
+
+def test_prune_matches_pruning_one_message_at_a_time():
+    prompt_messages, keys = _make_history(20)
+    for max_token_limit in (0, 10, 30, 100, 333, 700, 10000):
+        memory = _make_memory()
+        with patch("core.memory.token_buffer_memory.redis_client", new=MagicMock()) as redis_client:
+            redis_client.pipeline.return_value.execute.return_value = [None] * len(keys)
+            pruned = memory._prune_prompt_messages(prompt_messages, keys, max_token_limit)
+
+        assert pruned == _prune_by_loop(prompt_messages, max_token_limit)
+
+
+def test_prune_uses_cached_message_tokens():
+    prompt_messages, keys = _make_history(50)
+    memory = _make_memory()
+    with patch("core.memory.token_buffer_memory.redis_client", new=MagicMock()) as redis_client:
+        redis_client.pipeline.return_value.execute.return_value = [_count_tokens([m]) for m in prompt_messages]
+        pruned = memory._prune_prompt_messages(prompt_messages, keys, 200)
+
+    assert pruned == _prune_by_loop(prompt_messages, 200)
+    redis_client.pipeline.return_value.setex.assert_not_called()
+    # all messages and the kept messages are counted as a whole, not every message on every pruning step
+    assert memory.model_instance.get_llm_num_tokens.call_count <= 3
+
+
+def test_prune_counts_messages_that_fit_once():
+    prompt_messages, keys = _make_history(50)
+    memory = _make_memory()
+    with patch("core.memory.token_buffer_memory.redis_client", new=MagicMock()) as redis_client:
+        pruned = memory._prune_prompt_messages(prompt_messages, keys, 10000)
+
+    assert pruned == prompt_messages
+    memory.model_instance.get_llm_num_tokens.assert_called_once_with(prompt_messages)
+    redis_client.pipeline.assert_not_called()
+
+
+def test_prune_without_token_counting():
+    prompt_messages, keys = _make_history(50)
+    memory = _make_memory()
+    memory.model_instance.get_llm_num_tokens.side_effect = None
+    memory.model_instance.get_llm_num_tokens.return_value = 0
+    with (
+        patch("core.memory.token_buffer_memory.dify_config.PLUGIN_BASED_TOKEN_COUNTING_ENABLED", False),
+        patch("core.memory.token_buffer_memory.redis_client", new=MagicMock()) as redis_client,
+    ):
+        assert memory._prune_prompt_messages(prompt_messages, keys, 2000) == prompt_messages
+        assert memory._prune_prompt_messages(prompt_messages, keys, -1) == prompt_messages[-1:]
+
+    redis_client.pipeline.assert_not_called()
+
+
+def test_prune_caches_counted_message_tokens():
+    prompt_messages, keys = _make_history(2)
+    memory = _make_memory()
+    with patch("core.memory.token_buffer_memory.redis_client", new=MagicMock()) as redis_client:
+        redis_client.pipeline.return_value.execute.return_value = [b"13", None, b"13", None]
+        pruned = memory._prune_prompt_messages(prompt_messages, keys, 50)
+
+    assert pruned == _prune_by_loop(prompt_messages, 50)
+    cached_keys = [call.args[0] for call in redis_client.pipeline.return_value.setex.call_args_list]
+    assert cached_keys == [
+        "memory_message_tokens:openai:gpt-4o:m0:answer",
+        "memory_message_tokens:openai:gpt-4o:m1:answer",
+    ]
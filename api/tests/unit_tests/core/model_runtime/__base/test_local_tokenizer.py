@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+import pytest
+
+from core.model_runtime.entities.message_entities import (
+    ImagePromptMessageContent,
+    PromptMessageTool,
+    SystemPromptMessage,
+    TextPromptMessageContent,
+    UserPromptMessage,
+)
+from core.model_runtime.model_providers.__base.tokenizers import local_tokenizer
+from core.model_runtime.model_providers.__base.tokenizers.local_tokenizer import (
+    TOKENS_PER_MESSAGE,
+    TOKENS_PER_REPLY,
+    LocalTokenizer,
+)
+
+
+class FakeEncoding:
+    """Encodes every whitespace separated word as one token."""
+
+    name = "fake_base"
+
+    def __init__(self):
+        self.encoded: list[str] = []
+
+    def encode_ordinary_batch(self, texts: list[str]) -> list[list[int]]:
+        self.encoded.extend(texts)
+        return [[0] * len(text.split()) for text in texts]
+
+
+@pytest.fixture
+def encoding():
+    encoding = FakeEncoding()
+    local_tokenizer._token_counts.clear()
+    with patch.dict(local_tokenizer._encodings, {"cl100k_base": encoding, "o200k_base": encoding}):
+        yield encoding
+    local_tokenizer._token_counts.clear()
+
+
+def test_encoding_name_by_model_family():
+    assert LocalTokenizer.get_encoding_name("gpt-4o-mini") == "o200k_base"
+    assert LocalTokenizer.get_encoding_name("gpt-4-turbo") == "cl100k_base"
+    assert LocalTokenizer.get_encoding_name("text-embedding-3-small") == "cl100k_base"
+    assert LocalTokenizer.get_encoding_name("claude-3-5-sonnet") is None
+
+
+def test_unknown_model_is_not_counted(encoding):
+    assert LocalTokenizer.count_texts("claude-3-5-sonnet", ["hello"]) is None
+    assert LocalTokenizer.count_prompt_messages("claude-3-5-sonnet", [UserPromptMessage(content="hi")]) is None
+
+
+def test_count_texts_caches_counts(encoding):
+    assert LocalTokenizer.count_texts("gpt-4o", ["a b c", "d e"]) == [3, 2]
+    assert LocalTokenizer.count_texts("gpt-4o", ["d e", "f"]) == [2, 1]
+    assert encoding.encoded == ["a b c", "d e", "f"]
+
+
+def test_count_prompt_messages(encoding):
+    messages = [
+        SystemPromptMessage(content="you are helpful"),
+        UserPromptMessage(
+            content=[
+                TextPromptMessageContent(data="describe this image"),
+                ImagePromptMessageContent(format="png", mime_type="image/png", url="http://example.com/a.png"),
+            ],
+            name="alice",
+        ),
+    ]
+    tools = [PromptMessageTool(name="search", description="search", parameters={})]
+
+    num_tokens = LocalTokenizer.count_prompt_messages("gpt-4o", messages, tools)
+
+    tool_tokens = LocalTokenizer.count_texts("gpt-4o", [encoding.encoded[-1]])[0]
+    assert num_tokens == 3 + 3 + 1 + tool_tokens + TOKENS_PER_MESSAGE * 2 + TOKENS_PER_REPLY
+
+
+def test_disabled(encoding):
+    with patch.object(local_tokenizer.dify_config, "LOCAL_TOKEN_COUNTING_ENABLED", False):
+        assert LocalTokenizer.count_texts("gpt-4o", ["hello"]) is None
@@ -0,0 +1,48 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pydantic import BaseModel
+
+from core.plugin.impl.base import BasePluginClient
+
+
+class Chunk(BaseModel):
+    text: str
+
+
+def _stream_response(lines: list[bytes]) -> MagicMock:
+    response = MagicMock()
+    response.iter_lines.return_value = iter(lines)
+    return response
+
+
+def test_session_is_shared_between_clients():
+    assert BasePluginClient._get_session() is BasePluginClient()._get_session()
+
+
+def test_stream_request_with_model_parses_sse_lines():
+    response = _stream_response([b'data: {"text": "a"}', b"", b'{"text": "b"}  '])
+    with patch("requests.Session.request", return_value=response) as request:
+        chunks = list(BasePluginClient()._stream_request_with_model("POST", "stream", Chunk, data={}))
+
+    assert chunks == [Chunk(text="a"), Chunk(text="b")]
+    assert request.call_args.kwargs["stream"] is True
+    response.close.assert_called_once()
+
+
+def test_stream_request_releases_connection_when_stopped_early():
+    response = _stream_response([b'{"text": "a"}', b'{"text": "b"}'])
+    with patch("requests.Session.request", return_value=response):
+        stream = BasePluginClient()._stream_request_with_model("POST", "stream", Chunk)
+        assert next(stream) == Chunk(text="a")
+        stream.close()
+
+    response.close.assert_called_once()
+
+
+def test_daemon_response_stream_reports_undecodable_line():
+    response = _stream_response([b"not json"])
+    with patch("requests.Session.request", return_value=response):
+        stream = BasePluginClient()._request_with_plugin_daemon_response_stream("POST", "stream", Chunk)
+        with pytest.raises(ValueError, match="not json"):
+            next(stream)
@@ -0,0 +1,49 @@
+from unittest.mock import MagicMock, patch
+
+from core.rag.datasource.keyword.jieba.jieba import Jieba
+
+
+def _segment(index_node_id: str) -> MagicMock:
+    segment = MagicMock()
+    segment.index_node_id = index_node_id
+    segment.content = f"content of {index_node_id}"
+    return segment
+
+
+def test_search_hydrates_segments_in_one_query_and_keeps_rank_order():
+    dataset = MagicMock()
+    dataset.id = "dataset-1"
+    jieba = Jieba(dataset)
+    keyword_table = {"a": {"node-1", "node-2"}, "b": {"node-2"}, "c": {"node-3"}}
+    with (
+        patch.object(jieba, "_get_dataset_keyword_table", return_value=keyword_table),
+        patch(
+            "core.rag.datasource.keyword.jieba.jieba.JiebaKeywordTableHandler.extract_keywords",
+            return_value={"a", "b", "c"},
+        ),
+        patch("core.rag.datasource.keyword.keyword_base.db") as mock_db,
+    ):
+        segment_query = mock_db.session.query.return_value.filter.return_value
+        segment_query.all.return_value = [_segment("node-3"), _segment("node-1"), _segment("node-2")]
+
+        documents = jieba.search("query", top_k=2)
+
+    assert mock_db.session.query.call_count == 1
+    assert len(documents) == 2
+    # node-2 matches two keywords and must stay first even though the query returned it last
+    assert documents[0].metadata["doc_id"] == "node-2"
+    assert documents[0].page_content == "content of node-2"
+
+
+def test_delete_ids_from_keyword_table_drops_empty_keywords():
+    jieba = Jieba(MagicMock())
+    keyword_table = {"a": {"node-1", "node-2"}, "b": {"node-2"}}
+
+    assert jieba._delete_ids_from_keyword_table(keyword_table, ["node-2"]) == {"a": {"node-1"}}
+
+
+def test_text_exists():
+    jieba = Jieba(MagicMock())
+    with patch.object(jieba, "_get_dataset_keyword_table", return_value={"a": {"node-1"}, "b": {"node-2"}}):
+        assert jieba.text_exists("node-2")
+        assert not jieba.text_exists("node-3")
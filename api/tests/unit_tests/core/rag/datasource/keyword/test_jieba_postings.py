@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock, patch
+
+from core.rag.datasource.keyword.jieba.jieba_postings import JiebaPostings
+from core.rag.datasource.keyword.keyword_factory import Keyword
+from core.rag.datasource.keyword.keyword_type import KeyWordType
+from core.rag.models.document import Document
+
+
+def _dataset() -> MagicMock:
+    dataset = MagicMock()
+    dataset.id = "dataset-1"
+    return dataset
+
+
+def test_keyword_factory_returns_postings_backend():
+    assert Keyword.get_keyword_factory(KeyWordType.JIEBA_POSTINGS) is JiebaPostings
+
+
+def test_add_texts_writes_postings_only_for_new_chunks():
+    texts = [
+        Document(page_content="first", metadata={"doc_id": "node-1"}),
+        Document(page_content="second", metadata={"doc_id": "node-2"}),
+    ]
+    with patch("core.rag.datasource.keyword.jieba.jieba_postings.db") as mock_db:
+        mock_db.session.query.return_value.filter.return_value.all.return_value = []
+
+        JiebaPostings(_dataset()).add_texts(texts, keywords_list=[["a", "b"], ["b"]])
+
+    # one batched segment lookup and one batched insert, independent of the dataset size
+    assert mock_db.session.query.call_count == 1
+    assert mock_db.session.execute.call_count == 1
+    params = mock_db.session.execute.call_args.args[0].compile().params
+    postings = {(v, params[k.replace("keyword", "index_node_id")]) for k, v in params.items() if "keyword" in k}
+    assert postings == {("a", "node-1"), ("b", "node-1"), ("b", "node-2")}
+
+
+def test_search_without_query_keywords_skips_database():
+    with (
+        patch("core.rag.datasource.keyword.jieba.jieba_postings.db") as mock_db,
+        patch(
+            "core.rag.datasource.keyword.jieba.jieba_postings.JiebaKeywordTableHandler.extract_keywords",
+            return_value=set(),
+        ),
+    ):
+        assert JiebaPostings(_dataset()).search("的") == []
+
+    mock_db.session.execute.assert_not_called()
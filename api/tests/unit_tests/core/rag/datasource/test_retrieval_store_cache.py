@@ -0,0 +1,75 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from core.rag.datasource.retrieval_store_cache import RetrievalStoreCache
+from models.dataset import Dataset
+
+
+def _dataset(**kwargs) -> Dataset:
+    dataset = Dataset(
+        id="dataset-1",
+        tenant_id="tenant-1",
+        name="dataset",
+        indexing_technique="high_quality",
+        embedding_model_provider="openai",
+        embedding_model="text-embedding-3-small",
+        index_struct=json.dumps({"type": "qdrant", "vector_store": {"class_prefix": "Vector_index_1_Node"}}),
+    )
+    for key, value in kwargs.items():
+        setattr(dataset, key, value)
+    return dataset
+
+
+@pytest.fixture(autouse=True)
+def stores():
+    RetrievalStoreCache.clear()
+    with (
+        patch("core.rag.datasource.retrieval_store_cache.Vector", side_effect=lambda dataset: object()) as vector,
+        patch("core.rag.datasource.retrieval_store_cache.Keyword", side_effect=lambda dataset: object()) as keyword,
+        patch(
+            "core.rag.datasource.retrieval_store_cache.ProviderCredentialsCache.get_version", return_value=0
+        ) as get_version,
+    ):
+        yield vector, keyword, get_version
+    RetrievalStoreCache.clear()
+
+
+def test_vector_is_reused_for_same_dataset(stores):
+    vector_cls, _, _ = stores
+
+    first = RetrievalStoreCache.get_vector(_dataset())
+    assert RetrievalStoreCache.get_vector(_dataset()) is first
+    assert vector_cls.call_count == 1
+
+    cached_dataset = vector_cls.call_args.args[0]
+    assert cached_dataset.id == "dataset-1"
+    assert cached_dataset.embedding_model == "text-embedding-3-small"
+
+
+def test_vector_is_rebuilt_on_embedding_model_or_credentials_change(stores):
+    vector_cls, _, get_version = stores
+
+    first = RetrievalStoreCache.get_vector(_dataset())
+    assert RetrievalStoreCache.get_vector(_dataset(embedding_model="text-embedding-3-large")) is not first
+
+    get_version.return_value = 1
+    assert RetrievalStoreCache.get_vector(_dataset()) is not first
+    assert vector_cls.call_count == 3
+
+
+def test_vector_without_index_struct_is_not_cached(stores):
+    vector_cls, _, _ = stores
+
+    RetrievalStoreCache.get_vector(_dataset(index_struct=None))
+    RetrievalStoreCache.get_vector(_dataset(index_struct=None))
+    assert vector_cls.call_count == 2
+
+
+def test_keyword_is_reused_for_same_dataset(stores):
+    _, keyword_cls, _ = stores
+
+    first = RetrievalStoreCache.get_keyword(_dataset())
+    assert RetrievalStoreCache.get_keyword(_dataset()) is first
+    assert keyword_cls.call_count == 1
@@ -0,0 +1,78 @@
+from unittest.mock import MagicMock, patch
+
+import psycopg2.pool
+import pytest
+
+from core.rag.datasource.vdb import connection_pool
+from core.rag.datasource.vdb.connection_pool import get_pool_stats, get_psycopg2_pool
+
+
+def _new_connection(*args, **kwargs):
+    conn = MagicMock()
+    conn.closed = 0
+    return conn
+
+
+@pytest.fixture(autouse=True)
+def fake_connect():
+    with patch("psycopg2.connect", side_effect=_new_connection) as connect:
+        yield connect
+    connection_pool.close_all_pools()
+
+
+def test_pool_is_shared_per_config(fake_connect):
+    pool = get_psycopg2_pool(1, 2, host="localhost", port=5432, database="dify")
+
+    assert get_psycopg2_pool(1, 2, database="dify", port=5432, host="localhost") is pool
+    assert get_psycopg2_pool(1, 2, host="localhost", port=5432, database="other") is not pool
+    assert fake_connect.call_count == 2
+
+
+def test_closed_connection_is_replaced(fake_connect):
+    pool = get_psycopg2_pool(1, 2, host="localhost", port=5432, database="dify")
+    conn = pool.getconn()
+    conn.closed = 2
+    pool.putconn(conn)
+
+    new_conn = pool.getconn()
+    assert new_conn is not conn
+    assert not new_conn.closed
+    pool.putconn(new_conn)
+
+
+def test_idle_connection_is_pinged_and_replaced_when_dropped(fake_connect):
+    pool = get_psycopg2_pool(1, 2, host="localhost", port=5432, database="dify")
+    conn = pool.getconn()
+    pool.putconn(conn)
+
+    # recently returned connections are handed out without a ping
+    assert pool.getconn() is conn
+    conn.cursor.assert_not_called()
+    pool.putconn(conn)
+
+    with patch.object(connection_pool, "POOL_PING_IDLE_TIME", 0):
+        assert pool.getconn() is conn
+        conn.cursor.return_value.__enter__.return_value.execute.assert_called_once_with("SELECT 1")
+        pool.putconn(conn)
+
+        # the server dropped the connection, the ping fails
+        conn.cursor.side_effect = psycopg2.OperationalError("server closed the connection unexpectedly")
+        new_conn = pool.getconn()
+
+    assert new_conn is not conn
+    conn.close.assert_called_once()
+    pool.putconn(new_conn)
+
+
+def test_getconn_waits_for_free_connection(fake_connect):
+    pool = get_psycopg2_pool(1, 1, host="localhost", port=5432, database="dify")
+    conn = pool.getconn()
+    assert get_pool_stats() == [
+        {"host": "localhost:5432/dify", "min_connection": 1, "max_connection": 1, "in_use": 1, "idle": 0}
+    ]
+
+    with patch.object(connection_pool, "POOL_TIMEOUT", 0.01), pytest.raises(psycopg2.pool.PoolError):
+        pool.getconn()
+
+    pool.putconn(conn)
+    assert pool.getconn() is conn
@@ -0,0 +1,92 @@
+from unittest.mock import MagicMock, patch
+
+from core.rag.embedding.cached_embedding import CacheEmbedding
+from libs import helper
+from models.dataset import Embedding, encode_embedding
+
+
+def _mock_model_instance() -> MagicMock:
+    model_instance = MagicMock()
+    model_instance.model = "text-embedding-3-small"
+    model_instance.provider = "openai"
+    model_instance.model_type_instance.get_model_schema.return_value = None
+    model_instance.invoke_text_embedding.side_effect = lambda texts, **kwargs: MagicMock(
+        embeddings=[[3.0, 4.0] for _ in texts]
+    )
+    return model_instance
+
+
+def _cached_row(text: str, vector: list[float]) -> Embedding:
+    embedding = Embedding(
+        model_name="text-embedding-3-small", hash=helper.generate_text_hash(text), provider_name="openai"
+    )
+    embedding.set_embedding(vector)
+    return embedding
+
+
+def test_embed_documents_probes_cache_in_one_query():
+    model_instance = _mock_model_instance()
+    with patch("core.rag.embedding.cached_embedding.db") as mock_db:
+        mock_db.session.query.return_value.filter.return_value.all.return_value = [
+            _cached_row("cached", [1.0, 0.0]),
+        ]
+
+        result = CacheEmbedding(model_instance).embed_documents(["cached", "new", "cached", "new"])
+
+    assert result == [[1.0, 0.0], [0.6, 0.8], [1.0, 0.0], [0.6, 0.8]]
+    assert mock_db.session.query.call_count == 1
+    assert model_instance.invoke_text_embedding.call_count == 2
+    # both misses are upserted with a single statement
+    assert mock_db.session.execute.call_count == 1
+    mock_db.session.commit.assert_called_once()
+
+
+def test_embed_documents_all_cached_skips_model_and_insert():
+    model_instance = _mock_model_instance()
+    with patch("core.rag.embedding.cached_embedding.db") as mock_db:
+        mock_db.session.query.return_value.filter.return_value.all.return_value = [
+            _cached_row("a", [1.0, 0.0]),
+            _cached_row("b", [0.0, 1.0]),
+        ]
+
+        result = CacheEmbedding(model_instance).embed_documents(["b", "a"])
+
+    assert result == [[0.0, 1.0], [1.0, 0.0]]
+    model_instance.invoke_text_embedding.assert_not_called()
+    mock_db.session.execute.assert_not_called()
+
+
+def test_embed_query_uses_local_cache_before_redis():
+    model_instance = _mock_model_instance()
+    mock_redis = MagicMock()
+    with (
+        patch("core.rag.embedding.cached_embedding.redis_client", mock_redis),
+        patch.object(CacheEmbedding, "_local_query_cache", {}),
+    ):
+        mock_redis.get.return_value = None
+        cache_embedding = CacheEmbedding(model_instance)
+
+        first = cache_embedding.embed_query("query")
+        second = cache_embedding.embed_query("query")
+
+    assert first == second == [0.6, 0.8]
+    assert model_instance.invoke_text_embedding.call_count == 1
+    assert mock_redis.get.call_count == 1
+    mock_redis.setex.assert_called_once()
+    mock_redis.expire.assert_not_called()
+
+
+def test_embed_query_decodes_redis_hit():
+    model_instance = _mock_model_instance()
+    mock_redis = MagicMock()
+    with (
+        patch("core.rag.embedding.cached_embedding.redis_client", mock_redis),
+        patch.object(CacheEmbedding, "_local_query_cache", {}),
+    ):
+        mock_redis.get.return_value = encode_embedding([0.5, 0.25])
+
+        result = CacheEmbedding(model_instance).embed_query("query")
+
+    assert result == [0.5, 0.25]
+    model_instance.invoke_text_embedding.assert_not_called()
+    mock_redis.setex.assert_not_called()
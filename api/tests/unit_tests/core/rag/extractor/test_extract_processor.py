@@ -0,0 +1,35 @@
+from unittest.mock import MagicMock, Mock, patch
+
+from core.rag.extractor.entity.extract_setting import ExtractSetting
+from core.rag.extractor.extract_processor import ExtractProcessor
+from core.rag.models.document import Document
+from models.model import UploadFile
+
+
+def _extract_setting(key: str, content_hash: str | None) -> ExtractSetting:
+    upload_file = Mock(spec=UploadFile, key=key, hash=content_hash, tenant_id="tenant_id")
+    return ExtractSetting.model_construct(
+        datasource_type="upload_file", upload_file=upload_file, document_model="text_model"
+    )
+
+
+def test_extract_caches_documents_of_upload_files():
+    stored: dict[str, bytes] = {}
+    mock_redis = MagicMock()
+    mock_redis.get.side_effect = stored.get
+    mock_redis.setex.side_effect = lambda key, ttl, value: stored.__setitem__(key, value)
+    documents = [Document(page_content="page 1", metadata={"page": 0}), Document(page_content="page 2")]
+
+    with (
+        patch("core.helper.extraction_cache.redis_client", new=mock_redis),
+        patch.object(ExtractProcessor, "_extract", Mock(return_value=documents)) as mock_extract,
+    ):
+        assert ExtractProcessor.extract(_extract_setting("upload_files/a.pdf", "hash")) == documents
+        assert ExtractProcessor.extract(_extract_setting("upload_files/b.pdf", "hash")) == documents
+        mock_extract.assert_called_once()
+
+        # files without a recorded hash and docx files are not cached
+        ExtractProcessor.extract(_extract_setting("upload_files/c.pdf", None))
+        ExtractProcessor.extract(_extract_setting("upload_files/d.docx", "hash"))
+        ExtractProcessor.extract(_extract_setting("upload_files/d.docx", "hash"))
+        assert mock_extract.call_count == 4
@@ -0,0 +1,69 @@
+import math
+from collections import Counter
+
+import pytest
+
+from core.rag.rerank.scoring import (
+    calculate_cosine_similarities,
+    calculate_tfidf_similarities,
+    reciprocal_rank_fusion,
+)
+
+
+def _reference_tfidf_similarities(query_keywords, documents_keywords):
+    total_documents = len(documents_keywords)
+    all_keywords = set().union(*documents_keywords)
+    keyword_idf = {
+        keyword: math.log((1 + total_documents) / (1 + sum(1 for doc in documents_keywords if keyword in doc))) + 1
+        for keyword in all_keywords
+    }
+
+    def tfidf(keywords):
+        return {keyword: count * keyword_idf.get(keyword, 0) for keyword, count in Counter(keywords).items()}
+
+    query_tfidf = tfidf(query_keywords)
+    similarities = []
+    for document_keywords in documents_keywords:
+        document_tfidf = tfidf(document_keywords)
+        numerator = sum(query_tfidf[k] * document_tfidf[k] for k in set(query_tfidf) & set(document_tfidf))
+        denominator = math.sqrt(sum(v**2 for v in query_tfidf.values())) * math.sqrt(
+            sum(v**2 for v in document_tfidf.values())
+        )
+        similarities.append(numerator / denominator if denominator else 0.0)
+    return similarities
+
+
+def test_tfidf_similarities_match_reference():
+    query_keywords = {"dify", "workflow", "missing"}
+    documents_keywords = [
+        {"dify", "workflow", "engine"},
+        {"dify", "rag"},
+        {"unrelated"},
+        {"workflow", "node", "engine", "graph"},
+    ]
+
+    similarities = calculate_tfidf_similarities(query_keywords, documents_keywords)
+
+    assert similarities == pytest.approx(_reference_tfidf_similarities(query_keywords, documents_keywords))
+    assert similarities[2] == 0.0
+
+
+def test_tfidf_similarities_without_matches():
+    assert calculate_tfidf_similarities({"a"}, [{"b"}, set()]) == [0.0, 0.0]
+    assert calculate_tfidf_similarities({"a"}, []) == []
+
+
+def test_cosine_similarities():
+    similarities = calculate_cosine_similarities([1.0, 0.0], [[1.0, 0.0], [0.0, 2.0], [1.0, 1.0]])
+
+    assert similarities == pytest.approx([1.0, 0.0, math.sqrt(0.5)])
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"], []], k=1)
+
+    assert [item_id for item_id, _ in fused] == ["b", "a", "d", "c"]
+    assert dict(fused)["b"] == pytest.approx(1 / 3 + 1 / 2)
+    assert dict(fused)["c"] == pytest.approx(1 / 4)
+    assert reciprocal_rank_fusion([]) == []
+    assert reciprocal_rank_fusion([[], []]) == []
@@ -0,0 +1,31 @@
+from unittest.mock import MagicMock, patch
+
+from core.rag.models.document import Document
+from core.rag.rerank.entity.weight import KeywordSetting, VectorSetting, Weights
+from core.rag.rerank.weight_rerank import WeightRerankRunner
+
+
+def _weights() -> Weights:
+    return Weights(
+        vector_setting=VectorSetting(
+            vector_weight=0.5, embedding_provider_name="openai", embedding_model_name="text-embedding-3-small"
+        ),
+        keyword_setting=KeywordSetting(keyword_weight=0.5),
+    )
+
+
+def test_rerank_documents_without_doc_id():
+    documents = [
+        Document(page_content="dify rerank", metadata={"score": 0.9}, provider="external"),
+        Document(page_content="other text", metadata={"score": 0.1}, provider="external"),
+        Document(page_content="dify", metadata={"doc_id": "1", "score": 0.5}),
+        Document(page_content="dify", metadata={"doc_id": "1", "score": 0.5}),
+    ]
+
+    keyword_table_handler = MagicMock()
+    keyword_table_handler.extract_keywords.side_effect = lambda text, max_keywords: text.split()
+    with patch("core.rag.rerank.weight_rerank.JiebaKeywordTableHandler", return_value=keyword_table_handler):
+        reranked = WeightRerankRunner("tenant_id", _weights()).run("dify rerank", documents)
+
+    assert [document.page_content for document in reranked] == ["dify rerank", "dify", "other text"]
+    assert reranked[0].metadata["keywords"] == ["dify", "rerank"]
@@ -0,0 +1,66 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from flask import Flask
+
+from core.rag.models.document import Document
+from core.rag.retrieval.dataset_retrieval import DatasetRetrieval
+
+
+def _make_dataset(dataset_id: str):
+    dataset = MagicMock()
+    dataset.id = dataset_id
+    dataset.provider = "vendor"
+    dataset.indexing_technique = "economy"
+    return dataset
+
+
+def test_multiple_retrieve_returns_partial_results():
+    released = threading.Event()
+
+    def retrieve_dataset(flask_app, dataset_id, **kwargs):
+        if dataset_id == "slow":
+            released.wait(5)
+        if dataset_id == "broken":
+            raise ValueError("vector store unavailable")
+        return [Document(page_content=dataset_id, metadata={"score": 1.0})]
+
+    datasets = [_make_dataset(dataset_id) for dataset_id in ("first", "slow", "broken", "last")]
+    with (
+        Flask(__name__).app_context(),
+        patch.object(DatasetRetrieval, "_retrieve_dataset", side_effect=retrieve_dataset),
+        patch.object(DatasetRetrieval, "_on_query"),
+        patch.object(DatasetRetrieval, "_on_retrieval_end"),
+        patch("core.rag.retrieval.dataset_retrieval.dify_config.DATASET_RETRIEVAL_TIMEOUT", 1),
+    ):
+        documents = DatasetRetrieval().multiple_retrieve(
+            app_id="app",
+            tenant_id="tenant",
+            user_id="user",
+            user_from="account",
+            available_datasets=datasets,
+            query="query",
+            top_k=4,
+            score_threshold=0.0,
+            reranking_mode="reranking_model",
+            reranking_enable=False,
+        )
+    released.set()
+
+    assert [document.page_content for document in documents] == ["first", "last"]
+
+
+def test_calculate_keyword_score_ranks_matching_documents_first():
+    documents = [
+        Document(page_content="apple banana", metadata={}),
+        Document(page_content="cherry", metadata={}),
+        Document(page_content="apple", metadata={}),
+    ]
+    keywords = {"apple banana": {"apple", "banana"}, "cherry": {"cherry"}, "apple": {"apple"}, "query": {"apple"}}
+    with patch("core.rag.retrieval.dataset_retrieval.JiebaKeywordTableHandler") as handler_class:
+        handler_class.return_value.extract_keywords.side_effect = lambda text, _: keywords[text]
+        ranked = DatasetRetrieval().calculate_keyword_score("query", documents, top_k=2)
+
+    assert [document.page_content for document in ranked] == ["apple", "apple banana"]
+    assert ranked[0].metadata["score"] == 1.0
+    assert ranked[0].metadata["keywords"] == {"apple"}
@@ -0,0 +1,90 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask import Flask
+
+from core.indexing_runner import IndexingRunner
+from core.rag.models.document import Document
+
+
+def _make_runner(events: list, lock: threading.Lock):
+    runner = object.__new__(IndexingRunner)
+    runner.model_manager = MagicMock()
+
+    def transform(index_processor, dataset, text_docs, doc_language, process_rule):
+        with lock:
+            events.append(("transform", [doc.page_content for doc in text_docs]))
+        return [
+            Document(page_content=f"{doc.page_content}-chunk", metadata={"doc_id": f"{doc.page_content}-chunk"})
+            for doc in text_docs
+        ]
+
+    def process_chunk(flask_app, index_processor, chunk_documents, dataset, dataset_document, embedding_model_instance):
+        with lock:
+            events.append(("load", [doc.page_content for doc in chunk_documents]))
+        return len(chunk_documents)
+
+    runner._transform = MagicMock(side_effect=transform)
+    runner._process_chunk = MagicMock(side_effect=process_chunk)
+    runner._process_keyword_index = MagicMock(return_value=None)
+    runner._load_segment_batch = MagicMock()
+    runner._update_document_index_status = MagicMock()
+    return runner
+
+
+@patch("core.indexing_runner.dify_config.INDEXING_PIPELINE_MAX_PENDING_BATCHES", 1)
+@patch("core.indexing_runner.dify_config.INDEXING_PIPELINE_BATCH_SIZE", 2)
+@patch("core.indexing_runner.dify_config.INDEXING_LOAD_MAX_WORKERS", 3)
+def test_pipeline_indexes_pages_in_bounded_batches():
+    events: list = []
+    runner = _make_runner(events, threading.Lock())
+    dataset = MagicMock(indexing_technique="high_quality")
+    dataset_document = MagicMock(id="document")
+    text_docs = [Document(page_content=f"page{i}", metadata={}) for i in range(7)]
+
+    with Flask(__name__).app_context():
+        runner._run_pipeline(MagicMock(), dataset, dataset_document, text_docs, process_rule={})
+
+    transformed = [pages for event, pages in events if event == "transform"]
+    assert transformed == [["page0", "page1"], ["page2", "page3"], ["page4", "page5"], ["page6"]]
+    loaded = sorted(chunk for event, chunks in events if event == "load" for chunk in chunks)
+    assert loaded == sorted(f"page{i}-chunk" for i in range(7))
+    assert runner._load_segment_batch.call_count == 4
+    assert runner._process_keyword_index.call_count == 4
+
+    # the first batch is loaded before the third one is split
+    first_batch_loaded = max(
+        i
+        for i, (event, chunks) in enumerate(events)
+        if event == "load" and set(chunks) & {"page0-chunk", "page1-chunk"}
+    )
+    assert first_batch_loaded < events.index(("transform", ["page4", "page5"]))
+
+    completed = runner._update_document_index_status.call_args_list[-1].kwargs
+    assert completed["after_indexing_status"] == "completed"
+    assert 7 in completed["extra_update_params"].values()
+
+
+@patch("core.indexing_runner.dify_config.INDEXING_PIPELINE_BATCH_SIZE", 2)
+def test_pipeline_stops_on_load_errors():
+    runner = _make_runner([], threading.Lock())
+    runner._process_chunk.side_effect = ValueError("embedding failed")
+    dataset = MagicMock(indexing_technique="high_quality")
+    text_docs = [Document(page_content=f"page{i}", metadata={}) for i in range(4)]
+
+    with Flask(__name__).app_context(), pytest.raises(ValueError):
+        runner._run_pipeline(MagicMock(), dataset, MagicMock(id="document"), text_docs, process_rule={})
+
+    statuses = [call.kwargs["after_indexing_status"] for call in runner._update_document_index_status.call_args_list]
+    assert "completed" not in statuses
+
+
+def test_group_documents_by_hash_keeps_same_content_together():
+    documents = [Document(page_content=content, metadata={}) for content in ("a", "b", "a", "c", "b")]
+
+    groups = IndexingRunner._group_documents_by_hash(documents, 4)
+
+    assert sum(len(group) for group in groups) == 5
+    for content in ("a", "b", "c"):
+        assert sum(1 for group in groups if any(doc.page_content == content for doc in group)) == 1
@@ -0,0 +1,37 @@
+import asyncio
+import contextvars
+
+import pytest
+
+from core.workflow.graph_engine.event_loop import AwaitRequest, WorkflowEventLoop
+
+request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id")
+
+
+def test_await_request_runs_coroutine_in_given_context():
+    async def read_request_id():
+        await asyncio.sleep(0)
+        return request_id.get()
+
+    context = contextvars.copy_context()
+    context.run(request_id.set, "abc")
+    request = AwaitRequest(read_request_id())
+
+    WorkflowEventLoop.get_instance().submit(request.resolve(context)).result(timeout=5)
+
+    assert request.result() == "abc"
+
+
+def test_await_request_reraises_coroutine_error():
+    async def fail():
+        raise ValueError("boom")
+
+    request = AwaitRequest(fail())
+    WorkflowEventLoop.get_instance().submit(request.resolve(contextvars.copy_context())).result(timeout=5)
+
+    with pytest.raises(ValueError, match="boom"):
+        request.result()
+
+
+def test_event_loop_is_shared():
+    assert WorkflowEventLoop.get_instance() is WorkflowEventLoop.get_instance()
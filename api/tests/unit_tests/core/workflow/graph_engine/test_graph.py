@@ -789,3 +789,42 @@ def test_parallels_graph6():
 
     for node_id in ["code1", "code2"]:
         assert graph.node_parallel_mapping[node_id] == child_parallel.id
+
+
+def _simple_graph_config():
+    return {
+        "edges": [
+            {"id": "start-source-llm-target", "source": "start", "target": "llm"},
+            {"id": "llm-source-answer-target", "source": "llm", "target": "answer"},
+            {"id": "iteration-start-source-tt-target", "source": "iteration-start", "target": "tt"},
+        ],
+        "nodes": [
+            {"data": {"type": "start"}, "id": "start"},
+            {"data": {"type": "llm"}, "id": "llm"},
+            {"data": {"type": "answer", "title": "answer", "answer": "1"}, "id": "answer"},
+            {"data": {"type": "iteration-start"}, "id": "iteration-start"},
+            {"data": {"type": "template-transform"}, "id": "tt"},
+        ],
+    }
+
+
+def test_get_or_init_shares_compiled_graph_of_workflow_version():
+    graph = Graph.get_or_init(graph_config=_simple_graph_config(), cache_key=("workflow-1", "hash-1"))
+
+    assert Graph.get_or_init(graph_config=_simple_graph_config(), cache_key=("workflow-1", "hash-1")) is graph
+    assert Graph.get_or_init(graph_config=_simple_graph_config(), cache_key=("workflow-1", "hash-2")) is not graph
+    sub_graph = Graph.get_or_init(
+        graph_config=_simple_graph_config(), cache_key=("workflow-1", "hash-1"), root_node_id="iteration-start"
+    )
+    assert sub_graph is not graph
+    assert sub_graph.node_ids == ["iteration-start", "tt"]
+
+
+def test_get_sub_graph_is_initialized_once():
+    graph_config = _simple_graph_config()
+    graph = Graph.init(graph_config=graph_config)
+
+    sub_graph = graph.get_sub_graph(graph_config=graph_config, root_node_id="iteration-start")
+
+    assert sub_graph.root_node_id == "iteration-start"
+    assert graph.get_sub_graph(graph_config=graph_config, root_node_id="iteration-start") is sub_graph
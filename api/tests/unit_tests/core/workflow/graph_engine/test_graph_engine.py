@@ -1,5 +1,8 @@
+import asyncio
+import threading
 from unittest.mock import patch
 
+import httpx
 import pytest
 from flask import Flask
 
@@ -21,8 +24,11 @@ from core.workflow.graph_engine.entities.event import (
 from core.workflow.graph_engine.entities.graph import Graph
 from core.workflow.graph_engine.entities.runtime_route_state import RouteNodeState
 from core.workflow.graph_engine.graph_engine import GraphEngine
+from core.workflow.graph_engine.scheduler import GraphEngineScheduler
 from core.workflow.nodes.code.code_node import CodeNode
 from core.workflow.nodes.event import RunCompletedEvent, RunStreamChunkEvent
+from core.workflow.nodes.http_request.entities import Response
+from core.workflow.nodes.http_request.executor import Executor
 from core.workflow.nodes.llm.node import LLMNode
 from core.workflow.nodes.question_classifier.question_classifier_node import QuestionClassifierNode
 from models.enums import UserFrom
@@ -873,3 +879,146 @@ def test_condition_parallel_correct_output(mock_close, mock_remove, app):
                         assert item.outputs is not None
                         answer = item.outputs["answer"]
                         assert all(rc not in answer for rc in wrong_content)
+
+
+def _run_nested_parallel_chatflow() -> list[tuple[str, str | None]]:
+    graph_config = {
+        "edges": [
+            {"id": "1", "source": "start", "target": "answer1"},
+            {"id": "2", "source": "answer1", "target": "answer2"},
+            {"id": "3", "source": "answer1", "target": "answer3"},
+            {"id": "4", "source": "answer2", "target": "answer4"},
+            {"id": "5", "source": "answer2", "target": "answer5"},
+        ],
+        "nodes": [
+            {"data": {"type": "start", "title": "start"}, "id": "start"},
+            *(
+                {"data": {"type": "answer", "title": f"answer{i}", "answer": str(i)}, "id": f"answer{i}"}
+                for i in range(1, 6)
+            ),
+        ],
+    }
+
+    graph_engine = GraphEngine(
+        tenant_id="111",
+        app_id="222",
+        workflow_type=WorkflowType.CHAT,
+        workflow_id="333",
+        graph_config=graph_config,
+        user_id="444",
+        user_from=UserFrom.ACCOUNT,
+        invoke_from=InvokeFrom.WEB_APP,
+        call_depth=0,
+        graph=Graph.init(graph_config=graph_config),
+        variable_pool=VariablePool(
+            system_variables={
+                SystemVariableKey.QUERY: "what's the weather in SF",
+                SystemVariableKey.FILES: [],
+                SystemVariableKey.CONVERSATION_ID: "abababa",
+                SystemVariableKey.USER_ID: "aaa",
+            },
+            user_inputs={},
+        ),
+        max_execution_steps=500,
+        max_execution_time=1200,
+    )
+
+    items = list(graph_engine.run())
+    assert isinstance(items[-1], GraphRunSucceededEvent)
+    return [
+        (type(item).__name__, item.route_node_state.node_id if isinstance(item, BaseNodeEvent) else None)
+        for item in items
+    ]
+
+
+@patch("extensions.ext_database.db.session.remove")
+@patch("extensions.ext_database.db.session.close")
+def test_run_nested_parallel_on_event_loop(mock_close, mock_remove):
+    thread_events = _run_nested_parallel_chatflow()
+    with patch("core.workflow.graph_engine.graph_engine.dify_config.WORKFLOW_ASYNC_EXECUTION_ENABLED", True):
+        event_loop_events = _run_nested_parallel_chatflow()
+
+    assert sorted(event_loop_events, key=str) == sorted(thread_events, key=str)
+
+
+@patch("extensions.ext_database.db.session.remove")
+@patch("extensions.ext_database.db.session.close")
+def test_http_request_branches_do_not_hold_a_thread_on_event_loop(mock_close, mock_remove):
+    graph_config = {
+        "edges": [
+            {"id": "1", "source": "start", "target": "http1"},
+            {"id": "2", "source": "start", "target": "http2"},
+            {"id": "3", "source": "http1", "target": "end1"},
+            {"id": "4", "source": "http2", "target": "end2"},
+        ],
+        "nodes": [
+            {"data": {"type": "start", "title": "start", "variables": []}, "id": "start"},
+            *(
+                {
+                    "data": {
+                        "type": "http-request",
+                        "title": f"http{i}",
+                        "method": "get",
+                        "url": f"http://example.com/{i}",
+                        "authorization": {"type": "no-auth"},
+                        "headers": "",
+                        "params": "",
+                    },
+                    "id": f"http{i}",
+                }
+                for i in (1, 2)
+            ),
+            *(
+                {
+                    "data": {
+                        "type": "end",
+                        "title": f"end{i}",
+                        "outputs": [{"value_selector": [f"http{i}", "body"], "variable": f"body{i}"}],
+                    },
+                    "id": f"end{i}",
+                }
+                for i in (1, 2)
+            ),
+        ],
+    }
+
+    # both requests must be in flight at once, with a single scheduler thread for both branches
+    both_in_flight = asyncio.Barrier(2)
+    request_threads = set()
+
+    async def ainvoke(self):
+        request_threads.add(threading.current_thread().name)
+        await asyncio.wait_for(both_in_flight.wait(), timeout=5)
+        return Response(httpx.Response(200, text=self.url, request=httpx.Request("GET", self.url)))
+
+    scheduler = GraphEngineScheduler(max_workers=1, max_workers_per_tenant=1, max_queue_size=10)
+    with (
+        patch("core.workflow.graph_engine.graph_engine.dify_config.WORKFLOW_ASYNC_EXECUTION_ENABLED", True),
+        patch.object(GraphEngineScheduler, "_instance", scheduler),
+        patch.object(Executor, "ainvoke", new=ainvoke),
+    ):
+        graph_engine = GraphEngine(
+            tenant_id="111",
+            app_id="222",
+            workflow_type=WorkflowType.WORKFLOW,
+            workflow_id="333",
+            graph_config=graph_config,
+            user_id="444",
+            user_from=UserFrom.ACCOUNT,
+            invoke_from=InvokeFrom.WEB_APP,
+            call_depth=0,
+            graph=Graph.init(graph_config=graph_config),
+            variable_pool=VariablePool(system_variables={SystemVariableKey.USER_ID: "aaa"}, user_inputs={}),
+            max_execution_steps=500,
+            max_execution_time=1200,
+        )
+        items = list(graph_engine.run())
+
+    assert not [item for item in items if isinstance(item, NodeRunFailedEvent | GraphRunFailedEvent)]
+    assert isinstance(items[-1], GraphRunSucceededEvent)
+    assert {
+        item.route_node_state.node_id: item.route_node_state.node_run_result.outputs["body"]
+        for item in items
+        if isinstance(item, NodeRunSucceededEvent) and item.route_node_state.node_id.startswith("http")
+    } == {"http1": "http://example.com/1", "http2": "http://example.com/2"}
+    assert request_threads == {"workflow_event_loop"}
@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+from core.workflow.graph_engine.scheduler import GraphEngineScheduler, GraphEngineSchedulerSaturatedError
+
+
+def test_group_quota_limits_running_tasks():
+    scheduler = GraphEngineScheduler(max_workers=4, max_workers_per_tenant=4, max_queue_size=10)
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def task():
+        started.release()
+        release.wait(5)
+
+    futures = [scheduler.submit(task, tenant_id="t", group_id="run", max_running=2) for _ in range(3)]
+    started.acquire(timeout=5)
+    started.acquire(timeout=5)
+
+    stats = scheduler.stats()
+    assert stats["running"] == 2
+    assert stats["queued"] == 1
+
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert scheduler.stats()["queued"] == 0
+
+
+def test_full_queue_raises_saturated_error():
+    scheduler = GraphEngineScheduler(max_workers=1, max_workers_per_tenant=1, max_queue_size=1)
+    release = threading.Event()
+
+    running = scheduler.submit(release.wait, tenant_id="t", group_id="run", max_running=1, timeout=5)
+    queued = scheduler.submit(release.wait, tenant_id="t", group_id="run", max_running=1, timeout=5)
+    with pytest.raises(GraphEngineSchedulerSaturatedError):
+        scheduler.submit(release.wait, tenant_id="t", group_id="run", max_running=1, timeout=5)
+
+    release.set()
+    assert running.result(timeout=5)
+    assert queued.result(timeout=5)
+
+
+def test_nested_submit_from_worker_runs_inline_when_saturated():
+    scheduler = GraphEngineScheduler(max_workers=1, max_workers_per_tenant=1, max_queue_size=1)
+
+    def child():
+        return threading.current_thread().name
+
+    def parent():
+        # the only worker is busy with this task, so the child must run in this thread
+        nested = scheduler.submit(child, tenant_id="t", group_id="run", max_running=1)
+        return threading.current_thread().name, nested.result(timeout=5)
+
+    parent_thread, child_thread = scheduler.submit(parent, tenant_id="t", group_id="run", max_running=1).result(
+        timeout=5
+    )
+    assert parent_thread == child_thread
+    assert scheduler.stats()["inline"] == 1
+
+
+def test_tenants_are_dispatched_round_robin():
+    scheduler = GraphEngineScheduler(max_workers=1, max_workers_per_tenant=1, max_queue_size=10)
+    release = threading.Event()
+    order: list[str] = []
+
+    blocker = scheduler.submit(release.wait, tenant_id="a", group_id="a-run", max_running=1, timeout=5)
+
+    def task(name: str):
+        order.append(name)
+
+    futures = [
+        scheduler.submit(task, tenant_id=tenant_id, group_id=f"{tenant_id}-run", max_running=1, name=tenant_id)
+        for tenant_id in ("a", "a", "b")
+    ]
+
+    release.set()
+    blocker.result(timeout=5)
+    for future in futures:
+        future.result(timeout=5)
+    assert order == ["a", "b", "a"]
+
+
+def test_slot_is_released_before_the_future_is_resolved():
+    scheduler = GraphEngineScheduler(max_workers=1, max_workers_per_tenant=1, max_queue_size=1)
+    release = threading.Event()
+    running_in_callback: list[int] = []
+
+    future = scheduler.submit(release.wait, tenant_id="t", group_id="run", max_running=1, timeout=5)
+    future.add_done_callback(lambda f: running_in_callback.append(scheduler.stats()["running"]))
+    release.set()
+    future.result(timeout=5)
+
+    # callbacks may submit the next task of the group, it must be able to take the freed slot
+    assert running_in_callback == [0]
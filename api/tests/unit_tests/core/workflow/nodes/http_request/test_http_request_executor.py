@@ -1,3 +1,8 @@
+import asyncio
+
+import httpx
+
+from core.helper import ssrf_proxy
 from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.nodes.http_request import (
     BodyData,
@@ -336,3 +341,32 @@ def test_init_params():
     executor = create_executor("key1:value1\n\nkey2:value2\n\n")
     executor._init_params()
     assert executor.params == [("key1", "value1"), ("key2", "value2")]
+
+
+def test_ainvoke_sends_request_through_async_ssrf_proxy(monkeypatch):
+    variable_pool = VariablePool(system_variables={}, user_inputs={})
+    node_data = HttpRequestNodeData(
+        title="Test async invoke",
+        method="get",
+        url="https://api.example.com/data",
+        authorization=HttpRequestNodeAuthorization(type="no-auth"),
+        headers="X-Test: 1",
+        params="q:dify",
+    )
+    executor = Executor(
+        node_data=node_data,
+        timeout=HttpRequestNodeTimeout(connect=10, read=30, write=30),
+        variable_pool=variable_pool,
+    )
+
+    requests = []
+
+    async def amake_request(method, url, **kwargs):
+        requests.append((method, url, kwargs["headers"], kwargs["params"]))
+        return httpx.Response(200, text="ok", request=httpx.Request(method, url))
+
+    monkeypatch.setattr(ssrf_proxy, "amake_request", amake_request)
+    response = asyncio.run(executor.ainvoke())
+
+    assert response.text == "ok"
+    assert requests == [("GET", "https://api.example.com/data", {"X-Test": "1"}, [("q", "dify")])]
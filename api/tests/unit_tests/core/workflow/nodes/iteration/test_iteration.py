@@ -1,6 +1,11 @@
+import threading
 import time
 import uuid
-from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask import Flask
 
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.workflow.entities.node_entities import NodeRunResult
@@ -10,8 +15,10 @@ from core.workflow.enums import SystemVariableKey
 from core.workflow.graph_engine.entities.graph import Graph
 from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
 from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
+from core.workflow.graph_engine.scheduler import GraphEngineScheduler
 from core.workflow.nodes.event import RunCompletedEvent
 from core.workflow.nodes.iteration.entities import ErrorHandleMode
+from core.workflow.nodes.iteration.exc import IterationNodeError
 from core.workflow.nodes.iteration.iteration_node import IterationNode
 from core.workflow.nodes.template_transform.template_transform_node import TemplateTransformNode
 from models.enums import UserFrom
@@ -859,3 +866,151 @@ def test_iteration_run_error_handle():
             assert item.run_result.status == WorkflowNodeExecutionStatus.SUCCEEDED
             assert item.run_result.outputs == {"output": []}
     assert count == 14
+
+
+def _make_parallel_iteration_node(parallel_nums: int) -> IterationNode:
+    node = object.__new__(IterationNode)
+    node.tenant_id = "tenant"
+    node.node_id = "iteration"
+    node.node_data = MagicMock(parallel_nums=parallel_nums)
+    return node
+
+
+def _run_parallel_iters(node: IterationNode, items: list):
+    with Flask(__name__).app_context():
+        return list(
+            node._run_parallel_iters(
+                iterator_list_value=items,
+                inputs={},
+                outputs=[None] * len(items),
+                start_at=MagicMock(),
+                graph_engine=MagicMock(),
+                iteration_graph=MagicMock(),
+                iter_run_map={},
+            )
+        )
+
+
+def test_parallel_iteration_keeps_a_window_of_items_in_flight():
+    running = 0
+    max_running = 0
+    started: list[int] = []
+    lock = threading.Lock()
+
+    def run_item(*, q, index, item, **kwargs):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+            started.append(index)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        q.put(f"event-{item}")
+
+    node = _make_parallel_iteration_node(parallel_nums=3)
+    items = list(range(50))
+    with (
+        patch.object(IterationNode, "_run_single_iter_parallel", side_effect=run_item),
+        patch("core.workflow.nodes.iteration.iteration_node.dify_config.MAX_SUBMIT_COUNT", 5),
+    ):
+        events = _run_parallel_iters(node, items)
+
+    assert sorted(events) == sorted(f"event-{item}" for item in items)
+    assert sorted(started) == items
+    assert max_running <= 3
+
+
+def test_parallel_iteration_fails_when_an_item_raises():
+    def run_item(*, q, index, item, **kwargs):
+        if index == 1:
+            raise ValueError("boom")
+
+    node = _make_parallel_iteration_node(parallel_nums=2)
+    with (
+        patch.object(IterationNode, "_run_single_iter_parallel", side_effect=run_item),
+        pytest.raises(IterationNodeError, match="boom"),
+    ):
+        _run_parallel_iters(node, list(range(10)))
+
+
+class _SingleWorkerThreadPool(ThreadPoolExecutor):
+    def __init__(self, **kwargs):
+        super().__init__(max_workers=1)
+
+    def task_done_callback(self, future):
+        pass
+
+
+def test_parallel_iteration_cancels_pending_items_when_an_item_raises():
+    started: list[int] = []
+    release = threading.Event()
+
+    def run_item(*, q, index, item, **kwargs):
+        started.append(index)
+        if index == 0:
+            raise ValueError("boom")
+        # the only worker may pick up the next item before the failure is seen, keep it busy
+        release.wait(timeout=1)
+
+    node = _make_parallel_iteration_node(parallel_nums=3)
+    try:
+        with (
+            patch.object(IterationNode, "_run_single_iter_parallel", side_effect=run_item),
+            patch("core.workflow.graph_engine.graph_engine.GraphEngineThreadPool", _SingleWorkerThreadPool),
+            pytest.raises(IterationNodeError, match="boom"),
+        ):
+            _run_parallel_iters(node, list(range(10)))
+    finally:
+        release.set()
+
+    # the window holds items 0 to 2, item 2 is cancelled before it runs and later items are never taken
+    assert started[0] == 0
+    assert set(started) <= {0, 1}
+
+
+def test_parallel_iteration_inside_a_parallel_branch_keeps_its_window_parallel():
+    scheduler = GraphEngineScheduler(max_workers=4, max_workers_per_tenant=4, max_queue_size=10)
+    running = 0
+    max_running = 0
+    item_threads: set[str] = set()
+    lock = threading.Lock()
+
+    def run_item(*, q, index, item, **kwargs):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+            item_threads.add(threading.current_thread().name)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        q.put(f"event-{item}")
+
+    def run_branch():
+        # the iteration consumes its events on a scheduler worker, like any node of a parallel branch
+        return threading.current_thread().name, _run_parallel_iters(node, items)
+
+    release = scheduler._release
+
+    def slow_release(task):
+        # a finished worker may be descheduled before it gives its slot back
+        time.sleep(0.005)
+        release(task)
+
+    node = _make_parallel_iteration_node(parallel_nums=2)
+    items = list(range(20))
+    with (
+        patch.object(IterationNode, "_run_single_iter_parallel", side_effect=run_item),
+        patch.object(GraphEngineScheduler, "_instance", scheduler),
+        patch.object(scheduler, "_release", side_effect=slow_release),
+    ):
+        branch_thread, events = scheduler.submit(run_branch, tenant_id="tenant", group_id="run", max_running=10).result(
+            timeout=10
+        )
+
+    assert sorted(events) == sorted(f"event-{item}" for item in items)
+    # finished items free their slot before the next item is submitted, so none runs inline
+    assert scheduler.stats()["inline"] == 0
+    assert branch_thread not in item_threads
+    assert max_running == 2
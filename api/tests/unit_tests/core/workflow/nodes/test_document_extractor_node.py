@@ -14,6 +14,8 @@ from core.workflow.nodes.document_extractor import DocumentExtractorNode, Docume
 from core.workflow.nodes.document_extractor.node import (
     _extract_text_from_docx,
     _extract_text_from_excel,
+    _extract_text_from_file,
+    _extract_text_from_files,
     _extract_text_from_pdf,
     _extract_text_from_plain_text,
 )
@@ -166,6 +168,54 @@ def test_extract_text_from_pdf(mock_pdf_document):
     assert text == "PDF content"
 
 
+@patch("pypdfium2.PdfDocument")
+def test_extract_text_from_pdf_joins_pages(mock_pdf_document):
+    mock_pages = []
+    for page_text in ["page 1\n", "page 2\n", "page 3"]:
+        mock_text_page = Mock()
+        mock_text_page.get_text_range.return_value = page_text
+        mock_page = Mock()
+        mock_page.get_textpage.return_value = mock_text_page
+        mock_pages.append(mock_page)
+    mock_pdf_document.return_value = mock_pages
+    text = _extract_text_from_pdf(b"%PDF-1.5\n%Test PDF content")
+    assert text == "page 1\npage 2\npage 3"
+
+
+def _mock_local_file(extension: str) -> Mock:
+    mock_file = Mock(spec=File)
+    mock_file.mime_type = None
+    mock_file.transfer_method = FileTransferMethod.LOCAL_FILE
+    mock_file.extension = extension
+    return mock_file
+
+
+def test_extract_text_from_file_uses_extraction_cache(monkeypatch):
+    stored: dict[str, bytes] = {}
+    mock_redis = Mock()
+    mock_redis.get.side_effect = stored.get
+    mock_redis.setex.side_effect = lambda key, ttl, value: stored.__setitem__(key, value)
+    monkeypatch.setattr("core.helper.extraction_cache.redis_client", mock_redis)
+    monkeypatch.setattr("core.file.file_manager.download", Mock(return_value=b"%PDF-1.5\n%Test PDF content"))
+    mock_pdf_extract = Mock(return_value="Mocked PDF content")
+    monkeypatch.setattr("core.workflow.nodes.document_extractor.node._extract_text_from_pdf", mock_pdf_extract)
+
+    assert _extract_text_from_file(_mock_local_file(".pdf")) == "Mocked PDF content"
+    assert _extract_text_from_file(_mock_local_file(".pdf")) == "Mocked PDF content"
+    mock_pdf_extract.assert_called_once()
+
+    # a file of another type with the same content is extracted again
+    assert _extract_text_from_file(_mock_local_file(".txt")) == "%PDF-1.5\n%Test PDF content"
+
+
+def test_extract_text_from_files_keeps_order(monkeypatch):
+    monkeypatch.setattr("core.helper.extraction_cache.dify_config.EXTRACTION_CACHE_TTL", 0)
+    files = [_mock_local_file(".txt") for _ in range(10)]
+    monkeypatch.setattr("core.file.file_manager.download", lambda file: f"content of file {files.index(file)}".encode())
+
+    assert _extract_text_from_files(files) == [f"content of file {i}" for i in range(10)]
+
+
 @patch("docx.Document")
 def test_extract_text_from_docx(mock_document):
     mock_paragraph1 = Mock()
@@ -2,7 +2,7 @@ import pytest
 
 from core.file import File, FileTransferMethod, FileType
 from core.variables import FileSegment, StringSegment
-from core.workflow.entities.variable_pool import VariablePool
+from core.workflow.entities.variable_pool import VariablePool, _parse_template
 
 
 @pytest.fixture
@@ -44,3 +44,130 @@ def test_use_long_selector(pool):
     result = pool.get(("node_1", "part_1", "part_2"))
     assert result is not None
     assert result.value == "test_value"
+
+
+def test_selector_lookup_is_structural(pool):
+    pool.add(["node_1", "text"], "hello")
+    pool.add(("node_1", "part_1", "part_2"), "nested")
+
+    assert pool.get(("node_1", "text")).value == "hello"
+    assert pool.get(["node_1", "part_1", "part_2"]).value == "nested"
+    assert pool.get(("node_1", "part_1")) is None
+
+    pool.remove(["node_1", "text"])
+    assert pool.get(("node_1", "text")) is None
+    assert pool.get(("node_1", "part_1", "part_2")).value == "nested"
+
+
+def test_selector_elements_with_dots_do_not_collide(pool):
+    pool.add(("node_1", "a", "b"), "nested")
+    pool.add(("node_1", "a.b"), "dotted")
+    pool.add(("node_1", "a.b", "c"), "dotted nested")
+    pool.add(("node_1", "a", "b.c"), "nested dotted")
+
+    assert pool.get(("node_1", "a", "b")).value == "nested"
+    assert pool.get(("node_1", "a.b")).value == "dotted"
+    assert pool.get(("node_1", "a.b", "c")).value == "dotted nested"
+    assert pool.get(("node_1", "a", "b.c")).value == "nested dotted"
+
+
+def test_get_unknown_node_does_not_add_entry(pool):
+    assert pool.get(("missing_node", "text")) is None
+    assert "missing_node" not in pool.variable_dictionary
+
+
+def test_variable_dictionary_is_json_serializable(pool):
+    pool.add(("node_1", "part_1", "part_2"), StringSegment(value="test_value"))
+
+    dumped = pool.model_dump(mode="json")
+    assert [variable["value"] for variable in dumped["variable_dictionary"]["node_1"].values()] == ["test_value"]
+
+
+def test_render_template_matches_convert_template(pool):
+    pool.add(("node_1", "name"), "dify")
+    pool.add(("node_1", "count"), 3)
+    template = "Hello {{#node_1.name#}}, {{#node_1.count#}} items, {{#node_1.missing#}} and 1.5 left"
+
+    assert pool.render_template(template) == pool.convert_template(template).text
+    assert pool.render_template(template) == "Hello dify, 3 items, node_1.missing and 1.5 left"
+
+
+def test_template_is_parsed_once(pool):
+    _parse_template.cache_clear()
+    template = "{{#node_1.name#}} says hi"
+    pool.add(("node_1", "name"), "a")
+    assert pool.render_template(template) == "a says hi"
+    pool.add(("node_1", "name"), "b")
+    assert pool.convert_template(template).text == "b says hi"
+
+    cache_info = _parse_template.cache_info()
+    assert cache_info.misses == 1
+    assert cache_info.hits == 1
+
+
+def test_fork_reads_parent_and_keeps_own_writes(pool, file):
+    pool.add(("retrieval", "result"), "large result")
+    pool.add(("iteration", "index"), 0)
+    pool.add(("iteration", "files"), FileSegment(value=file))
+
+    fork = pool.fork()
+    fork.add(("iteration", "index"), 1)
+    fork.add(("llm", "text"), "answer")
+
+    assert fork.get(("retrieval", "result")).value == "large result"
+    assert fork.get(("iteration", "index")).value == 1
+    assert fork.get(("iteration", "files", "name")).value == file.filename
+    assert fork.get(("llm", "text")).value == "answer"
+    # only the nodes written by the fork are copied into it
+    assert set(dict(fork.variable_dictionary)) == {"iteration", "llm"}
+    # the parent pool is untouched
+    assert pool.get(("iteration", "index")).value == 0
+    assert pool.get(("llm", "text")) is None
+
+
+def test_fork_removes_without_touching_parent(pool):
+    pool.add(("node_1", "a"), "a")
+    pool.add(("node_1", "b"), "b")
+    pool.add(("node_2", "c"), "c")
+
+    fork = pool.fork()
+    fork.remove(("node_1", "a"))
+    fork.remove(("node_2",))
+
+    assert fork.get(("node_1", "a")) is None
+    assert fork.get(("node_1", "b")).value == "b"
+    assert fork.get(("node_2", "c")) is None
+    assert pool.get(("node_1", "a")).value == "a"
+    assert pool.get(("node_2", "c")).value == "c"
+
+
+def test_fork_of_fork(pool):
+    pool.add(("node_1", "a"), "a")
+    fork = pool.fork()
+    fork.add(("node_1", "b"), "b")
+
+    nested_fork = fork.fork()
+    nested_fork.add(("node_1", "c"), "c")
+
+    assert [nested_fork.get(("node_1", key)).value for key in ("a", "b", "c")] == ["a", "b", "c"]
+    assert fork.get(("node_1", "c")) is None
+    assert pool.get(("node_1", "b")) is None
+
+
+def test_variable_dictionary_round_trips_through_json(pool, file):
+    pool.add(("node_1", "a", "b"), "nested")
+    pool.add(("node_1", "file"), FileSegment(value=file))
+    pool.add(("node_1", "a,b"), "comma")
+    pool.add(("node_1", "a.b"), 1.5)
+    pool.add(("node_1", "[a"), [1, 2])
+
+    restored = VariablePool.model_validate_json(pool.model_dump_json())
+
+    assert restored.variable_dictionary["node_1"].keys() == pool.variable_dictionary["node_1"].keys()
+    assert restored.get(("node_1", "a", "b")).value == "nested"
+    assert restored.get(("node_1", "a,b")).value == "comma"
+    assert restored.get(("node_1", "a.b")).value == 1.5
+    assert restored.get(("node_1", "[a")).value == [1, 2]
+    assert restored.get(("node_1", "file")).value.model_dump() == file.model_dump()
+    restored.add(("node_2", "text"), "added after loading")
+    assert restored.get(("node_2", "text")).value == "added after loading"
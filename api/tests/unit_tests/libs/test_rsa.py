@@ -1,7 +1,10 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
 import rsa as pyrsa
 from Crypto.PublicKey import RSA
 
-from libs import gmpy2_pkcs10aep_cipher
+from libs import gmpy2_pkcs10aep_cipher, rsa
 
 
 def test_gmpy2_pkcs10aep_cipher() -> None:
@@ -27,3 +30,44 @@ def test_gmpy2_pkcs10aep_cipher() -> None:
     encrypted_by_private_key = private_cipher_rsa.encrypt(message=raw_text_bytes)
     decrypted_by_private_key = private_cipher_rsa.decrypt(encrypted_by_private_key)
     assert decrypted_by_private_key == raw_text_bytes
+
+
+def test_get_decrypt_decoding_is_cached_per_tenant() -> None:
+    private_key = RSA.generate(2048)
+    encrypted = rsa.encrypt("raw_text", private_key.publickey().export_key())
+    rsa.clear_decrypt_decoding()
+
+    with (
+        patch("libs.rsa.redis_client", new=MagicMock()) as mock_redis,
+        patch("libs.rsa.storage", new=MagicMock()) as mock_storage,
+    ):
+        mock_redis.get.return_value = None
+        mock_storage.load.return_value = private_key.export_key()
+
+        assert rsa.decrypt(encrypted, "tenant_id") == "raw_text"
+        assert rsa.decrypt(encrypted, "tenant_id") == "raw_text"
+        assert mock_storage.load.call_count == 1
+
+        # a new key pair of the tenant replaces the cached one
+        mock_storage.load.return_value = RSA.generate(2048).export_key()
+        rsa.generate_key_pair("tenant_id")
+        with pytest.raises(ValueError):
+            rsa.decrypt(encrypted, "tenant_id")
+
+    rsa.clear_decrypt_decoding()
+
+
+def test_get_decrypt_decoding_without_cache() -> None:
+    rsa.clear_decrypt_decoding()
+
+    with (
+        patch("libs.rsa.dify_config.TENANT_DECRYPT_KEY_CACHE_TTL", 0),
+        patch("libs.rsa.redis_client", new=MagicMock()) as mock_redis,
+        patch("libs.rsa.storage", new=MagicMock()) as mock_storage,
+    ):
+        mock_redis.get.return_value = RSA.generate(2048).export_key()
+
+        rsa.get_decrypt_decoding("tenant_id")
+        rsa.get_decrypt_decoding("tenant_id")
+        assert mock_redis.get.call_count == 2
+        mock_storage.load.assert_not_called()
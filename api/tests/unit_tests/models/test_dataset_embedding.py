@@ -0,0 +1,49 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from models.dataset import Embedding, decode_embedding, encode_embedding
+
+
+def test_encode_decode_float32_round_trip():
+    vector = [0.1, -0.2, 0.3, 0.4]
+    data = encode_embedding(vector)
+
+    assert len(data) == 4 + 4 * len(vector)
+    decoded = decode_embedding(data)
+    assert decoded.dtype == np.dtype("<f4")
+    assert np.allclose(decoded, vector)
+
+
+def test_encode_decode_float16_round_trip():
+    vector = [0.5, -0.25, 0.125]
+    data = encode_embedding(vector, "float16")
+
+    assert len(data) == 4 + 2 * len(vector)
+    assert decode_embedding(data).tolist() == vector
+
+
+def test_decode_rejects_unknown_version():
+    data = bytearray(encode_embedding([1.0]))
+    data[2] = 99
+
+    with pytest.raises(ValueError, match="Unsupported embedding format version"):
+        decode_embedding(bytes(data))
+
+
+def test_get_embedding_reads_legacy_pickle_rows():
+    vector = [0.1, 0.2, 0.3]
+    embedding = Embedding(embedding=pickle.dumps(vector, protocol=pickle.HIGHEST_PROTOCOL))
+
+    assert embedding.is_legacy_format
+    assert embedding.get_embedding() == vector
+    assert np.allclose(embedding.get_embedding_array(), vector)
+
+
+def test_set_embedding_writes_binary_format():
+    embedding = Embedding()
+    embedding.set_embedding([0.5, 0.25])
+
+    assert not embedding.is_legacy_format
+    assert embedding.get_embedding() == [0.5, 0.25]
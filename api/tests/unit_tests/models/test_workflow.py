@@ -43,7 +43,10 @@ def test_environment_variables():
 
     with (
         mock.patch("core.helper.encrypter.encrypt_token", return_value="encrypted_token"),
-        mock.patch("core.helper.encrypter.decrypt_token", return_value="secret"),
+        mock.patch(
+            "core.helper.encrypter.batch_decrypt_token",
+            side_effect=lambda tenant_id, tokens: ["secret"] * len(tokens),
+        ),
         mock.patch("models.workflow.current_user", mock_user),
     ):
         # Set the environment_variables property of the Workflow instance
@@ -90,7 +93,10 @@ def test_update_environment_variables():
 
     with (
         mock.patch("core.helper.encrypter.encrypt_token", return_value="encrypted_token"),
-        mock.patch("core.helper.encrypter.decrypt_token", return_value="secret"),
+        mock.patch(
+            "core.helper.encrypter.batch_decrypt_token",
+            side_effect=lambda tenant_id, tokens: ["secret"] * len(tokens),
+        ),
         mock.patch("models.workflow.current_user", mock_user),
     ):
         variables = [variable1, variable2, variable3, variable4]
@@ -136,7 +142,10 @@ def test_to_dict():
 
     with (
         mock.patch("core.helper.encrypter.encrypt_token", return_value="encrypted_token"),
-        mock.patch("core.helper.encrypter.decrypt_token", return_value="secret"),
+        mock.patch(
+            "core.helper.encrypter.batch_decrypt_token",
+            side_effect=lambda tenant_id, tokens: ["secret"] * len(tokens),
+        ),
         mock.patch("models.workflow.current_user", mock_user),
     ):
         # Set the environment_variables property of the Workflow instance